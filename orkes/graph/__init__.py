@@ -5,11 +5,26 @@ from .schema import (
     NodeTrace,
     LLMTraceSchema,
     FunctionTraceSchema,
+    StateDiff,
+    TracePolicy,
     EdgeTrace,
     TracesSchema,
+    RunUsage,
+    TokenBudgetExceededError,
+    RunContext,
+    BatchResult,
 )
-from .unit import Node, Edge, ForwardEdge, ConditionalEdge
-from .utils import orkes_tracable, function_assertion, is_typeddict_class, check_dict_values_type, randomize_color_hex
+from .tracing import (
+    TraceSink,
+    JsonlTraceSink,
+    TraceExporter,
+    FileTraceExporter,
+    InMemoryTraceExporter,
+    BackgroundTraceExporter,
+    read_jsonl_trace,
+)
+from .unit import Node, Edge, ForwardEdge, ConditionalEdge, ParallelEdge
+from .utils import orkes_tracable, function_assertion, is_typeddict_class, get_state_reducers, check_dict_values_type, randomize_color_hex
 
 __all__ = [
     "OrkesGraph",
@@ -18,15 +33,30 @@ __all__ = [
     "NodeTrace",
     "LLMTraceSchema",
     "FunctionTraceSchema",
+    "StateDiff",
+    "TracePolicy",
     "EdgeTrace",
     "TracesSchema",
+    "RunUsage",
+    "TokenBudgetExceededError",
+    "RunContext",
+    "BatchResult",
+    "TraceSink",
+    "JsonlTraceSink",
+    "TraceExporter",
+    "FileTraceExporter",
+    "InMemoryTraceExporter",
+    "BackgroundTraceExporter",
+    "read_jsonl_trace",
     "Node",
     "Edge",
     "ForwardEdge",
     "ConditionalEdge",
+    "ParallelEdge",
     "orkes_tracable",
     "function_assertion",
     "is_typeddict_class",
+    "get_state_reducers",
     "check_dict_values_type",
     "randomize_color_hex",
 ]
@@ -1,8 +1,9 @@
-from typing import Callable, Union, Dict, List
+from typing import Callable, Optional, Union, Dict, List
 from orkes.graph.utils import function_assertion, is_typeddict_class
-from orkes.graph.unit import Node, Edge, ForwardEdge, ConditionalEdge, _StartNode, _EndNode
-from orkes.graph.schema import NodePoolItem
+from orkes.graph.unit import Node, Edge, ForwardEdge, ConditionalEdge, ParallelEdge, _StartNode, _EndNode
+from orkes.graph.schema import NodePoolItem, TracePolicy
 from orkes.graph.runner import GraphRunner
+from orkes.graph.tracing import TraceSink
 import uuid
 
 class OrkesGraph:
@@ -16,7 +17,13 @@ class OrkesGraph:
         state (type): The TypedDict class that defines the shared state of the graph.
         name (str): The name of the graph.
         description (str): A description of the graph.
-        traced (bool): Whether to trace the graph execution.
+        traced (Union[bool, TracePolicy]): Whether to trace the graph execution, or
+            the policy bounding how much of each run is traced.
+        copy_on_write (bool): Whether nodes receive a copy-on-write view of the state.
+        snapshot_mode (str): Whether edge traces store the full state ("full") or
+            only what changed since the previous edge ("delta").
+        trace_sink (Optional[TraceSink]): Receives edge traces while runs are in progress.
+        token_budget (Optional[int]): The most LLM tokens a single run may use.
 
     Example:
         >>> from typing import TypedDict, List
@@ -44,21 +51,47 @@ class OrkesGraph:
         {'messages': ['Hello from node1', 'Hello from node2']}
     """
 
-    def __init__(self, state, name: str = "default_graph", description: str = "", traced: bool = True):
+    def __init__(self, state, name: str = "default_graph", description: str = "", traced: Union[bool, TracePolicy] = True, copy_on_write: bool = False, snapshot_mode: str = "full", trace_sink: Optional[TraceSink] = None, token_budget: Optional[int] = None):
         """Initializes an OrkesGraph.
 
         Args:
             state (type): The TypedDict class that defines the shared state of the graph.
             name (str, optional): The name of the graph. Defaults to "default_graph".
             description (str, optional): A description of the graph. Defaults to "".
-            traced (bool, optional): Whether to trace the graph execution. Defaults to True.
+            traced (Union[bool, TracePolicy], optional): Whether to trace the graph
+                execution. Pass a `TracePolicy` to bound trace memory for long runs,
+                e.g. ``TracePolicy(max_edges=100)`` keeps the last 100 edges.
+                Defaults to True.
+            copy_on_write (bool, optional): Whether nodes receive a copy-on-write
+                `StateView` of the state instead of a shallow copy. The view makes
+                each step cost proportional to the keys a node changes rather than
+                the size of the state, but it is a mapping, not a `dict`: call
+                ``dict(state)`` where a real dict is needed. Defaults to False.
+            snapshot_mode (str, optional): "full" stores the whole state on every
+                edge trace; "delta" stores the state once, then only the keys that
+                changed at each edge. Use `TracesSchema.rebuild_state` to get the
+                full state of any edge back. Defaults to "full".
+            trace_sink (Optional[TraceSink], optional): A sink that receives each
+                edge trace as soon as the edge completes, e.g. a `JsonlTraceSink`
+                streaming traces to disk. Defaults to None.
+            token_budget (Optional[int], optional): The most LLM tokens, as reported
+                by the providers, a single run may use. Once a run exceeds it, no
+                further LLM request is sent and the run stops before its next edge
+                with a `TokenBudgetExceededError`. Defaults to None, for no limit.
 
         Raises:
             TypeError: If the state is not a TypedDict class.
+            ValueError: If `snapshot_mode` is not "full" or "delta".
         """
+        if snapshot_mode not in ("full", "delta"):
+            raise ValueError(f"snapshot_mode must be 'full' or 'delta', got '{snapshot_mode}'.")
         self.state = state
         self.name = name
         self.traced = traced
+        self.copy_on_write = copy_on_write
+        self.snapshot_mode = snapshot_mode
+        self.trace_sink = trace_sink
+        self.token_budget = token_budget
         self.description = description
         self.id = "graph_" + str(uuid.uuid4())
         self.START = _StartNode(self.state)
@@ -160,6 +193,56 @@ class OrkesGraph:
         if "END" in condition.values():
             self._nodes_pool["END"].edge = "<END GRAPH TOKEN>"
 
+    def add_parallel_edge(self, from_node: Union[str, _StartNode], branches: List[str], join_node: Union[str, _EndNode], max_passes: int = 25):
+        """Adds a fan-out edge whose branches run concurrently and meet at a join node.
+
+        Every branch starts at one of the `branches` nodes and follows its own edges
+        until it reaches `join_node`. Branches run on threads with `run` and as
+        asyncio tasks with `arun`, each on its own copy of the state. Once all
+        branches are done their results are merged and `join_node` runs once.
+
+        Keys changed by several branches need a reducer declared on the state, e.g.
+        ``results: Annotated[List[str], operator.add]``. The reducer is called as
+        ``reducer(current, branch_value)`` with the value each branch left in its
+        state, so branch nodes should return only their own contribution for such
+        keys (``return {"results": [item]}``).
+
+        Args:
+            from_node (Union[str, _StartNode]): The node the branches fan out from.
+            branches (List[str]): The first node of every branch.
+            join_node (Union[str, _EndNode]): The node where all branches meet.
+            max_passes (int, optional): The maximum number of times this edge can be
+                                      traversed. Defaults to 25.
+
+        Raises:
+            RuntimeError: If the graph has been compiled.
+            ValueError: If fewer than two branches are given, or a branch is the
+                        join node itself.
+        """
+        if self._freeze:
+            raise RuntimeError("Cannot modify after compile")
+
+        from_node_item = self._validate_from_node(from_node)
+        join_node_item = self._validate_to_node(join_node)
+
+        if len(branches) < 2:
+            raise ValueError("A parallel edge needs at least two branches.")
+
+        branch_items = []
+        for branch in branches:
+            if not isinstance(branch, str):
+                raise TypeError(f"Branch nodes must be given by name, got {type(branch)}")
+            branch_item = self._validate_to_node(branch)
+            if branch_item is join_node_item:
+                raise ValueError(f"Branch '{branch}' cannot be the join node.")
+            branch_items.append(branch_item)
+
+        edge = ParallelEdge(from_node_item, branch_items, join_node_item, max_passes=max_passes)
+        self._nodes_pool[from_node_item.node.name].edge = edge
+        self._edges_pool.append(edge)
+        if join_node_item == self._nodes_pool['END']:
+            join_node_item.edge = "<END GRAPH TOKEN>"
+
     def _validate_condition(self, condition: Dict[str, Union[str, Node]]):
         """Validates the condition dictionary for a conditional edge.
 
@@ -272,6 +355,10 @@ class OrkesGraph:
             # TODO: Add checks for conditional edges.
             elif edge.edge_type == "__conditional__":
                 pass
+            elif edge.edge_type == "__parallel__":
+                for branch in edge.branches:
+                    if not branch.edge:
+                        raise RuntimeError(f"Branch node '{branch.node.name}' of edge {edge.id} has an empty edge.")
         for node_name, node in self._nodes_pool.items():
             if not node.edge:  # Checks if edge is empty
                 raise RuntimeError(f"Node '{node_name}' has an empty edge.")
@@ -281,7 +368,11 @@ class OrkesGraph:
                            graph_description=self.description,
                            nodes_pool=self._nodes_pool,
                            graph_type=self.state,
-                           traced=self.traced)
+                           traced=self.traced,
+                           copy_on_write=self.copy_on_write,
+                           snapshot_mode=self.snapshot_mode,
+                           trace_sink=self.trace_sink,
+                           token_budget=self.token_budget)
 
     def detect_loop(self):
         """Detects loops in the graph.
@@ -1,14 +1,22 @@
 
-import json
 import time
 import uuid
 import os
-from typing import Dict, Union, Optional
-from orkes.graph.unit import ForwardEdge, ConditionalEdge
-from orkes.graph.schema import NodePoolItem, TracesSchema, EdgeTrace
+import asyncio
+import contextvars
+import itertools
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Union, Optional
+from orkes.graph.unit import Edge, ForwardEdge, ConditionalEdge, ParallelEdge
+from orkes.graph.schema import NodePoolItem, TracesSchema, EdgeTrace, RunContext, RunUsage, BatchResult, StateDiff, TracePolicy, TokenBudgetExceededError
 from orkes.graph.unit import _EndNode, _StartNode
 from orkes.visualizer.generator import TraceInspector
-from orkes.shared.context import trace_var, edge_id_var, edge_trace_var
+from orkes.graph.utils import get_state_reducers
+from orkes.graph.state import BranchState, StateView, apply_update
+from orkes.graph.tracing import TraceSink
+from orkes.shared.context import trace_var, edge_id_var, edge_trace_var, usage_var
+from orkes.shared import serialization
 from datetime import datetime
 
 class GraphRunner:
@@ -18,21 +26,39 @@ class GraphRunner:
     graph, executing the nodes and updating the state accordingly. It also records
     traces of the execution, which can be saved to a file and visualized.
 
+    Every call to `run` works on its own `RunContext` (state, pass counters, trace
+    and run ID), so a single GraphRunner can be shared between threads or event
+    loop tasks. The `graph_state`, `run_id` and `trace` attributes mirror the most
+    recently started run for convenience; concurrent callers should use
+    `run_with_context` to get the context of their own run.
+
     Attributes:
         state_def (type): The TypedDict class that defines the shared state of the graph.
+        reducers (Dict[str, Callable]): The per-key reducers declared on the state,
+                                        used to merge the results of parallel branches.
         nodes_pool (Dict[str, NodePoolItem]): A dictionary of all nodes in the graph.
-        graph_state (Dict): The current state of the graph.
-        run_id (str): A unique identifier for the current run.
+        graph_state (Dict): The state of the most recent run.
+        run_id (str): The unique identifier of the most recent run.
         graph_name (str): The name of the graph being executed.
         graph_description (str): The description of the graph being executed.
-        trace (TracesSchema): The trace of the current run.
+        trace (TracesSchema): The trace of the most recent run.
         traces_dir (str): The directory where traces are saved.
-        run_number (int): The current step number in the execution.
         auto_save_trace (bool): If True, the trace is automatically saved after execution.
+        trace_policy (Optional[TracePolicy]): How much of each run is kept in its
+                                              trace, or None when tracing is off.
+        copy_on_write (bool): If True, nodes receive a copy-on-write `StateView` and
+                              only the keys they change are written back.
+        snapshot_mode (str): "full" to store the whole state on every edge trace,
+                             "delta" to store only the keys that changed since the
+                             previous edge.
+        trace_sink (Optional[TraceSink]): Receives the trace of every recorded run
+                                          while the run is in progress.
+        token_budget (Optional[int]): The most LLM tokens a single run may use, or
+                                      None for no limit.
         trace_inspector (TraceInspector): An object to generate a visualization of the trace.
     """
 
-    def __init__(self, graph_name: str, graph_description: str, nodes_pool: Dict[str, NodePoolItem], graph_type: Dict, traces_dir: str = "traces", auto_save_trace: bool = False, traced: bool = True):
+    def __init__(self, graph_name: str, graph_description: str, nodes_pool: Dict[str, NodePoolItem], graph_type: Dict, traces_dir: str = "traces", auto_save_trace: bool = False, traced: Union[bool, TracePolicy] = True, copy_on_write: bool = False, snapshot_mode: str = "full", trace_sink: Optional[TraceSink] = None, token_budget: Optional[int] = None):
         """Initializes the GraphRunner.
 
         Args:
@@ -43,50 +69,84 @@ class GraphRunner:
             traces_dir (str, optional): The directory to save traces. Defaults to "traces".
             auto_save_trace (bool, optional): Whether to automatically save traces.
                                             Defaults to False.
-            traced (bool, optional): Whether to enable tracing. Defaults to True.
+            traced (Union[bool, TracePolicy], optional): Whether to enable tracing,
+                or a `TracePolicy` bounding how much of each run is kept. True
+                keeps everything. Defaults to True.
+            copy_on_write (bool, optional): Whether nodes receive a copy-on-write
+                `StateView` instead of a shallow copy of the state. Defaults to False.
+            snapshot_mode (str, optional): How edge traces record the state, either
+                "full" or "delta". Defaults to "full".
+            trace_sink (Optional[TraceSink], optional): A sink that receives each
+                edge trace as soon as it is recorded. Defaults to None.
+            token_budget (Optional[int], optional): The most LLM tokens a single run
+                may use. Defaults to None, for no limit.
+
+        Raises:
+            ValueError: If `snapshot_mode` is not "full" or "delta", or if
+                `token_budget` is negative.
         """
+        if snapshot_mode not in ("full", "delta"):
+            raise ValueError(f"snapshot_mode must be 'full' or 'delta', got '{snapshot_mode}'.")
+        if token_budget is not None and token_budget < 0:
+            raise ValueError(f"token_budget must be at least 0, got {token_budget}.")
         self.state_def = graph_type
+        self.reducers = get_state_reducers(graph_type)
         self.nodes_pool = nodes_pool
+        self._state_keys = frozenset(graph_type.__annotations__)
+        self._nodes_trace = [v.node.node_trace for v in nodes_pool.values()]
         self.graph_state: Dict = {}
-        self.run_id = str(uuid.uuid4())
+        self.run_id = None
         self.graph_name = graph_name
         self.graph_description = graph_description
-        self.traced = traced
+        if isinstance(traced, TracePolicy):
+            self.trace_policy = traced
+        else:
+            self.trace_policy = TracePolicy() if traced else None
+        self.traced = self.trace_policy is not None
+        self._run_counter = itertools.count()
+        self.copy_on_write = copy_on_write
+        self.snapshot_mode = snapshot_mode
+        self.trace_sink = trace_sink
+        self.token_budget = token_budget
         self.trace = None
         self.trace_inspector = None
         if self.traced:
-            self.trace = TracesSchema(
-                run_id=self.run_id,
-                graph_name=self.graph_name,
-                graph_description=self.graph_description,
-                nodes_trace=[v.node.node_trace for k, v in nodes_pool.items()],
-                edges_trace=[]
-            )
             self.trace_inspector = TraceInspector()
 
         self.traces_dir = traces_dir
-        self.run_number = 0
         self.auto_save_trace = auto_save_trace
 
-    def save_run_trace(self):
-        """Saves the execution trace to a JSON file."""
-        if not self.traced:
+    def save_run_trace(self, trace: Optional[TracesSchema] = None):
+        """Saves an execution trace to a JSON file.
+
+        Args:
+            trace (Optional[TracesSchema], optional): The trace to save. Defaults to
+                the trace of the most recent run.
+        """
+        trace = trace or self.trace
+        if not self.traced or trace is None:
             return
         if not os.path.exists(self.traces_dir):
             os.makedirs(self.traces_dir)
-        filename = os.path.join(self.traces_dir, f"trace_{self.run_id}.json")
-        with open(filename, 'w') as f:
-            json.dump(self.trace.model_dump(), f, indent=4)
+        filename = os.path.join(self.traces_dir, f"trace_{trace.run_id}.json")
+        with open(filename, 'wb') as f:
+            f.write(serialization.dump_model(trace, indent=True))
+
+    def visualize_trace(self, trace: Optional[TracesSchema] = None):
+        """Generates an HTML visualization of an execution trace.
 
-    def visualize_trace(self):
-        """Generates an HTML visualization of the execution trace."""
-        if not self.traced:
+        Args:
+            trace (Optional[TracesSchema], optional): The trace to visualize. Defaults
+                to the trace of the most recent run.
+        """
+        trace = trace or self.trace
+        if not self.traced or trace is None:
             return
         if not os.path.exists(self.traces_dir):
             os.makedirs(self.traces_dir)
-        base_name = f"trace_{self.run_id}_inspector.html"
+        base_name = f"trace_{trace.run_id}_inspector.html"
         out_file = os.path.join(self.traces_dir, base_name)
-        self.trace_inspector.generate_viz(self.trace.model_dump(), out_file)
+        self.trace_inspector.generate_viz(trace.model_dump(), out_file)
 
     def run(self, invoke_state: Dict) -> Dict:
         """Runs the graph with a given initial state.
@@ -99,180 +159,846 @@ class GraphRunner:
 
         Raises:
             KeyError: If the invoke_state contains keys not defined in the graph's state.
+            TokenBudgetExceededError: If the run used more tokens than its budget.
         """
-        # Check that all keys in invoke_state exist in graph_state
-        missing_keys = [key for key in invoke_state if key not in self.state_def.__annotations__]
+        return self.run_with_context(invoke_state).graph_state
 
-        if missing_keys:
-            raise KeyError(f"The following items are missing in self.graph_state: {missing_keys}")
+    def run_with_context(self, invoke_state: Dict) -> RunContext:
+        """Runs the graph and returns the context of that run.
+
+        Unlike `run`, the returned context belongs to this call only, which makes
+        it the safe way to read the trace or run ID when the runner is shared.
+
+        Args:
+            invoke_state (Dict): The initial state to run the graph with.
+
+        Returns:
+            RunContext: The context of the finished run, holding its final state,
+            trace and run ID.
+
+        Raises:
+            KeyError: If the invoke_state contains keys not defined in the graph's state.
+            TokenBudgetExceededError: If the run used more tokens than its budget.
+        """
+        ctx = self._create_context(invoke_state)
+        self._execute(ctx)
+        return ctx
+
+    def run_batch(self, states: Iterable[Dict], max_concurrency: int = 8, executor: Optional[Executor] = None) -> List[BatchResult]:
+        """Runs the graph over many input states concurrently.
+
+        Results come back in input order. A failing input is reported in its
+        `BatchResult` and does not abort the rest of the batch.
+
+        Args:
+            states (Iterable[Dict]): The initial states, one per run.
+            max_concurrency (int, optional): The maximum number of runs in flight at
+                once. Defaults to 8.
+            executor (Optional[Executor], optional): The executor to run on. Defaults
+                to a thread pool of `max_concurrency` workers created for this batch.
+
+        Returns:
+            List[BatchResult]: One result per input state, in input order.
+        """
+        results = list(self.iter_batch(states, max_concurrency=max_concurrency, executor=executor))
+        results.sort(key=lambda result: result.index)
+        return results
+
+    def iter_batch(self, states: Iterable[Dict], max_concurrency: int = 8, executor: Optional[Executor] = None) -> Iterator[BatchResult]:
+        """Runs the graph over many input states and yields results as they complete.
+
+        Inputs are consumed lazily and at most `max_concurrency` runs are submitted
+        at a time, so very large or generated inputs never pile up in the executor.
 
-        # Merge invoke_state into a copy of graph_state (avoid mutating original)
-        self.graph_state = invoke_state
-        input_state = self.graph_state.copy()
+        Args:
+            states (Iterable[Dict]): The initial states, one per run.
+            max_concurrency (int, optional): The maximum number of runs in flight at
+                once. Defaults to 8.
+            executor (Optional[Executor], optional): The executor to run on. Defaults
+                to a thread pool of `max_concurrency` workers created for this batch.
+
+        Yields:
+            BatchResult: The result of each run, in completion order. Use `index` to
+            match it with its input.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        pool = executor or ThreadPoolExecutor(max_workers=max_concurrency)
+        pending = set()
+        try:
+            for index, state in enumerate(states):
+                if len(pending) >= max_concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                pending.add(pool.submit(contextvars.copy_context().run, self._run_batch_item, index, state))
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if executor is None:
+                pool.shutdown(wait=True)
+
+    async def arun_batch(self, states: Iterable[Dict], max_concurrency: int = 8) -> List[BatchResult]:
+        """Runs the graph over many input states concurrently from an event loop.
+
+        Args:
+            states (Iterable[Dict]): The initial states, one per run.
+            max_concurrency (int, optional): The maximum number of runs in flight at
+                once. Defaults to 8.
+
+        Returns:
+            List[BatchResult]: One result per input state, in input order.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_item(index: int, state: Dict) -> BatchResult:
+            async with semaphore:
+                return await self._arun_batch_item(index, state)
+
+        return list(await asyncio.gather(*[
+            run_item(index, state) for index, state in enumerate(states)
+        ]))
+
+    def _run_batch_item(self, index: int, state: Dict) -> BatchResult:
+        """Runs a single batch input and captures its outcome.
+
+        Args:
+            index (int): The position of the input in the batch.
+            state (Dict): The initial state of the run.
+
+        Returns:
+            BatchResult: The outcome of the run.
+        """
+        ctx = None
+        try:
+            ctx = self._create_context(state)
+            self._execute(ctx)
+        except Exception as e:
+            return self._batch_result(index, ctx, e)
+        return self._batch_result(index, ctx)
+
+    async def _arun_batch_item(self, index: int, state: Dict) -> BatchResult:
+        """Awaitable counterpart of `_run_batch_item`.
+
+        Args:
+            index (int): The position of the input in the batch.
+            state (Dict): The initial state of the run.
+
+        Returns:
+            BatchResult: The outcome of the run.
+        """
+        ctx = None
+        try:
+            ctx = self._create_context(state)
+            await self._aexecute(ctx)
+        except Exception as e:
+            return self._batch_result(index, ctx, e)
+        return self._batch_result(index, ctx)
+
+    def _batch_result(self, index: int, ctx: Optional[RunContext], error: Optional[Exception] = None) -> BatchResult:
+        """Builds the BatchResult of a finished or failed run.
+
+        Args:
+            index (int): The position of the input in the batch.
+            ctx (Optional[RunContext]): The context of the run, or None if the input
+                was rejected before the run started.
+            error (Optional[Exception], optional): The exception raised by the run.
+
+        Returns:
+            BatchResult: The outcome of the run.
+        """
+        return BatchResult(
+            index=index,
+            run_id=ctx.run_id if ctx is not None else None,
+            status=self._status(error),
+            state=ctx.graph_state if ctx is not None and error is None else None,
+            trace=ctx.trace if ctx is not None else None,
+            error=error
+        )
+
+    async def arun(self, invoke_state: Dict) -> Dict:
+        """Runs the graph from an event loop with a given initial state.
+
+        Coroutine nodes and gate functions are awaited; plain functions are run in
+        the default executor, so a single process can drive many concurrent runs.
+
+        Args:
+            invoke_state (Dict): The initial state to run the graph with.
+
+        Returns:
+            Dict: The final state of the graph after execution.
+
+        Raises:
+            KeyError: If the invoke_state contains keys not defined in the graph's state.
+            TokenBudgetExceededError: If the run used more tokens than its budget.
+        """
+        ctx = await self.arun_with_context(invoke_state)
+        return ctx.graph_state
+
+    async def arun_with_context(self, invoke_state: Dict) -> RunContext:
+        """Runs the graph from an event loop and returns the context of that run.
+
+        Args:
+            invoke_state (Dict): The initial state to run the graph with.
+
+        Returns:
+            RunContext: The context of the finished run, holding its final state,
+            trace and run ID.
+
+        Raises:
+            KeyError: If the invoke_state contains keys not defined in the graph's state.
+            TokenBudgetExceededError: If the run used more tokens than its budget.
+        """
+        ctx = self._create_context(invoke_state)
+        await self._aexecute(ctx)
+        return ctx
+
+    def _execute(self, ctx: RunContext):
+        """Traverses the graph from START for a freshly created run context.
+
+        Args:
+            ctx (RunContext): The context of the run to execute.
+        """
+        input_state = self._input_state(ctx.graph_state)
 
         # Start traversal from the START node
-        start_pool = self.nodes_pool['START']
-        start_edges = start_pool.edge
+        start_edges = self.nodes_pool['START'].edge
 
-        if self.traced:
-            self.trace.start_time = time.time()
-            token = trace_var.set(self.trace)
-            try:
-                self.traverse_graph(start_edges, input_state)
-            finally:
-                trace_var.reset(token)
+        usage_token = usage_var.set(ctx.usage)
+        try:
+            if ctx.trace is not None:
+                self._start_trace(ctx)
+                token = trace_var.set(ctx.trace)
+                try:
+                    self.traverse_graph(start_edges, input_state, ctx)
+                    ctx.trace.status = "FINISHED"
+                except TokenBudgetExceededError as e:
+                    ctx.trace.status = self._status(e)
+                    raise
+                finally:
+                    trace_var.reset(token)
+                    self._finish_trace(ctx)
+            else:
+                self.traverse_graph(start_edges, input_state, ctx)
+        finally:
+            usage_var.reset(usage_token)
 
-            self.trace.elapsed_time = time.time() - self.trace.start_time
-            self.trace.status = "FINISHED"
-            if self.auto_save_trace:
-                self.save_run_trace()
-        else:
-            self.traverse_graph(start_edges, input_state)
+    async def _aexecute(self, ctx: RunContext):
+        """Awaitable counterpart of `_execute`.
 
-        return self.graph_state
+        Args:
+            ctx (RunContext): The context of the run to execute.
+        """
+        input_state = self._input_state(ctx.graph_state)
 
-    def traverse_graph(self, current_edge: Union[ForwardEdge, ConditionalEdge], input_state: Dict):
-        """Traverses the graph, either with or without tracing.
+        start_edges = self.nodes_pool['START'].edge
+
+        usage_token = usage_var.set(ctx.usage)
+        try:
+            if ctx.trace is not None:
+                self._start_trace(ctx)
+                token = trace_var.set(ctx.trace)
+                try:
+                    await self.atraverse_graph(start_edges, input_state, ctx)
+                    ctx.trace.status = "FINISHED"
+                except TokenBudgetExceededError as e:
+                    ctx.trace.status = self._status(e)
+                    raise
+                finally:
+                    trace_var.reset(token)
+                    self._finish_trace(ctx)
+            else:
+                await self.atraverse_graph(start_edges, input_state, ctx)
+        finally:
+            usage_var.reset(usage_token)
+
+    def _status(self, error: Optional[BaseException] = None) -> str:
+        """Returns the status of a run that ended, possibly with an error.
 
         Args:
-            current_edge (Union[ForwardEdge, ConditionalEdge]): The current edge to traverse.
-            input_state (Dict): The current state of the graph.
+            error (Optional[BaseException], optional): The exception that ended the run.
+
+        Returns:
+            str: "FINISHED", "BUDGET_EXCEEDED" or "FAILED".
         """
+        if error is None:
+            return "FINISHED"
+        if isinstance(error, TokenBudgetExceededError):
+            return "BUDGET_EXCEEDED"
+        return "FAILED"
+
+    def _start_trace(self, ctx: RunContext):
+        """Marks the start of a run's trace and opens it on the trace sink.
+
+        Args:
+            ctx (RunContext): The context of the run about to execute.
+        """
+        ctx.trace.start_time = time.time()
+        if self.trace_sink is not None and ctx.trace.sampled:
+            self.trace_sink.start_run(ctx.trace)
+
+    def _finish_trace(self, ctx: RunContext):
+        """Fills in the summary of a run's trace and saves it if enabled.
+
+        Called whether the run finished or failed, so every run gets its summary;
+        only finished runs whose edges were recorded are saved.
+
+        Args:
+            ctx (RunContext): The context of the completed run.
+        """
+        trace = ctx.trace
+        trace.elapsed_time = time.time() - trace.start_time
+        trace.total_edges = sum(ctx.edge_passes.values())
+        usage = ctx.usage
+        trace.llm_calls = usage.llm_calls
+        trace.total_input_tokens = usage.input_tokens
+        trace.total_output_tokens = usage.output_tokens
+        trace.total_tokens = usage.total_tokens
+        trace.llm_latency = usage.latency
+        trace.token_budget = usage.token_budget
+        if not isinstance(trace.edges_trace, list):
+            trace.edges_trace = list(trace.edges_trace)
+        if self.trace_sink is not None and trace.sampled:
+            self.trace_sink.finish_run(trace)
+        if self.auto_save_trace and trace.sampled and trace.status == "FINISHED":
+            self.save_run_trace(trace)
+
+    def _create_context(self, invoke_state: Dict) -> RunContext:
+        """Validates the invoke state and builds an isolated context for a new run.
+
+        Args:
+            invoke_state (Dict): The initial state to run the graph with.
+
+        Returns:
+            RunContext: A new context whose state is a shallow copy of invoke_state.
+
+        Raises:
+            KeyError: If the invoke_state contains keys not defined in the graph's state.
+        """
+        # Check that all keys in invoke_state exist in graph_state
+        if not self._state_keys.issuperset(invoke_state):
+            missing_keys = [key for key in invoke_state if key not in self._state_keys]
+            raise KeyError(f"The following items are missing in self.graph_state: {missing_keys}")
+
+        run_id = str(uuid.uuid4())
+        trace = None
         if self.traced:
-            self._traverse_traced(current_edge, input_state)
-        else:
-            self._traverse_untraced(current_edge, input_state)
+            policy = self.trace_policy
+            sampled = next(self._run_counter) % policy.sample_rate == 0
+            # The node traces are built once per runner; only the run fields differ.
+            trace = TracesSchema.model_construct(
+                run_id=run_id,
+                graph_name=self.graph_name,
+                graph_description=self.graph_description,
+                nodes_trace=list(self._nodes_trace),
+                # A ring buffer while the run is in flight; _finish_trace makes it a list.
+                edges_trace=deque() if policy.max_edges is not None else [],
+                snapshot_mode=self.snapshot_mode,
+                sampled=sampled
+            )
+        # The context copies invoke_state, so the caller's dict is never mutated.
+        ctx = RunContext.model_construct(
+            run_id=run_id,
+            graph_state=dict(invoke_state),
+            trace=trace,
+            usage=RunUsage(token_budget=self.token_budget)
+        )
+
+        self.run_id = ctx.run_id
+        self.graph_state = ctx.graph_state
+        self.trace = ctx.trace
+        return ctx
+
+    def traverse_graph(self, current_edge: Edge, input_state: Dict, ctx: RunContext, state: Optional[Dict] = None, stop_at: Optional[NodePoolItem] = None):
+        """Traverses the graph, either with or without tracing.
+
+        The traversal is iterative: each step executes a single edge and hands
+        back the node to visit next, so the stack depth stays constant no matter
+        how many steps a looping graph takes.
+
+        Args:
+            current_edge (Edge): The edge to start from.
+            input_state (Dict): The state handed to the first node.
+            ctx (RunContext): The context of the run being executed.
+            state (Optional[Dict], optional): The working state that node results
+                are applied to. Defaults to the run's graph state; parallel branches
+                pass their own branch state.
+            stop_at (Optional[NodePoolItem], optional): A node at which traversal
+                stops without executing it, used for the join node of parallel
+                branches. Defaults to None, which runs until END.
+
+        Raises:
+            RuntimeError: If a parallel branch reaches END before its join node.
+        """
+        state = ctx.graph_state if state is None else state
+        step = self._step_traced if self._is_recorded(ctx) else self._step_untraced
+        while True:
+            next_item = step(current_edge, input_state, state, ctx)
+            # Drop the reference to the previous step's input before the next
+            # copy is made, so at most one per-step copy is alive at a time.
+            input_state = None
+            if self._should_stop(next_item, stop_at):
+                return
+            current_edge = next_item.edge
+            input_state = self._input_state(state)
+
+    async def atraverse_graph(self, current_edge: Edge, input_state: Dict, ctx: RunContext, state: Optional[Dict] = None, stop_at: Optional[NodePoolItem] = None):
+        """Awaitable counterpart of `traverse_graph`.
+
+        Args:
+            current_edge (Edge): The edge to start from.
+            input_state (Dict): The state handed to the first node.
+            ctx (RunContext): The context of the run being executed.
+            state (Optional[Dict], optional): The working state that node results
+                are applied to. Defaults to the run's graph state.
+            stop_at (Optional[NodePoolItem], optional): A node at which traversal
+                stops without executing it. Defaults to None, which runs until END.
+
+        Raises:
+            RuntimeError: If a parallel branch reaches END before its join node.
+        """
+        state = ctx.graph_state if state is None else state
+        step = self._astep_traced if self._is_recorded(ctx) else self._astep_untraced
+        while True:
+            next_item = await step(current_edge, input_state, state, ctx)
+            input_state = None
+            if self._should_stop(next_item, stop_at):
+                return
+            current_edge = next_item.edge
+            input_state = self._input_state(state)
+
+    def _is_recorded(self, ctx: RunContext) -> bool:
+        """Tells whether the edges of a run are traced.
+
+        Args:
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            bool: False if tracing is off or the run was left out by sampling.
+        """
+        return ctx.trace is not None and ctx.trace.sampled
 
-    def _traverse_untraced(self, current_edge: Union[ForwardEdge, ConditionalEdge], input_state: Dict):
-        """Recursively traverses the graph without tracing.
+    def _should_stop(self, next_item: NodePoolItem, stop_at: Optional[NodePoolItem]) -> bool:
+        """Decides whether a traversal ends before visiting the given node.
 
         Args:
-            current_edge (Union[ForwardEdge, ConditionalEdge]): The current edge to traverse.
-            input_state (Dict): The current state of the graph.
+            next_item (NodePoolItem): The node the traversal is about to visit.
+            stop_at (Optional[NodePoolItem]): The node the traversal must stop at.
+
+        Returns:
+            bool: True if the traversal is complete.
+
+        Raises:
+            RuntimeError: If END is reached while a different stop node was expected.
+        """
+        if next_item is stop_at:
+            return True
+        if isinstance(next_item.node, _EndNode):
+            if stop_at is not None:
+                raise RuntimeError(
+                    f"A parallel branch reached END before joining at node '{stop_at.node.name}'."
+                )
+            return True
+        return False
+
+    def _input_state(self, state: Dict) -> Union[Dict, StateView]:
+        """Builds the state handed to the next node.
+
+        Args:
+            state (Dict): The working state.
+
+        Returns:
+            Union[Dict, StateView]: A copy-on-write view when the runner was built
+            with `copy_on_write`, otherwise a shallow copy of the state.
+        """
+        if self.copy_on_write:
+            return StateView(state)
+        return state.copy()
+
+    def _check_passes(self, current_edge: Edge, ctx: RunContext) -> int:
+        """Counts a traversal of an edge and enforces its pass limit and the run's token budget.
+
+        Args:
+            current_edge (Edge): The edge being traversed.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            int: The number of times the edge has been traversed in this run,
+            including this traversal.
 
         Raises:
             RuntimeError: If an edge is traversed more than the maximum allowed times.
+            TokenBudgetExceededError: If the run has used more tokens than its budget.
         """
-        if current_edge.passes > current_edge.max_passes:
-            raise RuntimeError(
-                f"Edge '{current_edge.id}' has been passed {current_edge.max_passes} times, "
-                "exceeding the allowed maximum without reaching a stop condition."
-            )
-        else:
-            current_edge.passes += 1
+        ctx.usage.check()
+        with ctx.lock:
+            passes = ctx.edge_passes.get(current_edge.id, 0)
+            if passes > current_edge.max_passes:
+                raise RuntimeError(
+                    f"Edge '{current_edge.id}' has been passed {current_edge.max_passes} times, "
+                    "exceeding the allowed maximum without reaching a stop condition."
+                )
+            passes += 1
+            ctx.edge_passes[current_edge.id] = passes
+        return passes
+
+    def _execute_edge(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Executes the source node of an edge and resolves where to go next.
 
+        Args:
+            current_edge (Edge): The edge being traversed.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            NodePoolItem: The pool item of the destination node.
+        """
         current_node = current_edge.from_node.node
         if current_edge.edge_type == "__forward__":
             if not isinstance(current_node, _StartNode):
                 result = current_node.execute(input_state)
-                self.graph_state.update(result)
+                self._apply_result(state, result, input_state)
 
-            next_edge = current_edge.to_node.edge
-            next_node = current_edge.to_node.node
+            next_item = current_edge.to_node
         elif current_edge.edge_type == "__conditional__":
             result = current_node.execute(input_state)
-            self.graph_state.update(result)
+            self._apply_result(state, result, input_state)
+
+            next_item = self.nodes_pool[current_edge.evaluate(state)]
+        elif current_edge.edge_type == "__parallel__":
+            if not isinstance(current_node, _StartNode):
+                result = current_node.execute(input_state)
+                self._apply_result(state, result, input_state)
+
+            state.update(self._fan_out(current_edge, state, ctx))
+            next_item = current_edge.to_node
+
+        return next_item
+
+    async def _aexecute_edge(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Awaitable counterpart of `_execute_edge`.
+
+        Args:
+            current_edge (Edge): The edge being traversed.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            NodePoolItem: The pool item of the destination node.
+        """
+        current_node = current_edge.from_node.node
+        if current_edge.edge_type == "__forward__":
+            if not isinstance(current_node, _StartNode):
+                result = await current_node.aexecute(input_state)
+                self._apply_result(state, result, input_state)
+
+            next_item = current_edge.to_node
+        elif current_edge.edge_type == "__conditional__":
+            result = await current_node.aexecute(input_state)
+            self._apply_result(state, result, input_state)
+
+            next_item = self.nodes_pool[await current_edge.aevaluate(state)]
+        elif current_edge.edge_type == "__parallel__":
+            if not isinstance(current_node, _StartNode):
+                result = await current_node.aexecute(input_state)
+                self._apply_result(state, result, input_state)
+
+            state.update(await self._afan_out(current_edge, state, ctx))
+            next_item = current_edge.to_node
+
+        return next_item
 
-            gate_function = current_edge.gate_function
-            condition = current_edge.condition
-            result_gate = gate_function(self.graph_state)
+    def _apply_result(self, state: Dict, result, input_state) -> None:
+        """Applies the result of a node to the working state.
 
-            next_node_name = condition[result_gate]
+        In a parallel branch, the values the node wrote to keys with a reducer are
+        also recorded, for `_merge_branches` to reduce at the join. A node handing
+        back the state it was given wrote the keys it replaced; any other mapping
+        wrote all of its keys.
 
-            next_node = self.nodes_pool[next_node_name].node
-            next_edge = self.nodes_pool[next_node_name].edge
+        Args:
+            state (Dict): The working state to update in place.
+            result (Mapping): The value returned by the node.
+            input_state (Union[Dict, StateView]): The state the node was given.
+        """
+        if isinstance(state, BranchState) and self.reducers:
+            if isinstance(result, StateView) and result.base is state:
+                written = result.changes()
+            elif result is input_state:
+                written = {key: result[key] for key in self.reducers if key in result and state.get(key) is not result[key]}
+            else:
+                written = result
+            state.updates.extend((key, written[key]) for key in self.reducers if key in written)
+        apply_update(state, result)
 
-        if not isinstance(next_node, _EndNode):
-            next_input = self.graph_state.copy()
-            self.traverse_graph(next_edge, next_input)
+    def _fan_out(self, current_edge: ParallelEdge, fork_state: Dict, ctx: RunContext) -> Dict:
+        """Runs the branches of a parallel edge on threads and merges their results.
 
-    def _traverse_traced(self, current_edge: Union[ForwardEdge, ConditionalEdge], input_state: Dict):
-        """Recursively traverses the graph with tracing.
+        Each branch starts from its own shallow copy of the fork state and runs
+        until it reaches the join node. The calling context is copied into every
+        branch so tracing keeps working inside the worker threads.
 
         Args:
-            current_edge (Union[ForwardEdge, ConditionalEdge]): The current edge to traverse.
-            input_state (Dict): The current state of the graph.
+            current_edge (ParallelEdge): The parallel edge being traversed.
+            fork_state (Dict): The state after the source node has executed.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            Dict: The merged updates of all branches.
+        """
+        def run_branch(branch_item: NodePoolItem) -> BranchState:
+            branch_state = BranchState(fork_state)
+            self.traverse_graph(branch_item.edge, self._input_state(branch_state), ctx, state=branch_state, stop_at=current_edge.to_node)
+            return branch_state
+
+        with ThreadPoolExecutor(max_workers=len(current_edge.branches)) as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, run_branch, branch_item)
+                for branch_item in current_edge.branches
+            ]
+            branch_states = [future.result() for future in futures]
+        return self._merge_branches(current_edge, fork_state, branch_states)
+
+    async def _afan_out(self, current_edge: ParallelEdge, fork_state: Dict, ctx: RunContext) -> Dict:
+        """Runs the branches of a parallel edge as asyncio tasks and merges their results.
+
+        Args:
+            current_edge (ParallelEdge): The parallel edge being traversed.
+            fork_state (Dict): The state after the source node has executed.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            Dict: The merged updates of all branches.
+        """
+        async def run_branch(branch_item: NodePoolItem) -> BranchState:
+            branch_state = BranchState(fork_state)
+            await self.atraverse_graph(branch_item.edge, self._input_state(branch_state), ctx, state=branch_state, stop_at=current_edge.to_node)
+            return branch_state
+
+        branch_states = await asyncio.gather(*[
+            run_branch(branch_item) for branch_item in current_edge.branches
+        ])
+        return self._merge_branches(current_edge, fork_state, branch_states)
+
+    def _merge_branches(self, current_edge: ParallelEdge, fork_state: Dict, branch_states: List[BranchState]) -> Dict:
+        """Merges the final states of parallel branches into a single update.
+
+        Keys with a reducer declared on the state TypedDict are folded with
+        ``reducer(current, value)`` over every value written by a node of a branch,
+        in branch order and then in the order the nodes of the branch ran. For any
+        other key, a branch contributes its final value if it replaced the fork
+        state's; such a key may only be changed by one branch, or by several
+        branches to equal values.
+
+        Args:
+            current_edge (ParallelEdge): The parallel edge being joined.
+            fork_state (Dict): The state the branches started from.
+            branch_states (List[BranchState]): The final state of each branch, in
+                branch order.
+
+        Returns:
+            Dict: The update to apply to the state before the join node runs.
 
         Raises:
-            RuntimeError: If an edge is traversed more than the maximum allowed times.
+            ValueError: If several branches write different values to a key that
+                        has no reducer.
+        """
+        merged: Dict = {}
+        for branch_state in branch_states:
+            for key, value in branch_state.updates:
+                merged[key] = self.reducers[key](merged.get(key, fork_state.get(key)), value)
+            for key, value in branch_state.items():
+                if key in self.reducers or (key in fork_state and fork_state[key] is value):
+                    continue
+                if key in merged and merged[key] != value:
+                    raise ValueError(
+                        f"Key '{key}' was updated by several branches of edge '{current_edge.id}'. "
+                        "Declare a reducer for it on the state, e.g. Annotated[list, operator.add]."
+                    )
+                merged[key] = value
+        if isinstance(fork_state, BranchState):
+            # Parallel edges nested in a branch hand their updates on to it.
+            for branch_state in branch_states:
+                fork_state.updates.extend(branch_state.updates)
+        return merged
+
+    def _open_edge_trace(self, current_edge: Edge, input_state: Dict, ctx: RunContext, passes: int) -> EdgeTrace:
+        """Creates the trace record for a traversal that is about to execute.
+
+        Args:
+            current_edge (Edge): The edge being traversed.
+            input_state (Dict): The state handed to the source node.
+            ctx (RunContext): The context of the run being executed.
+            passes (int): The number of traversals of this edge, including this one.
+
+        Returns:
+            EdgeTrace: The trace record of this traversal.
+        """
+        with ctx.lock:
+            ctx.run_number += 1
+            run_number = ctx.run_number
+
+        # Fresh lists, so traversals never share the template's trace lists.
+        edge_trace = current_edge.edge_trace.model_copy(
+            update={"function_traces": [], "llm_traces": []}
+        )
+        edge_trace.edge_run_number = run_number
+        edge_trace.passes_left = current_edge.max_passes - passes
+        # In delta mode this copy only lives until the edge is recorded.
+        edge_trace.state_snapshot = input_state.copy()
+        return edge_trace
+
+    def _record_edge(self, edge_trace: EdgeTrace, ctx: RunContext):
+        """Adds a completed edge trace to the run's trace, as the policy allows.
+
+        Args:
+            edge_trace (EdgeTrace): The trace of the completed traversal.
+            ctx (RunContext): The context of the run being executed.
+        """
+        policy = self.trace_policy
+        trace = ctx.trace
+        with ctx.lock:
+            if edge_trace.elapsed < policy.min_elapsed:
+                trace.dropped_edges += 1
+                return
+            if self.snapshot_mode == "delta":
+                # Diffing against the last recorded edge means dropped edges
+                # simply fold into the next delta.
+                edge_trace.state_delta = self._snapshot_delta(edge_trace.state_snapshot, ctx)
+                edge_trace.state_snapshot = {}
+            if policy.max_edges is not None and len(trace.edges_trace) >= policy.max_edges:
+                evicted = trace.edges_trace.popleft()
+                trace.dropped_edges += 1
+                if evicted.state_delta is not None:
+                    evicted.state_delta.apply_to(trace.initial_state)
+            trace.edges_trace.append(edge_trace)
+            # Still under the lock, so the sink sees edges in the order deltas chain.
+            if self.trace_sink is not None:
+                self.trace_sink.write_edge(trace, edge_trace)
+
+    def _snapshot_delta(self, snapshot: Dict, ctx: RunContext) -> StateDiff:
+        """Encodes the state of an edge as a difference from the last recorded edge.
+
+        The first recorded edge of a run stores its state as the trace's initial
+        state and gets an empty delta. Must be called with `ctx.lock` held.
+
+        Args:
+            snapshot (Dict): The state at the edge being recorded.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            StateDiff: The difference from the last recorded state.
+        """
+        previous, ctx.last_snapshot = ctx.last_snapshot, snapshot
+        if previous is None:
+            ctx.trace.initial_state = dict(snapshot)
+            return StateDiff()
+        return StateDiff.between(previous, snapshot)
+
+    def _step_untraced(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Executes a single edge without tracing.
+
+        Args:
+            current_edge (Edge): The edge to traverse.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            NodePoolItem: The pool item of the node to visit next.
+        """
+        self._check_passes(current_edge, ctx)
+        return self._execute_edge(current_edge, input_state, state, ctx)
+
+    def _step_traced(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Executes a single edge and records its trace.
+
+        Args:
+            current_edge (Edge): The edge to traverse.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
+
+        Returns:
+            NodePoolItem: The pool item of the node to visit next.
         """
         edge_token = edge_id_var.set(current_edge.id)
         try:
-            if current_edge.passes > current_edge.max_passes:
-                raise RuntimeError(
-                    f"Edge '{current_edge.id}' has been passed {current_edge.max_passes} times, "
-                    "exceeding the allowed maximum without reaching a stop condition."
-                )
-            else:
-                current_edge.passes += 1
-                self.run_number += 1
-
-            edge_trace = current_edge.edge_trace.model_copy()
-            edge_trace.edge_run_number = self.run_number
-            edge_trace.passes_left = current_edge.max_passes - current_edge.passes
+            passes = self._check_passes(current_edge, ctx)
+            edge_trace = self._open_edge_trace(current_edge, input_state, ctx, passes)
             start = time.time()
-            edge_trace.state_snapshot = input_state.copy()
-
-            current_node = current_edge.from_node.node
 
             edge_trace_token = edge_trace_var.set(edge_trace)
             try:
-                if current_edge.edge_type == "__forward__":
-                    if not isinstance(current_node, _StartNode):
-                        result = current_node.execute(input_state)
-                        self.graph_state.update(result)
-
-                    next_edge = current_edge.to_node.edge
-                    next_node = current_edge.to_node.node
-                elif current_edge.edge_type == "__conditional__":
-                    result = current_node.execute(input_state)
-                    self.graph_state.update(result)
-
-                    gate_function = current_edge.gate_function
-                    condition = current_edge.condition
-                    result_gate = gate_function(self.graph_state)
-
-                    next_node_name = condition[result_gate]
-
-                    next_node = self.nodes_pool[next_node_name].node
-                    next_edge = self.nodes_pool[next_node_name].edge
-                    edge_trace.to_node = next_node_name
+                next_item = self._execute_edge(current_edge, input_state, state, ctx)
+                if current_edge.edge_type == "__conditional__":
+                    edge_trace.to_node = next_item.node.name
             finally:
                 edge_trace_var.reset(edge_trace_token)
 
             edge_trace.elapsed = time.time() - start
-            self.trace.edges_trace.append(edge_trace)
-
-            if not isinstance(next_node, _EndNode):
-                next_input = self.graph_state.copy()
-                self.traverse_graph(next_edge, next_input)
+            self._record_edge(edge_trace, ctx)
         finally:
             edge_id_var.reset(edge_token)
+        return next_item
 
+    async def _astep_untraced(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Awaitable counterpart of `_step_untraced`.
 
-# Handle Brancing and merging state -> because state update only happen after node process done, no shared mutable object
-# FAN IN FAN OUT STRATEGY, EVERY BRANCHING NODE NEED TO BE RETURNED
-# In your example:
-#     A
-#     |
-#     B
-#    / \
-#   C   D
-#        \
-#         E
-# If E needs data from both C and D, you have two main options:
+        Args:
+            current_edge (Edge): The edge to traverse.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
 
-# Make E a "merge node" that accepts inputs from both C and D — i.e., edges C -> E and D -> E.
+        Returns:
+            NodePoolItem: The pool item of the node to visit next.
+        """
+        self._check_passes(current_edge, ctx)
+        return await self._aexecute_edge(current_edge, input_state, state, ctx)
+
+    async def _astep_traced(self, current_edge: Edge, input_state: Dict, state: Dict, ctx: RunContext) -> NodePoolItem:
+        """Awaitable counterpart of `_step_traced`.
 
-# E will receive two incoming states, merge them internally, then execute.
+        The context variables are set inside the running task, so concurrent runs
+        on the same loop each see only their own trace and edge trace.
+
+        Args:
+            current_edge (Edge): The edge to traverse.
+            input_state (Dict): The state handed to the source node.
+            state (Dict): The working state the node result is applied to.
+            ctx (RunContext): The context of the run being executed.
 
-# Insert an explicit merge node (e.g., M):
+        Returns:
+            NodePoolItem: The pool item of the node to visit next.
+        """
+        edge_token = edge_id_var.set(current_edge.id)
+        try:
+            passes = self._check_passes(current_edge, ctx)
+            edge_trace = self._open_edge_trace(current_edge, input_state, ctx, passes)
+            start = time.time()
 
-#     C   D
-#      \ /
-#       M
-#       |
-#       E
-# The merge node M merges C and D’s outputs.
+            edge_trace_token = edge_trace_var.set(edge_trace)
+            try:
+                next_item = await self._aexecute_edge(current_edge, input_state, state, ctx)
+                if current_edge.edge_type == "__conditional__":
+                    edge_trace.to_node = next_item.node.name
+            finally:
+                edge_trace_var.reset(edge_trace_token)
 
-# Then E runs with the combined state.
+            edge_trace.elapsed = time.time() - start
+            self._record_edge(edge_trace, ctx)
+        finally:
+            edge_id_var.reset(edge_token)
+        return next_item
@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from typing import Optional, TYPE_CHECKING, Union, List, Dict, Any
-from orkes.shared.schema import OrkesMessagesSchema, RequestSchema
+from pydantic import BaseModel, Field, PrivateAttr
+import threading
+from typing import Optional, TYPE_CHECKING, Union, List, Dict, Any, Iterator
+from orkes.shared.schema import OrkesMessagesSchema, RequestSchema, UsageSchema
 from datetime import datetime
 
 if TYPE_CHECKING:
@@ -55,12 +56,35 @@ class LLMTraceSchema(BaseModel):
         edge_id (Optional[str]): The ID of the graph edge that triggered this interaction.
         model (str): The name of the model used.
         settings (Optional[Dict]): Any additional settings used for the request.
+        limiter_wait (float): The seconds the request waited on the client's rate
+            limiter, across all of its attempts.
+        cache_hit (bool): Whether the response came from the client's response cache.
+        coalesced (bool): Whether the response was shared from an identical request
+            already in flight.
+        hedges (int): The duplicate requests sent because the response was slow.
+        input_tokens (Optional[int]): The prompt tokens reported by the provider,
+            or None if it did not report usage or the response came from the cache.
+        output_tokens (Optional[int]): The generated tokens reported by the provider.
+        total_tokens (Optional[int]): The total tokens reported by the provider.
+        latency (float): The seconds from sending the request to receiving the
+            whole response, including retries and limiter waits.
+        ttft (Optional[float]): For streamed responses, the seconds until the first
+            text or tool call arrived. None for responses that were not streamed.
     """
     messages: OrkesMessagesSchema
     tools: Optional[List[Dict]] = None
     parsed_response: RequestSchema
     model: str
     settings: Optional[Dict] = None
+    limiter_wait: float = 0.0
+    cache_hit: bool = False
+    coalesced: bool = False
+    hedges: int = 0
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
+    total_tokens: Optional[int] = None
+    latency: float = 0.0
+    ttft: Optional[float] = None
 
 
 class FunctionTraceSchema(BaseModel):
@@ -81,6 +105,60 @@ class FunctionTraceSchema(BaseModel):
     return_value: Any
     elapsed: float
 
+class StateDiff(BaseModel):
+    """
+    Represents the difference between two consecutive state snapshots.
+
+    A key counts as changed when it is bound to a different object, which is how
+    nodes update the state (``state['count'] += 1`` or ``state['msgs'] = [...]``).
+    As with full snapshots, values are shared rather than copied, so in-place
+    mutations (``state['msgs'].append(...)``) are not recorded separately.
+
+    Attributes:
+        changed (dict): Keys present in both states whose value was replaced.
+        added (dict): Keys present only in the newer state.
+        removed (list[str]): Keys present only in the older state.
+    """
+    changed: dict = {}
+    added: dict = {}
+    removed: List[str] = []
+
+    @classmethod
+    def between(cls, previous: Dict, current: Dict) -> "StateDiff":
+        """Computes the difference from one state to another.
+
+        Args:
+            previous (Dict): The older state.
+            current (Dict): The newer state.
+
+        Returns:
+            StateDiff: The keys changed, added and removed in `current`.
+        """
+        changed = {}
+        added = {}
+        for key, value in current.items():
+            if key not in previous:
+                added[key] = value
+            elif previous[key] is not value:
+                changed[key] = value
+        removed = [key for key in previous if key not in current]
+        return cls.model_construct(changed=changed, added=added, removed=removed)
+
+    def apply_to(self, state: Dict) -> Dict:
+        """Applies this difference to a state in place.
+
+        Args:
+            state (Dict): The older state to bring up to date.
+
+        Returns:
+            Dict: The same `state`, updated.
+        """
+        state.update(self.changed)
+        state.update(self.added)
+        for key in self.removed:
+            state.pop(key, None)
+        return state
+
 class EdgeTrace(BaseModel):
     """
     Represents the trace of a single edge traversal during a graph execution.
@@ -101,7 +179,11 @@ class EdgeTrace(BaseModel):
         elapsed (float): Elapsed time in seconds since the start of the run when
             this edge was traversed.
         state_snapshot (dict): Snapshot of relevant runtime state at the moment
-            the edge was traversed.
+            the edge was traversed. Left empty when the run records delta
+            snapshots.
+        state_delta (Optional[StateDiff]): In delta snapshot mode, the difference
+            between the state of the previously recorded edge and the state at
+            this edge.
         meta (dict): Additional metadata associated with this edge traversal.
         llm_traces (list[LLMTraceSchema]): A list of LLM traces that occurred
                                            during this edge's execution.
@@ -117,11 +199,31 @@ class EdgeTrace(BaseModel):
     edge_type: Union[str, None]
     elapsed: float
     state_snapshot: dict = {}
+    state_delta: Optional[StateDiff] = None
     meta: dict
     function_traces: List[FunctionTraceSchema] = []
     llm_traces: List[LLMTraceSchema] = []
 
 
+class TracePolicy(BaseModel):
+    """
+    Controls how much of each run is kept in its trace.
+
+    The default policy keeps every edge of every run. Bounding the trace keeps
+    memory flat for long-running loops; every run, recorded or not, still gets
+    its summary fields (`total_edges`, `dropped_edges`, `elapsed_time`, `status`).
+
+    Attributes:
+        max_edges (Optional[int]): Keep only the last N edges of a run, as a ring
+            buffer. None keeps them all.
+        sample_rate (int): Record the edges of one run in every K. Runs in between
+            only get a summary.
+        min_elapsed (float): Only keep edges that took at least this many seconds.
+    """
+    max_edges: Optional[int] = Field(default=None, ge=1)
+    sample_rate: int = Field(default=1, ge=1)
+    min_elapsed: float = Field(default=0.0, ge=0.0)
+
 class TracesSchema(BaseModel):
     """
     Represents the complete execution trace of a graph run.
@@ -137,9 +239,30 @@ class TracesSchema(BaseModel):
         start_time (float): The Unix timestamp (in seconds) indicating when the
             execution started.
         elapsed_time (float): Total execution duration in seconds.
-        status (str): Final execution status (e.g., "SUCCESS", "FAILED").
+        status (str): Final execution status: "FINISHED", "FAILED", or
+            "BUDGET_EXCEEDED" if the run was stopped by its token budget.
         nodes_trace (list[NodeTrace]): Traces for all nodes executed during the run.
-        edges_trace (list[EdgeTrace]): Traces for all edges traversed during the run.
+        edges_trace (list[EdgeTrace]): Traces for the edges retained by the run's
+            `TracePolicy`, in the order they completed.
+        snapshot_mode (str): "full" if every edge stores a full state snapshot,
+            "delta" if edges store a `StateDiff` against the previous retained edge.
+        initial_state (dict): In delta snapshot mode, the state the retained deltas
+            are applied to, i.e. the state just before the first retained edge.
+            Edges evicted from the ring buffer have their deltas folded into it.
+        total_edges (int): The number of edges traversed during the run, whether
+            or not they were retained.
+        dropped_edges (int): The number of traversed edges not in `edges_trace`,
+            either evicted from the ring buffer or faster than the threshold.
+        sampled (bool): Whether the run's edges were recorded at all. Runs left out
+            by sampling only carry the summary fields.
+        llm_calls (int): The LLM requests sent during the run. Responses served
+            from a cache or shared with an identical request are not counted.
+        total_input_tokens (int): The prompt tokens of those requests.
+        total_output_tokens (int): The generated tokens of those requests.
+        total_tokens (int): The total tokens of those requests.
+        llm_latency (float): The seconds spent waiting on those requests, summed,
+            so it exceeds `elapsed_time` when requests run in parallel.
+        token_budget (Optional[int]): The token budget of the run, if it had one.
     """
     graph_name : str
     graph_description: str
@@ -149,3 +272,186 @@ class TracesSchema(BaseModel):
     status: str = "FAILED"
     nodes_trace: list[NodeTrace]
     edges_trace: list[EdgeTrace]
+    snapshot_mode: str = "full"
+    initial_state: dict = {}
+    total_edges: int = 0
+    dropped_edges: int = 0
+    sampled: bool = True
+    llm_calls: int = 0
+    total_input_tokens: int = 0
+    total_output_tokens: int = 0
+    total_tokens: int = 0
+    llm_latency: float = 0.0
+    token_budget: Optional[int] = None
+
+    def rebuild_state(self, edge_run_number: int) -> Dict:
+        """Rebuilds the full state seen by an edge of this run.
+
+        Args:
+            edge_run_number (int): The run number of the edge, as in
+                `EdgeTrace.edge_run_number`.
+
+        Returns:
+            Dict: A shallow copy of the state at the moment the edge was traversed.
+
+        Raises:
+            KeyError: If the trace holds no retained edge with that run number.
+        """
+        for edge, state in zip(self.edges_trace, self.iter_states()):
+            if edge.edge_run_number == edge_run_number:
+                return state
+        raise KeyError(f"No edge with run number {edge_run_number} in run '{self.run_id}'.")
+
+    def iter_states(self) -> Iterator[Dict]:
+        """Rebuilds the full state seen by each retained edge of this run, in turn.
+
+        Yields:
+            Dict: A shallow copy of the state at each edge, in the order of
+            `edges_trace`.
+        """
+        if self.snapshot_mode != "delta":
+            for edge in self.edges_trace:
+                yield dict(edge.state_snapshot)
+            return
+        # Deltas chain in the order edges were recorded.
+        state = dict(self.initial_state)
+        for edge in self.edges_trace:
+            if edge.state_delta is not None:
+                edge.state_delta.apply_to(state)
+            yield dict(state)
+
+
+class TokenBudgetExceededError(Exception):
+    """Raised when a run has used more tokens than its token budget allows.
+
+    The runner raises it before the next edge once the budget is exceeded, and
+    LLM clients raise it instead of sending a request, so the call that crossed
+    the budget still returns its response to the node that made it.
+
+    Attributes:
+        token_budget (int): The token budget of the run.
+        total_tokens (int): The tokens the run had used.
+    """
+    def __init__(self, token_budget: int, total_tokens: int):
+        self.token_budget = token_budget
+        self.total_tokens = total_tokens
+        super().__init__(f"The run used {total_tokens} tokens, exceeding its budget of {token_budget}.")
+
+
+class RunUsage(BaseModel):
+    """
+    Accumulates the LLM usage of a single run and enforces its token budget.
+
+    The runner makes the usage of the run being executed available to LLM
+    clients through `usage_var`, so it is counted whether or not the run is
+    traced, including on the threads of parallel branches.
+
+    Attributes:
+        token_budget (Optional[int]): The most tokens the run may use, or None
+            for no limit.
+        llm_calls (int): The LLM requests sent so far.
+        input_tokens (int): The prompt tokens used so far.
+        output_tokens (int): The generated tokens used so far.
+        total_tokens (int): The total tokens used so far.
+        latency (float): The seconds spent waiting on LLM requests so far.
+    """
+    token_budget: Optional[int] = None
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+    latency: float = 0.0
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def exceeded(self) -> bool:
+        """Whether the run has used more tokens than its budget."""
+        return self.token_budget is not None and self.total_tokens > self.token_budget
+
+    def add(self, usage: Optional[UsageSchema], latency: float = 0.0):
+        """Counts an LLM request.
+
+        Args:
+            usage (Optional[UsageSchema]): The tokens the request consumed, or None
+                if the provider did not report them.
+            latency (float, optional): The seconds the request took. Defaults to 0.0.
+        """
+        with self._lock:
+            self.llm_calls += 1
+            self.latency += latency
+            if usage is not None:
+                self.input_tokens += usage.input_tokens
+                self.output_tokens += usage.output_tokens
+                self.total_tokens += usage.total_tokens
+
+    def check(self):
+        """Raises if the run has used more tokens than its budget.
+
+        Raises:
+            TokenBudgetExceededError: If the budget is exceeded.
+        """
+        if self.exceeded:
+            raise TokenBudgetExceededError(self.token_budget, self.total_tokens)
+
+
+class RunContext(BaseModel):
+    """
+    Holds everything that belongs to a single invocation of a compiled graph.
+
+    A fresh context is created by `GraphRunner.run` for every call, so one
+    compiled graph can serve many concurrent runs (threads or event loop tasks)
+    without pass counters, state or traces leaking between them.
+
+    Attributes:
+        run_id (str): The unique identifier for this execution run.
+        graph_state (dict): The working state of the run. It starts as a shallow
+            copy of the invoke state and holds the final state once the run ends.
+        trace (Optional[TracesSchema]): The trace of this run, or None when the
+            graph is not traced.
+        run_number (int): The number of edges traversed so far in this run.
+        edge_passes (dict[str, int]): How many times each edge, keyed by edge ID,
+            has been traversed in this run.
+        last_snapshot (Optional[dict]): In delta snapshot mode, the state of the
+            latest recorded edge, which the next delta is computed against.
+        usage (RunUsage): The LLM usage of the run and its token budget.
+        lock (threading.Lock): Guards the counters while parallel branches of the
+            same run execute on several threads.
+    """
+    run_id: str
+    graph_state: Dict[str, Any]
+    trace: Optional[TracesSchema] = None
+    usage: RunUsage = Field(default_factory=RunUsage)
+    run_number: int = 0
+    edge_passes: Dict[str, int] = {}
+    last_snapshot: Optional[Dict[str, Any]] = None
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._lock
+
+
+class BatchResult(BaseModel):
+    """
+    Represents the outcome of one input of a batch run.
+
+    Attributes:
+        index (int): The position of the input in the batch.
+        run_id (Optional[str]): The ID of the run, or None if the input was rejected
+            before the run started (e.g. it has keys unknown to the state).
+        status (str): "FINISHED" if the run completed, "BUDGET_EXCEEDED" if it was
+            stopped by its token budget, "FAILED" otherwise.
+        state (Optional[dict]): The final state of a finished run.
+        trace (Optional[TracesSchema]): The trace of the run, when the graph is traced.
+        error (Optional[BaseException]): The exception that made the run fail.
+    """
+    index: int
+    run_id: Optional[str] = None
+    status: str
+    state: Optional[Dict[str, Any]] = None
+    trace: Optional[TracesSchema] = None
+    error: Optional[BaseException] = None
+
+    model_config = {
+        "arbitrary_types_allowed": True
+    }
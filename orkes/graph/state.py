@@ -0,0 +1,112 @@
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+class StateView(MutableMapping):
+    """A copy-on-write view over a graph state handed to a node.
+
+    Reads fall through to the underlying state; writes and deletions are kept in
+    the view, so creating a view costs the same no matter how large the state is,
+    and applying it back costs only as much as the keys the node changed. Like a
+    shallow copy, values themselves are shared: mutating a list in place is seen
+    through every view of the same state.
+
+    Attributes:
+        base (Dict): The state the view reads through to. It must not be modified
+                     while the view is in use.
+    """
+    __slots__ = ("base", "_changes", "_removed")
+
+    def __init__(self, base: Dict):
+        """Initializes a StateView.
+
+        Args:
+            base (Dict): The state to read through to.
+        """
+        self.base = base
+        self._changes: Dict[str, Any] = {}
+        self._removed: Set[str] = set()
+
+    def __getitem__(self, key):
+        if key in self._changes:
+            return self._changes[key]
+        if key in self._removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key in self._changes:
+            del self._changes[key]
+            if key in self.base:
+                self._removed.add(key)
+        elif key in self.base and key not in self._removed:
+            self._removed.add(key)
+        else:
+            raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        if key in self._changes:
+            return True
+        return key in self.base and key not in self._removed
+
+    def __iter__(self) -> Iterator:
+        yield from self._changes
+        for key in self.base:
+            if key not in self._changes and key not in self._removed:
+                yield key
+
+    def __len__(self) -> int:
+        added = sum(1 for key in self._changes if key not in self.base)
+        return len(self.base) - len(self._removed) + added
+
+    def __repr__(self) -> str:
+        return f"StateView({dict(self)!r})"
+
+    def copy(self) -> Dict:
+        """Returns the current contents of the view as a plain dict."""
+        return dict(self)
+
+    def changes(self) -> Dict[str, Any]:
+        """Returns the keys written through this view and their new values."""
+        return dict(self._changes)
+
+    def removed(self) -> Set[str]:
+        """Returns the keys of the base state deleted through this view."""
+        return set(self._removed)
+
+
+def apply_update(state: Dict, result: Mapping) -> None:
+    """Applies the result of a node to the working state.
+
+    When the node hands back the view it was given, only the keys it changed are
+    written; any other mapping is merged in full, as with `dict.update`.
+
+    Args:
+        state (Dict): The working state to update in place.
+        result (Mapping): The value returned by the node.
+    """
+    if isinstance(result, StateView) and result.base is state:
+        state.update(result._changes)
+        for key in result._removed:
+            state.pop(key, None)
+    else:
+        state.update(result)
+
+
+class BranchState(dict):
+    """The working state of a parallel branch, with the reducer updates made in it.
+
+    A branch may run several nodes before it joins, and each of them may write a
+    key that has a reducer. Their values are kept in `updates` as the nodes run,
+    so the join can reduce every one of them rather than only the branch's last.
+
+    Attributes:
+        updates (List[Tuple[str, Any]]): The reducer keys written in the branch
+            and the values written, in the order they were written.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.updates: List[Tuple[str, Any]] = []
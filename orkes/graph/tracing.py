@@ -0,0 +1,404 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from typing import IO, Dict, List, Optional, Set, Union
+from pathlib import Path
+from orkes.graph.schema import TracesSchema, EdgeTrace
+from orkes.shared import serialization
+
+
+class TraceSink(ABC):
+    """Abstract base class for destinations that receive a trace while it is recorded.
+
+    The runner calls `start_run` once the run starts, `write_edge` for every edge
+    it records, in recording order, and `finish_run` once the run has finished or
+    failed. A single sink can be shared by concurrent runs of the same runner.
+    """
+
+    @abstractmethod
+    def start_run(self, trace: TracesSchema) -> None:
+        """Called when a traced run starts.
+
+        Args:
+            trace (TracesSchema): The trace of the run, with no edges yet.
+        """
+        pass
+
+    @abstractmethod
+    def write_edge(self, trace: TracesSchema, edge_trace: EdgeTrace) -> None:
+        """Called for each edge recorded in a run.
+
+        Args:
+            trace (TracesSchema): The trace of the run.
+            edge_trace (EdgeTrace): The completed edge trace.
+        """
+        pass
+
+    @abstractmethod
+    def finish_run(self, trace: TracesSchema) -> None:
+        """Called when a traced run ends, whether it finished or failed.
+
+        Args:
+            trace (TracesSchema): The trace of the run, with its summary filled in.
+        """
+        pass
+
+
+class JsonlTraceSink(TraceSink):
+    """Streams each run's trace to a JSON Lines file as the run progresses.
+
+    Each run is written to ``trace_{run_id}.jsonl`` in `traces_dir`: a header
+    record, one record per edge as soon as the edge completes, and a footer with
+    the run's status, elapsed time and LLM usage. Every line is flushed when written, so the
+    file of a run that dies midway still holds every edge recorded so far. In
+    delta snapshot mode, an ``initial_state`` record precedes the first edge.
+
+    The file keeps every recorded edge, including those a `TracePolicy` ring
+    buffer later evicts from the in-memory trace. Use `read_jsonl_trace` or
+    `TraceInspector` to load it back.
+
+    Attributes:
+        traces_dir (str): The directory trace files are written to.
+    """
+
+    def __init__(self, traces_dir: str = "traces"):
+        """Initializes the JsonlTraceSink.
+
+        Args:
+            traces_dir (str, optional): The directory to write trace files to.
+                Defaults to "traces".
+        """
+        self.traces_dir = traces_dir
+        self._files: Dict[str, IO[str]] = {}
+        self._awaiting_initial_state: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def path_for(self, run_id: str) -> str:
+        """Returns the path of the file a run is written to.
+
+        Args:
+            run_id (str): The ID of the run.
+
+        Returns:
+            str: The path of the run's trace file.
+        """
+        return os.path.join(self.traces_dir, f"trace_{run_id}.jsonl")
+
+    def start_run(self, trace: TracesSchema) -> None:
+        os.makedirs(self.traces_dir, exist_ok=True)
+        # Line buffered, so every record reaches the file as soon as it is written.
+        f = open(self.path_for(trace.run_id), "w", encoding="utf-8", buffering=1)
+        with self._lock:
+            self._files[trace.run_id] = f
+            if trace.snapshot_mode == "delta":
+                self._awaiting_initial_state.add(trace.run_id)
+        self._write_model(f, "header", trace, include={
+            "graph_name", "graph_description", "run_id", "start_time", "snapshot_mode", "nodes_trace"
+        })
+
+    def write_edge(self, trace: TracesSchema, edge_trace: EdgeTrace) -> None:
+        f = self._files.get(trace.run_id)
+        if f is None:
+            return
+        # The initial state is only known once the first delta-encoded edge is recorded.
+        if trace.run_id in self._awaiting_initial_state:
+            self._awaiting_initial_state.discard(trace.run_id)
+            self._write(f, "initial_state", {"state": trace.initial_state})
+        self._write_model(f, "edge", edge_trace)
+
+    def finish_run(self, trace: TracesSchema) -> None:
+        with self._lock:
+            f = self._files.pop(trace.run_id, None)
+            self._awaiting_initial_state.discard(trace.run_id)
+        if f is None:
+            return
+        try:
+            self._write_model(f, "footer", trace, include={
+                "status", "elapsed_time", "total_edges", "llm_calls", "total_input_tokens",
+                "total_output_tokens", "total_tokens", "llm_latency", "token_budget"
+            })
+        finally:
+            f.close()
+
+    def _write(self, f: IO[str], record: str, data: Dict) -> None:
+        # Compact separators; values that are not JSON types are written as strings
+        # rather than failing the run.
+        f.write(serialization.dumps({"record": record, **data}).decode("utf-8") + "\n")
+
+    def _write_model(self, f: IO[str], record: str, model, include: Optional[Set[str]] = None) -> None:
+        # The model is serialized straight to JSON, and the record tag spliced into
+        # its opening brace, rather than dumping it to a dictionary first.
+        body = serialization.dump_model(model, include=include)
+        f.write('{"record":"' + record + '",' + body[1:].decode("utf-8") + "\n")
+
+
+class TraceExporter(ABC):
+    """Abstract base class for destinations that persist finished traces.
+
+    Exporters are driven by a `BackgroundTraceExporter`, which calls `export`
+    from its worker thread with batches of traces.
+    """
+
+    @abstractmethod
+    def export(self, traces: List[TracesSchema]) -> None:
+        """Persists a batch of finished traces.
+
+        Args:
+            traces (List[TracesSchema]): The traces to persist, oldest first.
+        """
+        pass
+
+    def shutdown(self) -> None:
+        """Releases any resources held by the exporter."""
+        pass
+
+
+class FileTraceExporter(TraceExporter):
+    """Writes each trace to ``trace_{run_id}.json`` in a directory.
+
+    Attributes:
+        traces_dir (str): The directory trace files are written to.
+    """
+
+    def __init__(self, traces_dir: str = "traces"):
+        """Initializes the FileTraceExporter.
+
+        Args:
+            traces_dir (str, optional): The directory to write trace files to.
+                Defaults to "traces".
+        """
+        self.traces_dir = traces_dir
+
+    def export(self, traces: List[TracesSchema]) -> None:
+        os.makedirs(self.traces_dir, exist_ok=True)
+        for trace in traces:
+            filename = os.path.join(self.traces_dir, f"trace_{trace.run_id}.json")
+            with open(filename, "wb") as f:
+                f.write(serialization.dump_model(trace))
+
+
+class InMemoryTraceExporter(TraceExporter):
+    """Keeps exported traces in a list, for tests and interactive use.
+
+    Attributes:
+        traces (List[TracesSchema]): The exported traces, in export order.
+    """
+
+    def __init__(self):
+        """Initializes the InMemoryTraceExporter."""
+        self.traces: List[TracesSchema] = []
+        self._lock = threading.Lock()
+
+    def export(self, traces: List[TracesSchema]) -> None:
+        with self._lock:
+            self.traces.extend(traces)
+
+
+# Exporters that have not been shut down yet. Held weakly so the exit hook does
+# not keep an exporter alive after the application has let go of it.
+_live_exporters: "weakref.WeakSet[BackgroundTraceExporter]" = weakref.WeakSet()
+
+
+def _shutdown_live_exporters() -> None:
+    for exporter in list(_live_exporters):
+        exporter.shutdown()
+
+
+atexit.register(_shutdown_live_exporters)
+
+
+class BackgroundTraceExporter(TraceSink):
+    """A trace sink that hands finished traces to an exporter on a background thread.
+
+    Finished runs only put their trace on a bounded queue, so persisting traces
+    never adds latency to graph execution. A worker thread drains the queue in
+    batches of up to `batch_size` traces, or whatever arrived within
+    `flush_interval` seconds. When the queue is full the trace is dropped and
+    counted rather than blocking the run. Pending traces are flushed by
+    `shutdown`, which also runs at interpreter exit.
+
+    Attributes:
+        exporter (TraceExporter): The exporter the traces are handed to.
+        max_queue_size (int): The number of traces that can wait to be exported.
+        batch_size (int): The largest batch handed to the exporter at once.
+        flush_interval (float): How long, in seconds, the worker waits to fill a
+            batch before exporting what it has.
+        exported (int): The number of traces exported so far.
+        dropped (int): The number of traces dropped because the queue was full.
+        failed (int): The number of traces whose export raised an exception.
+        last_error (Optional[BaseException]): The latest exception raised by the exporter.
+    """
+
+    _STOP = object()
+
+    def __init__(self, exporter: TraceExporter, max_queue_size: int = 1000, batch_size: int = 32, flush_interval: float = 1.0):
+        """Initializes the BackgroundTraceExporter and starts its worker thread.
+
+        Args:
+            exporter (TraceExporter): The exporter to hand traces to.
+            max_queue_size (int, optional): The capacity of the queue. Defaults to 1000.
+            batch_size (int, optional): The largest batch exported at once.
+                Defaults to 32.
+            flush_interval (float, optional): The longest time, in seconds, a trace
+                waits for its batch to fill. Defaults to 1.0.
+
+        Raises:
+            ValueError: If `max_queue_size` or `batch_size` is less than 1.
+        """
+        if max_queue_size < 1 or batch_size < 1:
+            raise ValueError("max_queue_size and batch_size must be at least 1.")
+        self.exporter = exporter
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_error: Optional[BaseException] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._stopped = False
+        self._worker = threading.Thread(target=self._run, name="orkes-trace-exporter", daemon=True)
+        self._worker.start()
+        _live_exporters.add(self)
+
+    def start_run(self, trace: TracesSchema) -> None:
+        pass
+
+    def write_edge(self, trace: TracesSchema, edge_trace: EdgeTrace) -> None:
+        pass
+
+    def finish_run(self, trace: TracesSchema) -> None:
+        self.submit(trace)
+
+    def submit(self, trace: TracesSchema) -> bool:
+        """Queues a finished trace for export without blocking.
+
+        Args:
+            trace (TracesSchema): The trace to export.
+
+        Returns:
+            bool: True if the trace was queued, False if it was dropped because the
+            queue was full or the exporter was shut down.
+        """
+        # Checked and queued under the lock so a trace can never land behind the
+        # stop marker that `shutdown` enqueues.
+        with self._lock:
+            if not self._stopped:
+                try:
+                    self._queue.put_nowait(trace)
+                    return True
+                except queue.Full:
+                    pass
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Waits until every trace queued so far has been exported.
+
+        Args:
+            timeout (Optional[float], optional): The longest time to wait, in
+                seconds. Defaults to None, which waits indefinitely.
+
+        Returns:
+            bool: True if the queue was drained in time.
+        """
+        if not self._worker.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: Optional[float] = 5.0) -> None:
+        """Exports the pending traces, then stops the worker thread.
+
+        Traces submitted after shutdown are dropped. Calling it again does nothing.
+
+        Args:
+            timeout (Optional[float], optional): The longest time to wait for the
+                pending traces, in seconds. Defaults to 5.0.
+        """
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        _live_exporters.discard(self)
+        try:
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._worker.join(timeout)
+        self.exporter.shutdown()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[TracesSchema] = []
+            waiters: List[threading.Event] = []
+            deadline = time.monotonic() + self.flush_interval
+            # Fill the batch until it is full, the interval expires, or a flush or
+            # stop request asks for everything queued before it.
+            while True:
+                if item is self._STOP or isinstance(item, threading.Event):
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    item = None
+                    break
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+                    break
+            if batch:
+                self._export(batch)
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is self._STOP:
+                return
+
+    def _export(self, batch: List[TracesSchema]) -> None:
+        try:
+            self.exporter.export(batch)
+            self.exported += len(batch)
+        except Exception as e:
+            self.failed += len(batch)
+            self.last_error = e
+
+
+def read_jsonl_trace(path: Union[str, Path]) -> Dict:
+    """Loads a trace written by `JsonlTraceSink`.
+
+    Args:
+        path (Union[str, Path]): The path of the ``.jsonl`` trace file.
+
+    Returns:
+        Dict: The trace in the same shape as ``TracesSchema.model_dump()``. A run
+        without a footer, e.g. because the process died, has the status
+        "INCOMPLETE".
+    """
+    data: Dict = {"status": "INCOMPLETE", "initial_state": {}, "edges_trace": []}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = serialization.loads(line)
+            kind = record.pop("record")
+            if kind == "edge":
+                data["edges_trace"].append(record)
+            elif kind == "initial_state":
+                data["initial_state"] = record["state"]
+            else:
+                data.update(record)
+    total_edges = data.get("total_edges", len(data["edges_trace"]))
+    data["total_edges"] = total_edges
+    data["dropped_edges"] = total_edges - len(data["edges_trace"])
+    return data
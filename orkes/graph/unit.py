@@ -1,5 +1,7 @@
 
-from typing import Any, Callable, Dict
+from typing import Any, Callable, Dict, List
+import asyncio
+import inspect
 import uuid
 from abc import ABC, abstractmethod
 from orkes.graph.schema import NodePoolItem, NodeTrace, EdgeTrace
@@ -16,6 +18,7 @@ class Node:
         graph_state: A reference to the graph's state.
         id (str): A unique identifier for the node instance.
         description (str): The docstring of the function.
+        is_async (bool): Whether the function is a coroutine function.
         node_trace (NodeTrace): The trace object for the node.
     """
     def __init__(self, name: str, func: Callable, graph_state):
@@ -34,6 +37,7 @@ class Node:
         self.graph_state = graph_state
         self.id = "node_" + str(uuid.uuid4())
         self.description = func.__doc__
+        self.is_async = inspect.iscoroutinefunction(func)
         self.node_trace = NodeTrace(
             node_name=self.name,
             node_id=self.id,
@@ -51,10 +55,35 @@ class Node:
 
         Returns:
             Any: The output of the function.
+
+        Raises:
+            TypeError: If the function is a coroutine function, which can only be
+                       executed through `aexecute`.
         """
+        if self.is_async:
+            raise TypeError(
+                f"Node '{self.name}' is a coroutine function; run the graph with GraphRunner.arun instead."
+            )
         output = self.func(input_state)
         return output
 
+    async def aexecute(self, input_state) -> Any:
+        """Executes the node's function from an event loop.
+
+        Coroutine functions are awaited directly. Plain functions are run in the
+        default executor so they do not block the loop; the current context is
+        copied into the worker thread, keeping trace context variables visible.
+
+        Args:
+            input_state: The input state for the function.
+
+        Returns:
+            Any: The output of the function.
+        """
+        if self.is_async:
+            return await self.func(input_state)
+        return await asyncio.to_thread(self.func, input_state)
+
     def __repr__(self) -> str:
         return f"Node({self.name})"
 
@@ -103,8 +132,9 @@ class Edge(ABC):
         id (str): A unique identifier for the edge instance.
         from_node (NodePoolItem): The node from which the edge originates.
         to_node (NodePoolItem): The node to which the edge points.
-        passes (int): The number of times the edge has been traversed.
-        max_passes (int): The maximum number of times the edge can be traversed.
+        max_passes (int): The maximum number of times the edge can be traversed in
+                          a single run. Pass counts themselves are kept per run in
+                          the runner's `RunContext`.
         edge_type (str): The type of the edge.
         edge_trace (EdgeTrace): The trace object for the edge.
     """
@@ -124,7 +154,6 @@ class Edge(ABC):
         self.id = "edge_" + str(uuid.uuid4())
         self.from_node = from_node
         self.to_node = to_node
-        self.passes = 0
         self.max_passes = max_passes
         self.edge_type = None
         self.edge_trace = EdgeTrace(
@@ -192,6 +221,7 @@ class ConditionalEdge(Edge):
         """
         super().__init__(from_node, to_node=None, max_passes=max_passes)  # initialize parent part
         self.gate_function = gate_function
+        self.is_async_gate = inspect.iscoroutinefunction(gate_function)
         self.condition = condition
         self.edge_type = "__conditional__"
         self.edge_trace = EdgeTrace(
@@ -207,4 +237,78 @@ class ConditionalEdge(Edge):
             }
         )
 
+    def evaluate(self, state) -> str:
+        """Runs the gate function and returns the name of the next node.
+
+        Args:
+            state: The graph state after the source node has executed.
+
+        Returns:
+            str: The name of the node selected by the gate function.
+
+        Raises:
+            TypeError: If the gate function is a coroutine function, which can only
+                       be evaluated through `aevaluate`.
+        """
+        if self.is_async_gate:
+            raise TypeError(
+                f"Gate function of edge '{self.id}' is a coroutine function; run the graph with GraphRunner.arun instead."
+            )
+        return self.condition[self.gate_function(state)]
+
+    async def aevaluate(self, state) -> str:
+        """Runs the gate function from an event loop and returns the next node name.
+
+        Args:
+            state: The graph state after the source node has executed.
+
+        Returns:
+            str: The name of the node selected by the gate function.
+        """
+        if self.is_async_gate:
+            result_gate = await self.gate_function(state)
+        else:
+            result_gate = await asyncio.to_thread(self.gate_function, state)
+        return self.condition[result_gate]
+
+class ParallelEdge(Edge):
+    """An edge that fans out to several branches running concurrently and joins
+    them at a single node.
+
+    Each branch starts at one of the branch nodes and runs until it reaches the
+    join node. The branch results are merged into the graph state through the
+    reducers declared on the state TypedDict, then execution continues from the
+    join node.
+
+    Attributes:
+        branches (List[NodePoolItem]): The first node of every branch.
+    """
+    def __init__(self, from_node: NodePoolItem, branches: List[NodePoolItem], join_node: NodePoolItem, max_passes: int = 25):
+        """Initializes a ParallelEdge.
+
+        Args:
+            from_node (NodePoolItem): The node from which the edge originates.
+            branches (List[NodePoolItem]): The first node of every branch.
+            join_node (NodePoolItem): The node where all branches meet. It runs once,
+                                  with the merged state, after every branch finished.
+            max_passes (int, optional): The maximum number of times the graph execution
+                                    can traverse this edge. Defaults to 25.
+        """
+        super().__init__(from_node, join_node, max_passes)
+        self.branches = branches
+        self.edge_type = "__parallel__"
+        self.edge_trace = EdgeTrace(
+            edge_id=self.id,
+            edge_run_number=0,
+            from_node=self.from_node.node.name,
+            to_node=self.to_node.node.name,
+            passes_left=self.max_passes,
+            edge_type=self.edge_type,
+            elapsed=0.0,
+            meta={
+                "type": "parallel_edge",
+                "branches": [branch.node.name for branch in self.branches]
+            }
+        )
+
 NodePoolItem.model_rebuild()
@@ -1,5 +1,5 @@
 import inspect
-from typing import Callable
+from typing import Annotated, Callable, Dict, get_origin, get_type_hints
 import random
 from functools import wraps
 import time
@@ -14,11 +14,26 @@ def orkes_tracable(func):
     This decorator is intended to be used on functions that are part of an OrkesGraph.
     When a function decorated with `orkes_tracable` is executed during a traced
     graph run, its inputs, output, and execution time will be captured and added
-    to the `function_traces` of the current edge trace.
+    to the `function_traces` of the current edge trace. Coroutine functions are
+    supported and are traced once awaited.
 
     If the function is executed outside of a traced graph run, it will behave
     as if it were not decorated.
     """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            edge_trace = edge_trace_var.get()
+            if not edge_trace:
+                return await func(*args, **kwargs)
+
+            start_time = time.time()
+            result = await func(*args, **kwargs)
+            elapsed = time.time() - start_time
+            _record_function_trace(edge_trace, func, args, kwargs, result, elapsed)
+            return result
+        return async_wrapper
+
     @wraps(func)
     def wrapper(*args, **kwargs):
         edge_trace = edge_trace_var.get()
@@ -28,33 +43,38 @@ def orkes_tracable(func):
         start_time = time.time()
         result = func(*args, **kwargs)
         elapsed = time.time() - start_time
-
-        # Attempt to create the trace object once
-        try:
-            function_trace = FunctionTraceSchema(
-                function_name=func.__name__,
-                input_args=args,
-                input_kwargs=kwargs,
-                return_value=result, # Try original result
-                elapsed=elapsed
-            )
-        except Exception:
-            # Fallback if result isn't serializable
-            function_trace = FunctionTraceSchema(
-                function_name=func.__name__,
-                input_args=args,
-                input_kwargs=kwargs,
-                return_value=str(result),
-                elapsed=elapsed
-            )
-
-        if edge_trace.function_traces is None:
-            edge_trace.function_traces = []
-
-        edge_trace.function_traces.append(function_trace)
+        _record_function_trace(edge_trace, func, args, kwargs, result, elapsed)
         return result
     return wrapper
 
+def _record_function_trace(edge_trace, func: Callable, args: tuple, kwargs: dict, result, elapsed: float):
+    """
+    Appends a FunctionTraceSchema for a finished call to the given edge trace.
+    """
+    # Attempt to create the trace object once
+    try:
+        function_trace = FunctionTraceSchema(
+            function_name=func.__name__,
+            input_args=args,
+            input_kwargs=kwargs,
+            return_value=result, # Try original result
+            elapsed=elapsed
+        )
+    except Exception:
+        # Fallback if result isn't serializable
+        function_trace = FunctionTraceSchema(
+            function_name=func.__name__,
+            input_args=args,
+            input_kwargs=kwargs,
+            return_value=str(result),
+            elapsed=elapsed
+        )
+
+    if edge_trace.function_traces is None:
+        edge_trace.function_traces = []
+
+    edge_trace.function_traces.append(function_trace)
+
 def function_assertion(func: Callable, expected_type: type) -> bool:
     """
     Asserts that a function has at least one parameter with the expected type annotation.
@@ -85,6 +105,34 @@ def is_typeddict_class(obj) -> bool:
     """
     return isinstance(obj, type) and issubclass(obj, dict) and hasattr(obj, '__annotations__') and getattr(obj, '__total__', None) is not None
 
+def get_state_reducers(state_cls: type) -> Dict[str, Callable]:
+    """
+    Collects the per-key reducers declared on a state TypedDict.
+
+    A reducer is declared by annotating a key with ``typing.Annotated`` and a
+    callable taking ``(current, update)``, for example
+    ``results: Annotated[List[str], operator.add]``.
+
+    Args:
+        state_cls (type): The TypedDict class that defines the graph state.
+
+    Returns:
+        Dict[str, Callable]: A mapping from state key to its reducer.
+    """
+    try:
+        hints = get_type_hints(state_cls, include_extras=True)
+    except Exception:
+        hints = getattr(state_cls, '__annotations__', {})
+
+    reducers = {}
+    for key, hint in hints.items():
+        if get_origin(hint) is Annotated:
+            for meta in reversed(hint.__metadata__):
+                if callable(meta):
+                    reducers[key] = meta
+                    break
+    return reducers
+
 def check_dict_values_type(d: dict, cls: type) -> bool:
     """
     Checks if all values in a dictionary are of a certain type.
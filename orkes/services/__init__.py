@@ -1,12 +1,36 @@
-from .connectors import LLMConfig, vLLMConnection, UniversalLLMClient, LLMFactory
+from .connectors import PoolConfig, LLMConfig, vLLMConnection, UniversalLLMClient, LLMFactory
 from .schema import  LLMProviderStrategy, LLMInterface
+from .resilience import RetryPolicy, RetryBudget, RateLimitConfig, RateLimiter, HedgePolicy, Hedger, CircuitBreakerPolicy, CircuitBreaker, CircuitOpenError
+from .cache import ResponseCache, InMemoryResponseCache, SQLiteResponseCache, SingleFlight
+from .balancer import Replica, LoadBalancedLLMClient
+from .streaming import SSEDecoder, ServerSentEvent, StreamEvent, StreamAccumulator
 from .strategies import OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
 
 __all__ = [
+    "PoolConfig",
     "LLMConfig",
     "vLLMConnection",
     "UniversalLLMClient",
     "LLMFactory",
+    "LoadBalancedLLMClient",
+    "Replica",
+    "RetryPolicy",
+    "RetryBudget",
+    "RateLimitConfig",
+    "RateLimiter",
+    "HedgePolicy",
+    "Hedger",
+    "CircuitBreakerPolicy",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ResponseCache",
+    "InMemoryResponseCache",
+    "SQLiteResponseCache",
+    "SingleFlight",
+    "SSEDecoder",
+    "ServerSentEvent",
+    "StreamEvent",
+    "StreamAccumulator",
     "LLMProviderStrategy",
     "LLMInterface",
     "OpenAIStyleStrategy",
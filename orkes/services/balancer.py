@@ -0,0 +1,399 @@
+import contextlib
+import random
+import threading
+import time
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Union
+
+from orkes.services.connectors import UniversalLLMClient, is_upstream_failure
+from orkes.services.resilience import HedgePolicy, Hedger
+from orkes.services.schema import LLMInterface
+from orkes.services.streaming import StreamEvent
+from orkes.shared.schema import RequestSchema
+
+
+class Replica:
+    """One client of a `LoadBalancedLLMClient` and its health and load.
+
+    Attributes:
+        client (UniversalLLMClient): The client of the replica.
+        name (str): The name of the replica in `stats`: its base URL, made
+            unique among the replicas of its balancer.
+        outstanding (int): The requests currently in flight.
+        requests (int): The requests sent so far.
+        failures (int): The requests that failed because of the replica.
+        consecutive_failures (int): The failures since the last success.
+        latency (Optional[float]): An exponentially weighted average of the
+            replica's response time, in seconds.
+        ejected_until (Optional[float]): The `time.monotonic` time the replica is
+            ejected until for failing requests, or None.
+        healthy (bool): Whether the replica passed its latest active health check.
+        last_error (Optional[BaseException]): The latest failure of the replica.
+    """
+
+    def __init__(self, client: UniversalLLMClient, name: Optional[str] = None):
+        """Initializes the Replica.
+
+        Args:
+            client (UniversalLLMClient): The client of the replica.
+            name (Optional[str], optional): The name of the replica. Defaults to
+                the base URL of the client.
+        """
+        self.client = client
+        self.name = name if name is not None else client.config.base_url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency: Optional[float] = None
+        self.ejected_until: Optional[float] = None
+        self.healthy = True
+        self.last_error: Optional[BaseException] = None
+
+    def is_available(self, now: float) -> bool:
+        """Tells whether the replica is in rotation at `now`."""
+        return self.healthy and (self.ejected_until is None or self.ejected_until <= now)
+
+    def score(self) -> tuple:
+        """The sort key of the replica; lower is preferred."""
+        return (self.outstanding, self.latency if self.latency is not None else 0.0)
+
+
+class LoadBalancedLLMClient(LLMInterface):
+    """Spreads requests over several replicas serving the same model.
+
+    Each request goes to the replica with the fewest requests in flight
+    (``"least_outstanding"``), or to the less loaded of two replicas picked at
+    random (``"power_of_two"``), which scales better to large fleets. Ties go to
+    the replica with the lower average latency.
+
+    Health is tracked passively: a replica failing `max_failures` requests in a
+    row, with a connection error, a timeout, a 429 or a 5xx status, is ejected
+    for `ejection_time` seconds and then re-admitted on probation, where a single
+    failure ejects it again. With `health_check_interval`
+    set, a background thread also calls each replica's `health_check`, ejecting
+    replicas that fail it and re-admitting them once it passes again, unless
+    they are still ejected for failing requests. When every
+    replica is ejected, requests are spread over all of them rather than failing.
+
+    With `hedge` set, asynchronous calls that are slow to answer, or to start
+    streaming, send a duplicate request to another replica and keep whichever
+    answers first.
+
+    Attributes:
+        replicas (List[Replica]): The replicas and their statistics.
+        strategy (str): The selection strategy.
+        max_failures (int): The consecutive failures that eject a replica.
+        ejection_time (float): How long, in seconds, a replica stays ejected.
+        health_check_interval (Optional[float]): The seconds between active health
+            checks, or None to only track health passively.
+        latency_weight (float): The weight of the newest response time in each
+            replica's average latency.
+        hedger (Optional[Hedger]): The hedger of asynchronous calls, if hedging is
+            enabled.
+    """
+
+    STRATEGIES = ("least_outstanding", "power_of_two")
+
+    def __init__(
+        self,
+        clients: List[UniversalLLMClient],
+        strategy: str = "least_outstanding",
+        max_failures: int = 3,
+        ejection_time: float = 30.0,
+        health_check_interval: Optional[float] = None,
+        health_check_endpoint: str = "/health",
+        latency_weight: float = 0.2,
+        hedge: Optional[HedgePolicy] = None
+    ):
+        """Initializes the LoadBalancedLLMClient.
+
+        Args:
+            clients (List[UniversalLLMClient]): The clients of the replicas.
+            strategy (str, optional): "least_outstanding" or "power_of_two".
+                Defaults to "least_outstanding".
+            max_failures (int, optional): The consecutive failures that eject a
+                replica. Defaults to 3.
+            ejection_time (float, optional): How long a replica stays ejected, in
+                seconds. Defaults to 30.0.
+            health_check_interval (Optional[float], optional): The seconds between
+                active health checks. Defaults to None.
+            health_check_endpoint (str, optional): The endpoint passed to each
+                replica's `health_check`. Defaults to "/health".
+            latency_weight (float, optional): The weight of the newest response
+                time in the average latency. Defaults to 0.2.
+            hedge (Optional[HedgePolicy], optional): The policy for hedging slow
+                asynchronous calls to another replica. Defaults to None.
+
+        Raises:
+            ValueError: If `clients` is empty or `strategy` is unknown.
+        """
+        if not clients:
+            raise ValueError("At least one client is required.")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {self.STRATEGIES}.")
+        # Replicas sharing a base URL are told apart in `stats` by a suffix.
+        self.replicas: List[Replica] = []
+        seen: Dict[str, int] = {}
+        for client in clients:
+            url = client.config.base_url
+            seen[url] = seen.get(url, 0) + 1
+            self.replicas.append(Replica(client, url if seen[url] == 1 else f"{url}#{seen[url]}"))
+        self.strategy = strategy
+        self.max_failures = max_failures
+        self.ejection_time = ejection_time
+        self.health_check_interval = health_check_interval
+        self.health_check_endpoint = health_check_endpoint
+        self.latency_weight = latency_weight
+        self.hedger: Optional[Hedger] = Hedger(hedge) if hedge is not None else None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._checker: Optional[threading.Thread] = None
+        if health_check_interval is not None:
+            self._checker = threading.Thread(target=self._run_health_checks, name="orkes-health-checker", daemon=True)
+            self._checker.start()
+
+    def __enter__(self) -> "LoadBalancedLLMClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def __aenter__(self) -> "LoadBalancedLLMClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _acquire(self, used: Optional[Set[int]] = None) -> Replica:
+        """Picks a replica for a request and counts the request as outstanding.
+
+        Args:
+            used (Optional[Set[int]], optional): The ids of the replicas already
+                serving the same call, which are avoided if possible. The id of the
+                picked replica is added to it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [r for r in self.replicas if r.is_available(now)] or self.replicas
+            if used:
+                candidates = [r for r in candidates if id(r) not in used] or candidates
+            if self.strategy == "power_of_two" and len(candidates) > 2:
+                candidates = random.sample(candidates, 2)
+            replica = min(candidates, key=Replica.score)
+            replica.outstanding += 1
+            replica.requests += 1
+            if used is not None:
+                used.add(id(replica))
+            return replica
+
+    def _release(self, replica: Replica, start: float, error: Optional[BaseException] = None, record_latency: bool = True):
+        """Ends a request on a replica, updating its health and latency."""
+        with self._lock:
+            replica.outstanding -= 1
+            if error is not None and is_upstream_failure(error):
+                replica.failures += 1
+                replica.consecutive_failures += 1
+                replica.last_error = error
+                if replica.consecutive_failures >= self.max_failures:
+                    replica.ejected_until = time.monotonic() + self.ejection_time
+                return
+            if error is not None:
+                return
+            replica.consecutive_failures = 0
+            if record_latency:
+                elapsed = time.monotonic() - start
+                if replica.latency is None:
+                    replica.latency = elapsed
+                else:
+                    replica.latency += self.latency_weight * (elapsed - replica.latency)
+
+    def send_message(self, messages, **kwargs) -> Dict:
+        """Sends a synchronous request to one of the replicas.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            **kwargs: The arguments of `UniversalLLMClient.send_message`.
+
+        Returns:
+            Dict: The response of the replica.
+        """
+        replica = self._acquire()
+        start = time.monotonic()
+        try:
+            response = replica.client.send_message(messages, **kwargs)
+        except BaseException as e:
+            self._release(replica, start, e)
+            raise
+        self._release(replica, start)
+        return response
+
+    async def asend_message(self, messages, **kwargs) -> Dict:
+        """Sends a request to one of the replicas without blocking the event loop.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            **kwargs: The arguments of `UniversalLLMClient.asend_message`.
+
+        Returns:
+            Dict: The response of the replica.
+        """
+        if self.hedger is None:
+            return await self._asend(messages, kwargs)
+        used: Set[int] = set()
+        return await self.hedger.run(lambda _: self._asend(messages, kwargs, used))
+
+    async def _asend(self, messages, kwargs: Dict, used: Optional[Set[int]] = None) -> Dict:
+        """Sends a request to the replica picked by `_acquire`."""
+        replica = self._acquire(used)
+        start = time.monotonic()
+        try:
+            response = await replica.client.asend_message(messages, **kwargs)
+        except BaseException as e:
+            self._release(replica, start, e)
+            raise
+        self._release(replica, start)
+        return response
+
+    async def stream_message(self, messages, **kwargs) -> AsyncGenerator[str, None]:
+        """Streams the response of one of the replicas.
+
+        The replica counts as busy until the stream ends. Stream durations depend
+        on the length of the answer, so they do not count towards its latency.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            **kwargs: The arguments of `UniversalLLMClient.stream_message`.
+
+        Yields:
+            str: A chunk of the response from the LLM.
+        """
+        async with contextlib.aclosing(self._stream("stream_message", messages, kwargs)) as stream:
+            async for chunk in stream:
+                yield chunk
+
+    async def stream_events(self, messages, **kwargs) -> AsyncGenerator[StreamEvent, None]:
+        """Streams the events of the response of one of the replicas, as `stream_message` does.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            **kwargs: The arguments of `UniversalLLMClient.stream_events`.
+
+        Yields:
+            StreamEvent: An event of the response from the LLM.
+        """
+        async with contextlib.aclosing(self._stream("stream_events", messages, kwargs)) as stream:
+            async for event in stream:
+                yield event
+
+    async def stream_response(self, messages, **kwargs) -> AsyncGenerator[Union[StreamEvent, RequestSchema], None]:
+        """Streams the events of the response of one of the replicas, then the response itself.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            **kwargs: The arguments of `UniversalLLMClient.stream_response`.
+
+        Yields:
+            Union[StreamEvent, RequestSchema]: An event of the response from the
+            LLM, and finally the assembled response.
+        """
+        async with contextlib.aclosing(self._stream("stream_response", messages, kwargs)) as stream:
+            async for item in stream:
+                yield item
+
+    async def _stream(self, method: str, messages, kwargs: Dict) -> AsyncGenerator[Any, None]:
+        """Streams the items of a replica's streaming `method`, hedged if enabled."""
+        if self.hedger is None:
+            replica, stream, first_chunk, start = await self._aopen_stream(method, messages, kwargs)
+        else:
+            used: Set[int] = set()
+            replica, stream, first_chunk, start = await self.hedger.run(
+                lambda _: self._aopen_stream(method, messages, kwargs, used), self._discard_stream
+            )
+        try:
+            if first_chunk is not None:
+                yield first_chunk
+                async for chunk in stream:
+                    yield chunk
+        except BaseException as e:
+            await stream.aclose()
+            self._release(replica, start, e)
+            raise
+        self._release(replica, start, record_latency=False)
+
+    async def _aopen_stream(self, method: str, messages, kwargs: Dict, used: Optional[Set[int]] = None) -> tuple:
+        """Starts a stream on the replica picked by `_acquire` and waits for its first chunk.
+
+        Returns:
+            tuple: The replica, the stream, its first chunk, or None if it ended
+            without one, and the time the stream started.
+        """
+        replica = self._acquire(used)
+        start = time.monotonic()
+        stream = getattr(replica.client, method)(messages, **kwargs)
+        try:
+            first_chunk = await stream.__anext__()
+        except StopAsyncIteration:
+            first_chunk = None
+        except BaseException as e:
+            await stream.aclose()
+            self._release(replica, start, e)
+            raise
+        return replica, stream, first_chunk, start
+
+    async def _discard_stream(self, opened: tuple):
+        """Closes a stream that lost a hedged race."""
+        replica, stream, _, start = opened
+        await stream.aclose()
+        self._release(replica, start, record_latency=False)
+
+    def health_check(self, endpoint: str = "/health") -> bool:
+        """Checks every replica, updating which ones are in rotation.
+
+        A passing check does not cut short an ejection for failing requests.
+
+        Args:
+            endpoint (str, optional): The health check endpoint. Defaults to "/health".
+
+        Returns:
+            bool: True if at least one replica is healthy.
+        """
+        results = [replica.client.health_check(endpoint) for replica in self.replicas]
+        with self._lock:
+            for replica, healthy in zip(self.replicas, results):
+                replica.healthy = healthy
+        return any(results)
+
+    def _run_health_checks(self):
+        while not self._stop.wait(self.health_check_interval):
+            self.health_check(self.health_check_endpoint)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the statistics of each replica, keyed by replica name.
+
+        The name of a replica is its base URL, followed by ``#2``, ``#3``, ... for
+        the second and later replicas sharing that URL.
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                replica.name: {
+                    "outstanding": replica.outstanding,
+                    "requests": replica.requests,
+                    "failures": replica.failures,
+                    "latency": replica.latency,
+                    "available": replica.is_available(now),
+                }
+                for replica in self.replicas
+            }
+
+    def close(self):
+        """Stops the health checks and closes every replica's connection pools."""
+        self._stop.set()
+        for replica in self.replicas:
+            replica.client.close()
+
+    async def aclose(self):
+        """Stops the health checks and closes every replica's connection pools."""
+        self._stop.set()
+        for replica in self.replicas:
+            await replica.client.aclose()
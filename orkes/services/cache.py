@@ -0,0 +1,331 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from orkes.shared import serialization
+
+
+def make_cache_key(full_url: str, payload: Dict) -> str:
+    """Returns the cache key of a request.
+
+    Args:
+        full_url (str): The URL the request is sent to.
+        payload (Dict): The payload prepared by the provider strategy.
+
+    Returns:
+        str: A SHA-256 hex digest of the URL and the canonical JSON of the payload,
+        so payloads that differ only in key order share a key.
+    """
+    # Always the standard library, so persisted keys do not depend on the serializer in use.
+    canonical = json.dumps([full_url, payload], sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache(ABC):
+    """Abstract base class for caches of raw LLM responses.
+
+    A client configured with a cache looks up every non-streamed request by
+    `make_cache_key` before sending it, and stores the raw response of every
+    request that succeeds. Only use a cache for calls whose responses may be
+    reused, such as calls at temperature 0.
+
+    Subclasses implement `_get`, `_set` and `clear`; the public `get` and `set`
+    keep the counters.
+
+    Attributes:
+        ttl (Optional[float]): How long, in seconds, an entry stays valid. None
+            keeps entries until they are evicted.
+        hits (int): The lookups that found a valid entry.
+        misses (int): The lookups that did not.
+        evictions (int): The entries removed to respect the size cap or because
+            they had expired.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        """Initializes the ResponseCache.
+
+        Args:
+            ttl (Optional[float], optional): The lifetime of entries, in seconds.
+                Defaults to None.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Looks up a response.
+
+        Args:
+            key (str): The cache key of the request.
+
+        Returns:
+            Optional[Dict]: The cached raw response, or None.
+        """
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict) -> None:
+        """Stores a response.
+
+        Args:
+            key (str): The cache key of the request.
+            value (Dict): The raw response. It must be JSON serializable.
+        """
+        self._set(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the hit, miss and eviction counters."""
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _count_evictions(self, count: int) -> None:
+        if count:
+            with self._stats_lock:
+                self.evictions += count
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Dict]:
+        """Returns the valid entry for a key, or None."""
+        pass
+
+    @abstractmethod
+    def _set(self, key: str, value: Dict) -> None:
+        """Stores an entry, evicting others as needed."""
+        pass
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Removes every entry. The counters are kept."""
+        pass
+
+
+class InMemoryResponseCache(ResponseCache):
+    """A least-recently-used cache held in memory.
+
+    Entries are shared by every client using the cache in the process, and lost
+    when it exits.
+
+    Attributes:
+        max_entries (int): The most entries kept; the least recently used entry
+            is evicted to make room for a new one.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        """Initializes the InMemoryResponseCache.
+
+        Args:
+            max_entries (int, optional): The most entries kept. Defaults to 1024.
+            ttl (Optional[float], optional): The lifetime of entries, in seconds.
+                Defaults to None.
+
+        Raises:
+            ValueError: If `max_entries` is less than 1.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry[0]):
+                del self._entries[key]
+                self._count_evictions(1)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value: Dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        self._count_evictions(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """A cache stored in a SQLite database, kept across processes and restarts.
+
+    Attributes:
+        path (str): The path of the database file.
+        max_entries (Optional[int]): The most entries kept, evicting the least
+            recently used first. None keeps every entry.
+    """
+
+    def __init__(self, path: str = "llm_cache.sqlite", max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        """Initializes the SQLiteResponseCache, creating its table if needed.
+
+        Args:
+            path (str, optional): The path of the database file. Defaults to
+                "llm_cache.sqlite".
+            max_entries (Optional[int], optional): The most entries kept.
+                Defaults to None.
+            ttl (Optional[float], optional): The lifetime of entries, in seconds.
+                Defaults to None.
+        """
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Closes the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def _get(self, key: str) -> Optional[Dict]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value, stored_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if self._is_expired(row[1]):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._count_evictions(1)
+                return None
+            self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (time.time(), key))
+            return serialization.loads(row[0])
+
+    def _set(self, key: str, value: Dict) -> None:
+        now = time.time()
+        data = serialization.dumps(value).decode("utf-8")
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, data, now, now))
+            if self.max_entries is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE key NOT IN "
+                    "(SELECT key FROM responses ORDER BY used_at DESC, rowid DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+                self._count_evictions(cursor.rowcount)
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller of a key runs the call; callers arriving while it is in
+    flight wait for it and get the same result, or the same exception. Sync and
+    async callers share flights, whichever thread or event loop they run on. A
+    key is forgotten as soon as its call completes, so nothing is cached.
+
+    Attributes:
+        coalesced (int): The calls answered by another caller's flight.
+    """
+
+    def __init__(self):
+        """Initializes the SingleFlight."""
+        self.coalesced = 0
+        self._flights: Dict[str, concurrent.futures.Future] = {}
+        self._lock = threading.Lock()
+
+    def _join(self, key: str) -> Tuple[concurrent.futures.Future, bool]:
+        """Returns the flight of a key and whether the caller leads it."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                return flight, False
+            flight = concurrent.futures.Future()
+            self._flights[key] = flight
+            return flight, True
+
+    def _land(self, key: str, flight: concurrent.futures.Future) -> None:
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Runs `fn`, unless a call with the same key is in flight.
+
+        Args:
+            key (str): The key identifying identical calls.
+            fn (Callable[[], Any]): The call to make.
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it came from another
+            caller's flight.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            return flight.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            self._land(key, flight)
+        flight.set_result(result)
+        return result, False
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Awaitable counterpart of `do`.
+
+        A waiter that is cancelled stops waiting without cancelling the flight.
+        If the caller leading the flight is cancelled, its waiters get the
+        `asyncio.CancelledError` too.
+
+        Args:
+            key (str): The key identifying identical calls.
+            fn (Callable[[], Awaitable[Any]]): Returns the awaitable to run.
+
+        Returns:
+            Tuple[Any, bool]: The result, and whether it came from another
+            caller's flight.
+        """
+        flight, leader = self._join(key)
+        if not leader:
+            return await asyncio.shield(asyncio.wrap_future(flight)), True
+        try:
+            result = await fn()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            self._land(key, flight)
+        flight.set_result(result)
+        return result, False
@@ -1,14 +1,119 @@
 from typing import Optional, Dict, AsyncGenerator, Any, List, Union, Callable
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import aiohttp
 import asyncio
+import contextlib
+import threading
+import time
+from pydantic import BaseModel
 from orkes.services.strategies import LLMProviderStrategy, OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
 from orkes.services.schema import LLMInterface, OrkesToolSchema
-from orkes.shared.schema import OrkesMessagesSchema
-from orkes.shared.context import edge_trace_var
+from orkes.services.resilience import RetryPolicy, RetryBudget, RetryState, RateLimitConfig, RateLimiter, get_rate_limiter, HedgePolicy, Hedger, CircuitBreakerPolicy, CircuitBreaker, CircuitOpenError
+from orkes.services.cache import ResponseCache, SingleFlight, make_cache_key
+from orkes.services.streaming import SSEDecoder, StreamEvent, StreamAccumulator
+from orkes.shared.schema import OrkesMessagesSchema, RequestSchema, UsageSchema
+from orkes.shared.context import edge_trace_var, hedge_state_var, usage_var
 from orkes.graph.schema import LLMTraceSchema
 from orkes.shared.utils import callable_to_orkes_tool_schema
+from orkes.shared import serialization
+
+# The errors of requests that never reached the server, which are the only ones
+# safe to send again: a request that timed out reading its response may still be
+# generating, and be billed, on the server. ConnectTimeout is a ConnectionError.
+_CONNECT_ERRORS = (requests.ConnectionError,)
+# aiohttp before 3.10 has no ConnectionTimeoutError.
+_ACONNECT_ERRORS = (aiohttp.ClientConnectorError, getattr(aiohttp, "ConnectionTimeoutError", aiohttp.ClientConnectorError))
+
+# The size of the reads of synchronous response bodies, between which the
+# deadline of the call is checked.
+_BODY_CHUNK_SIZE = 16 * 1024
+
+
+async def _close_at_shutdown(session: aiohttp.ClientSession) -> AsyncGenerator[None, None]:
+    """Waits, suspended, for its event loop to shut down, then closes the session.
+
+    Event loops close the async generators still suspended on them before they
+    close, as `asyncio.run` does, so the session is closed on its own loop.
+    """
+    try:
+        yield
+    finally:
+        if not session.closed:
+            await session.close()
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    """Tells whether a failed request is the endpoint's fault rather than the request's.
+
+    Connection errors, timeouts, 429 and 5xx responses and open circuits count;
+    other HTTP errors, such as a 400 for a malformed request, and cancellations
+    do not.
+
+    Args:
+        error (BaseException): The error raised by the request.
+
+    Returns:
+        bool: True if the error counts against the endpoint.
+    """
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+    elif isinstance(error, aiohttp.ClientResponseError):
+        status = error.status
+    else:
+        return isinstance(error, (requests.RequestException, aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError))
+    return status == 429 or status >= 500
+
+
+class PoolConfig:
+    """Connection pool settings for an LLM client.
+
+    A client keeps one pool of keep-alive connections for synchronous calls and
+    one per event loop for asynchronous calls, so back-to-back requests to the
+    same server skip the TCP and TLS handshakes.
+
+    Attributes:
+        max_connections (int): The most connections the async pool opens in total.
+            The sync pool keeps this many host pools.
+        max_connections_per_host (int): The most connections kept open to a
+            single host.
+        keepalive_timeout (float): How long, in seconds, an idle async connection
+            is kept open for reuse.
+        connect_timeout (Optional[float]): The timeout, in seconds, for opening a
+            connection. None waits indefinitely.
+        read_timeout (Optional[float]): The timeout, in seconds, between bytes
+            received from the server. None waits indefinitely.
+    """
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_connections_per_host: int = 20,
+        keepalive_timeout: float = 30.0,
+        connect_timeout: Optional[float] = 10.0,
+        read_timeout: Optional[float] = 600.0
+    ):
+        """Initializes the PoolConfig object.
+
+        Args:
+            max_connections (int, optional): The most connections open in total.
+                Defaults to 100.
+            max_connections_per_host (int, optional): The most connections open to
+                a single host. Defaults to 20.
+            keepalive_timeout (float, optional): How long idle async connections
+                are kept, in seconds. Defaults to 30.0.
+            connect_timeout (Optional[float], optional): The connect timeout in
+                seconds. Defaults to 10.0.
+            read_timeout (Optional[float], optional): The read timeout in seconds.
+                Defaults to 600.0, which leaves slow generations time to answer
+                but keeps a hung server from blocking a call forever.
+        """
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
 
 class LLMConfig:
     """A universal configuration object for any LLM connection.
@@ -24,6 +129,20 @@ class LLMConfig:
         headers (Dict[str, str]): A dictionary of extra headers to send with each request.
         default_params (Dict[str, Any]): A dictionary of default parameters to use for
                                        all requests, such as temperature and max_tokens.
+        pool (PoolConfig): The connection pool settings of clients using this config.
+        retry (RetryPolicy): The retry, backoff and total timeout policy of requests.
+        rate_limit (Optional[RateLimitConfig]): The client-side concurrency and rate
+            limits of requests, or None for no limits.
+        cache (Optional[ResponseCache]): The cache of non-streamed responses, or
+            None to always send requests.
+        coalesce (bool): Whether identical non-streamed requests made while one is
+            in flight wait for its response instead of being sent again.
+        hedge (Optional[HedgePolicy]): The policy for hedging slow asynchronous
+            requests, or None to never hedge.
+        circuit_breaker (Optional[CircuitBreakerPolicy]): The policy of the circuit
+            breaker guarding the endpoint, or None for no breaker.
+        fallback (Optional[LLMInterface]): The client calls are routed to while the
+            circuit is open, or None to raise `CircuitOpenError`.
     """
     def __init__(
         self,
@@ -31,7 +150,15 @@ class LLMConfig:
         base_url: str,
         model: str,
         extra_headers: Optional[Dict[str, str]] = None,
-        default_params: Optional[Dict[str, Any]] = None
+        default_params: Optional[Dict[str, Any]] = None,
+        pool: Optional[PoolConfig] = None,
+        retry: Optional[RetryPolicy] = None,
+        rate_limit: Optional[RateLimitConfig] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = False,
+        hedge: Optional[HedgePolicy] = None,
+        circuit_breaker: Optional[CircuitBreakerPolicy] = None,
+        fallback: Optional[LLMInterface] = None
     ):
         """Initializes the LLMConfig object.
 
@@ -44,6 +171,23 @@ class LLMConfig:
             default_params (Optional[Dict[str, Any]], optional): A dictionary of default
                 parameters to use for all requests. Defaults to a standard set of
                 parameters.
+            pool (Optional[PoolConfig], optional): The connection pool settings.
+                Defaults to `PoolConfig()`.
+            retry (Optional[RetryPolicy], optional): The retry policy. Defaults to
+                `RetryPolicy()`, which retries 429 and 5xx responses and failed
+                connections twice.
+            rate_limit (Optional[RateLimitConfig], optional): The client-side limits.
+                Defaults to None.
+            cache (Optional[ResponseCache], optional): The response cache.
+                Defaults to None.
+            coalesce (bool, optional): Whether to coalesce identical in-flight
+                requests. Defaults to False.
+            hedge (Optional[HedgePolicy], optional): The hedging policy. Defaults
+                to None.
+            circuit_breaker (Optional[CircuitBreakerPolicy], optional): The circuit
+                breaker policy. Defaults to None.
+            fallback (Optional[LLMInterface], optional): The client used while the
+                circuit is open. Defaults to None.
         """
         self.api_key = api_key
         self.base_url = base_url.rstrip('/')
@@ -53,6 +197,14 @@ class LLMConfig:
             "temperature": 0.7,
             "max_tokens": 1024
         }
+        self.pool = pool or PoolConfig()
+        self.retry = retry or RetryPolicy()
+        self.rate_limit = rate_limit
+        self.cache = cache
+        self.coalesce = coalesce
+        self.hedge = hedge
+        self.circuit_breaker = circuit_breaker
+        self.fallback = fallback
 
 
 class vLLMConnection(LLMInterface):
@@ -115,10 +267,37 @@ class UniversalLLMClient(LLMInterface):
     for a consistent interface regardless of the underlying provider. It handles both
     synchronous and asynchronous requests, as well as streaming responses.
 
+    The client owns its HTTP connection pools, configured by `config.pool`: a
+    `requests.Session` for synchronous calls and an `aiohttp.ClientSession` per
+    event loop for asynchronous ones, both created on first use. Reuse one client
+    across calls and release its connections with `close` / `aclose`, or use it
+    as a (async) context manager.
+
+    Failed requests are retried according to `config.retry`; the retries of all
+    calls made through one client share a `RetryBudget`. With `config.rate_limit`
+    set, every attempt first waits its turn on the client's `RateLimiter`, which
+    synchronous and asynchronous calls share. With `config.cache` set, non-streamed
+    calls are answered from the cache when an identical request was made before,
+    and with `config.coalesce` set, identical calls made at the same time share
+    one request. With `config.hedge` set, asynchronous calls that are slow to
+    answer, or to start streaming, send a duplicate request and keep whichever
+    answers first.
+
+    With `config.circuit_breaker` set, calls to an endpoint that keeps failing are
+    refused with `CircuitOpenError` until it has had time to recover, or sent to
+    `config.fallback` instead.
+
     Attributes:
         config (LLMConfig): The configuration for the LLM connection.
         provider (LLMProviderStrategy): The strategy for the specific LLM provider.
         session_headers (Dict[str, str]): The headers to use for the session.
+        limiter (Optional[RateLimiter]): The limiter requests wait on, if any.
+        flights (Optional[SingleFlight]): The in-flight requests identical calls
+            wait on, if coalescing is enabled.
+        hedger (Optional[Hedger]): The hedger of asynchronous calls, if hedging is
+            enabled.
+        breaker (Optional[CircuitBreaker]): The circuit breaker of the endpoint, if
+            enabled.
     """
     def __init__(self, config: LLMConfig, provider: LLMProviderStrategy):
         """Initializes the UniversalLLMClient.
@@ -131,6 +310,287 @@ class UniversalLLMClient(LLMInterface):
         self.provider = provider
         self.session_headers = self.provider.get_headers(self.config.api_key)
         self.session_headers.update(self.config.headers)
+        # Payloads are sent pre-serialized, so the content type is not set for us.
+        self.session_headers.setdefault("Content-Type", "application/json")
+        self._session: Optional[requests.Session] = None
+        # aiohttp sessions are bound to the loop they were created on, and are
+        # closed by their closer when that loop shuts down.
+        self._async_sessions: Dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._session_closers: Dict[asyncio.AbstractEventLoop, AsyncGenerator[None, None]] = {}
+        self._session_lock = threading.Lock()
+        self._retry_budget = RetryBudget(self.config.retry.budget_ratio, self.config.retry.budget_max)
+        self.limiter: Optional[RateLimiter] = None
+        if self.config.rate_limit is not None:
+            self.limiter = get_rate_limiter(self.config.rate_limit, self.config.base_url, self.config.model)
+        self.flights: Optional[SingleFlight] = SingleFlight() if self.config.coalesce else None
+        self.hedger: Optional[Hedger] = Hedger(self.config.hedge) if self.config.hedge is not None else None
+        self.breaker: Optional[CircuitBreaker] = None
+        if self.config.circuit_breaker is not None:
+            self.breaker = CircuitBreaker(self.config.circuit_breaker, self.config.base_url, is_upstream_failure)
+
+    def __enter__(self) -> "UniversalLLMClient":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def __aenter__(self) -> "UniversalLLMClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    def _get_session(self) -> requests.Session:
+        """Returns the pooled session for synchronous calls, creating it on first use."""
+        with self._session_lock:
+            if self._session is None:
+                pool = self.config.pool
+                adapter = HTTPAdapter(
+                    pool_connections=pool.max_connections,
+                    pool_maxsize=pool.max_connections_per_host
+                )
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """Returns the pooled session of the running event loop, creating it on first use.
+
+        The session is closed when its loop shuts down its async generators, and
+        forgotten once the loop is closed.
+        """
+        loop = asyncio.get_running_loop()
+        # Threads running loops of their own share the client, and its sessions.
+        with self._session_lock:
+            self._prune_async_sessions()
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                pool = self.config.pool
+                connector = aiohttp.TCPConnector(
+                    limit=pool.max_connections,
+                    limit_per_host=pool.max_connections_per_host,
+                    keepalive_timeout=pool.keepalive_timeout
+                )
+                timeout = aiohttp.ClientTimeout(
+                    total=None,
+                    sock_connect=pool.connect_timeout,
+                    sock_read=pool.read_timeout
+                )
+                session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+                self._async_sessions[loop] = session
+                # Runs the closer up to its yield, which registers it with the loop.
+                closer = _close_at_shutdown(session)
+                with contextlib.suppress(StopIteration):
+                    closer.__anext__().send(None)
+                self._session_closers[loop] = closer
+            return session
+
+    def _prune_async_sessions(self):
+        """Forgets the async sessions of event loops that have been closed.
+
+        Must be called with `_session_lock` held.
+        """
+        # Closers outlive `close`, which would otherwise have them finalized on
+        # loops that may never run again; they skip sessions already closed.
+        for loop in [loop for loop in self._session_closers if loop.is_closed()]:
+            del self._session_closers[loop]
+            self._async_sessions.pop(loop, None)
+
+    def _timeout(self, retry: Optional[RetryState] = None) -> tuple:
+        """Returns the (connect, read) timeout for synchronous requests.
+
+        Args:
+            retry (Optional[RetryState], optional): The state of the call, whose
+                deadline caps both timeouts.
+        """
+        pool = self.config.pool
+        if retry is None:
+            return (pool.connect_timeout, pool.read_timeout)
+        return (retry.cap(pool.connect_timeout), retry.cap(pool.read_timeout))
+
+    def _estimate_tokens(self, payload: Dict, settings: Dict) -> int:
+        """Estimates the tokens a request uses, for the tokens-per-minute limit.
+
+        The prompt is counted as one token per four characters of the payload, and
+        the completion as the request's ``max_tokens``.
+        """
+        if self.limiter is None or self.limiter.tokens_per_minute is None:
+            return 0
+        prompt_tokens = len(serialization.dumps(payload)) // 4
+        return prompt_tokens + int(settings.get("max_tokens") or 0)
+
+    def _acquire(self, retry: RetryState, tokens: int):
+        """Waits on the client's limiter, if any, before an attempt.
+
+        Raises:
+            requests.Timeout: If the call's deadline passes while waiting.
+        """
+        if self.limiter is not None:
+            try:
+                retry.limiter_wait += self.limiter.acquire(tokens, retry.remaining())
+            except TimeoutError as e:
+                raise requests.Timeout(str(e)) from e
+
+    async def _aacquire(self, retry: RetryState, tokens: int):
+        """Awaitable counterpart of `_acquire`.
+
+        Raises:
+            asyncio.TimeoutError: If the call's deadline passes while waiting.
+        """
+        if self.limiter is not None:
+            retry.limiter_wait += await self.limiter.aacquire(tokens, retry.remaining())
+
+    def _release(self):
+        """Gives back the limiter slot taken by `_acquire` or `_aacquire`."""
+        if self.limiter is not None:
+            self.limiter.release()
+
+    def _read(self, response: requests.Response, retry: RetryState) -> bytes:
+        """Reads the body of a streamed response within the call's deadline.
+
+        The deadline is checked between chunks of the body, each of whose reads is
+        bounded by the read timeout.
+
+        Raises:
+            requests.Timeout: If the deadline passes before the body is read.
+        """
+        chunks = []
+        for chunk in response.iter_content(_BODY_CHUNK_SIZE):
+            chunks.append(chunk)
+            if retry.remaining() == 0:
+                raise requests.Timeout("The call's total timeout passed while reading the response.")
+        return b"".join(chunks)
+
+    def _post(self, full_url: str, payload: Dict, params: Dict, retry: RetryState, tokens: int = 0) -> bytes:
+        """Sends a POST request, retrying as the client's retry policy allows.
+
+        Args:
+            full_url (str): The URL to post to.
+            payload (Dict): The JSON payload.
+            params (Dict): The query parameters.
+            retry (RetryState): The state of the call.
+            tokens (int, optional): The estimated tokens of the request, charged to
+                the limiter on every attempt. Defaults to 0.
+
+        Returns:
+            bytes: The body of the successful response.
+
+        Raises:
+            requests.RequestException: The error of the last attempt, once the call
+                cannot be retried any more.
+        """
+        body = serialization.dumps(payload)
+        while True:
+            self._acquire(retry, tokens)
+            try:
+                # Streamed, so the body is read under the call's deadline too.
+                with self._get_session().post(full_url, headers=self.session_headers, data=body, params=params, timeout=self._timeout(retry), stream=True) as response:
+                    if not response.ok:
+                        # Reading the error body keeps it on the response the
+                        # HTTPError carries, and the connection in the pool.
+                        response.content
+                        response.raise_for_status()
+                    return self._read(response, retry)
+            except requests.HTTPError as e:
+                if not retry.is_retryable_status(e.response.status_code):
+                    raise
+                delay = retry.next_delay(e.response.headers.get("Retry-After"))
+                if delay is None:
+                    raise
+            except _CONNECT_ERRORS:
+                delay = retry.next_delay()
+                if delay is None:
+                    raise
+            finally:
+                # The body has been read, so the slot is free again.
+                self._release()
+            time.sleep(delay)
+
+    async def _apost(self, full_url: str, payload: Dict, params: Dict, retry: RetryState, tokens: int = 0) -> aiohttp.ClientResponse:
+        """Awaitable counterpart of `_post`.
+
+        Args:
+            full_url (str): The URL to post to.
+            payload (Dict): The JSON payload.
+            params (Dict): The query parameters.
+            retry (RetryState): The state of the call.
+            tokens (int, optional): The estimated tokens of the request, charged to
+                the limiter on every attempt. Defaults to 0.
+
+        Returns:
+            aiohttp.ClientResponse: The successful response, whose body is still to
+            be read. The caller must release it, and then the limiter slot with
+            `_release`.
+
+        Raises:
+            aiohttp.ClientError: The error of the last attempt, once the call
+                cannot be retried any more.
+            asyncio.TimeoutError: If the last attempt timed out.
+        """
+        session = self._get_async_session()
+        body = serialization.dumps(payload)
+        while True:
+            await self._aacquire(retry, tokens)
+            try:
+                response = await asyncio.wait_for(
+                    session.post(full_url, headers=self.session_headers, data=body, params=params),
+                    retry.remaining()
+                )
+                # raise_for_status releases the connection before raising.
+                response.raise_for_status()
+                return response
+            except aiohttp.ClientResponseError as e:
+                self._release()
+                if not retry.is_retryable_status(e.status):
+                    raise
+                delay = retry.next_delay(e.headers.get("Retry-After") if e.headers else None)
+                if delay is None:
+                    raise
+            except _ACONNECT_ERRORS:
+                self._release()
+                delay = retry.next_delay()
+                if delay is None:
+                    raise
+            except BaseException:
+                self._release()
+                raise
+            await asyncio.sleep(delay)
+
+    def close(self):
+        """Closes the client's connection pools.
+
+        The async pools of event loops that are not running are closed here; those
+        of running loops are scheduled for closing on their loop. Prefer `aclose`
+        from async code. The client can still be used afterwards; it opens new
+        pools on demand.
+        """
+        with self._session_lock:
+            session, self._session = self._session, None
+            async_sessions = list(self._async_sessions.items())
+            self._async_sessions.clear()
+        if session is not None:
+            session.close()
+        for loop, async_session in async_sessions:
+            if async_session.closed or loop.is_closed():
+                continue
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(async_session.close(), loop)
+            else:
+                loop.run_until_complete(async_session.close())
+
+    async def aclose(self):
+        """Closes the client's connection pools from an event loop.
+
+        The pool of the running loop is closed and awaited; the synchronous pool
+        and the pools of other loops are closed as in `close`.
+        """
+        with self._session_lock:
+            session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None and not session.closed:
+            await session.close()
+        self.close()
 
     def _merge_settings(self, overrides: Optional[Dict]) -> Dict:
         """Merges default settings with any overrides."""
@@ -139,38 +599,35 @@ class UniversalLLMClient(LLMInterface):
             settings.update(overrides)
         return settings
 
-    def send_message(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> Dict:
-        """Sends a synchronous request to the LLM provider.
+    def _default_endpoint(self, stream: bool) -> str:
+        """Returns the provider's chat endpoint, relative to the base URL."""
+        if isinstance(self.provider, GoogleGeminiStrategy):
+            if stream:
+                return f"/models/{self.config.model}:streamGenerateContent?alt=sse"
+            return f"/models/{self.config.model}:generateContent"
+        elif isinstance(self.provider, AnthropicStrategy):
+            return "/messages"
+        return "/chat/completions"
+
+    def _prepare_request(self, messages: OrkesMessagesSchema, endpoint: Optional[str], tools: Optional[list], stream: bool, overrides: Dict) -> tuple:
+        """Builds the URL, payload and settings of a request.
 
         Args:
             messages (OrkesMessagesSchema): The messages to send to the LLM.
-            endpoint (str, optional): The API endpoint to use. If not provided, it will
-                be inferred from the provider.
-            tools (Optional[List[Dict]], optional): A list of tools to provide to the
-                LLM. Defaults to None.
-            connection (Optional[Any], optional): The connection object from a web server,
-                which can be used to check for client disconnection. Defaults to None.
-            **kwargs: Additional parameters to override the default settings.
+            endpoint (Optional[str]): The API endpoint, or None for the provider's default.
+            tools (Optional[list]): Tool schemas or callables to provide to the LLM.
+            stream (bool): Whether the response is streamed.
+            overrides (Dict): Settings overriding the configured defaults.
 
         Returns:
-            Dict: A dictionary containing the raw response from the provider and the
-                  parsed content.
-
-        Raises:
-            requests.RequestException: If the request fails.
+            tuple: The full URL, the payload and the merged settings.
         """
         if endpoint is None:
-            if isinstance(self.provider, GoogleGeminiStrategy):
-                endpoint = f"/models/{self.config.model}:generateContent"
-            elif isinstance(self.provider, AnthropicStrategy):
-                endpoint = "/messages"
-            else:
-                endpoint = "/chat/completions"
-
+            endpoint = self._default_endpoint(stream)
         full_url = f"{self.config.base_url}{endpoint}"
 
-        settings = self._merge_settings(kwargs)
-        
+        settings = self._merge_settings(overrides)
+
         processed_tools = []
         if tools:
             for tool in tools:
@@ -182,40 +639,243 @@ class UniversalLLMClient(LLMInterface):
         payload = self.provider.prepare_payload(
             self.config.model,
             messages,
-            stream=False,
+            stream=stream,
             settings=settings,
             tools=processed_tools if len(processed_tools) > 0 else None
         )
+        return full_url, payload, settings
+
+    def _record_llm_trace(self, edge_trace, messages: OrkesMessagesSchema, tools: Optional[list], parsed_response, settings: Dict, limiter_wait: float = 0.0, cache_hit: bool = False, coalesced: bool = False, hedges: Optional[int] = None, usage: Optional[UsageSchema] = None, latency: float = 0.0, ttft: Optional[float] = None):
+        """Appends an LLM trace to the edge being traced, if any.
+
+        Unless given, `hedges` is taken from the hedged call the request is part
+        of, e.g. one made by a `LoadBalancedLLMClient`.
+        """
+        if edge_trace:
+            if hedges is None:
+                hedge_state = hedge_state_var.get()
+                hedges = hedge_state.hedges if hedge_state is not None else 0
+            traced_tools = None
+            if tools:
+                # Traces keep the schemas of tools given as callables or models.
+                traced_tools = []
+                for tool in tools:
+                    if callable(tool):
+                        tool = callable_to_orkes_tool_schema(tool)
+                    traced_tools.append(tool.model_dump() if isinstance(tool, BaseModel) else tool)
+            llm_trace = LLMTraceSchema(
+                messages=messages,
+                tools=traced_tools,
+                parsed_response=parsed_response,
+                model=self.config.model,
+                settings=settings,
+                limiter_wait=limiter_wait,
+                cache_hit=cache_hit,
+                coalesced=coalesced,
+                hedges=hedges,
+                input_tokens=usage.input_tokens if usage is not None else None,
+                output_tokens=usage.output_tokens if usage is not None else None,
+                total_tokens=usage.total_tokens if usage is not None else None,
+                latency=latency,
+                ttft=ttft
+            )
+            edge_trace.llm_traces.append(llm_trace)
+
+    def _check_budget(self):
+        """Refuses to send a request once the run being executed, if any, is over its token budget.
+
+        Raises:
+            TokenBudgetExceededError: If the run has used more tokens than its budget.
+        """
+        run_usage = usage_var.get()
+        if run_usage is not None:
+            run_usage.check()
+
+    def _record_usage(self, usage: Optional[UsageSchema], latency: float):
+        """Counts a request sent by this client in the usage of the run being executed, if any."""
+        run_usage = usage_var.get()
+        if run_usage is not None:
+            run_usage.add(usage, latency)
+
+    def _request_key(self, full_url: str, payload: Dict) -> Optional[str]:
+        """Returns the key identical requests share, if the cache or coalescing needs one."""
+        if self.config.cache is None and self.flights is None:
+            return None
+        return make_cache_key(full_url, payload)
+
+    def _cached_response(self, edge_trace, cache_key: Optional[str], messages: OrkesMessagesSchema, tools: Optional[list], settings: Dict) -> Optional[Dict]:
+        """Returns the result of a call from the cache, recording its trace, or None on a miss."""
+        if self.config.cache is None:
+            return None
+        data = self.config.cache.get(cache_key)
+        if data is None:
+            return None
+        parsed_response = self.provider.parse_response(data)
+        self._record_llm_trace(edge_trace, messages, tools, parsed_response, settings, cache_hit=True)
+        return {
+            "raw": data,
+            "content": parsed_response.model_dump()
+        }
+
+    def _fetch(self, full_url: str, payload: Dict, settings: Dict) -> tuple:
+        """Sends a non-streamed request.
+
+        Returns:
+            tuple: The raw response, the limiter wait and the number of hedges,
+            which is always 0 for synchronous calls.
+        """
+        with self._guard():
+            retry = RetryState(self.config.retry, self._retry_budget)
+            content = self._post(full_url, payload, {}, retry, self._estimate_tokens(payload, settings))
+            return serialization.loads(content), retry.limiter_wait, 0
+
+    async def _afetch(self, full_url: str, payload: Dict, settings: Dict) -> tuple:
+        """Awaitable counterpart of `_fetch`, reporting the hedges of the call it is part of."""
+        retry = RetryState(self.config.retry, self._retry_budget)
+        response = await self._apost(full_url, payload, {}, retry, self._estimate_tokens(payload, settings))
+        try:
+            async with response:
+                data = serialization.loads(await asyncio.wait_for(response.read(), retry.remaining()))
+        finally:
+            self._release()
+        hedge_state = hedge_state_var.get()
+        return data, retry.limiter_wait, hedge_state.hedges if hedge_state is not None else 0
+
+    async def _afetch_hedged(self, full_url: str, payload: Dict, settings: Dict) -> tuple:
+        """Calls `_afetch`, hedged by the client's hedger, if any."""
+        with self._guard():
+            if self.hedger is None:
+                return await self._afetch(full_url, payload, settings)
+            return await self.hedger.run(lambda _: self._afetch(full_url, payload, settings))
+
+    def _guard(self):
+        """Returns a context manager guarding a call with the circuit breaker, if any."""
+        if self.breaker is None:
+            return contextlib.nullcontext()
+        return self.breaker.guard()
+
+    def send_message(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> Dict:
+        """Sends a synchronous request to the LLM provider.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            endpoint (str, optional): The API endpoint to use. If not provided, it will
+                be inferred from the provider.
+            tools (Optional[List[Dict]], optional): A list of tools to provide to the
+                LLM. Defaults to None.
+            connection (Optional[Any], optional): The connection object from a web server,
+                which can be used to check for client disconnection. Defaults to None.
+            **kwargs: Additional parameters to override the default settings.
+
+        Returns:
+            Dict: A dictionary containing the raw response from the provider and the
+                  parsed content.
+
+        Raises:
+            requests.RequestException: If the request fails.
+        """
+        full_url, payload, settings = self._prepare_request(messages, endpoint, tools, False, kwargs)
 
-        params = {}
         edge_trace = edge_trace_var.get()
 
+        request_key = self._request_key(full_url, payload)
+        cached = self._cached_response(edge_trace, request_key, messages, tools, settings)
+        if cached is not None:
+            return cached
+
+        self._check_budget()
+        start = time.perf_counter()
         try:
-            response = requests.post(full_url, headers=self.session_headers, json=payload, params=params)
-            response.raise_for_status()
-            data = response.json()
+            if self.flights is not None:
+                (data, limiter_wait, hedges), coalesced = self.flights.do(request_key, lambda: self._fetch(full_url, payload, settings))
+            else:
+                (data, limiter_wait, hedges), coalesced = self._fetch(full_url, payload, settings), False
+            latency = time.perf_counter() - start
             parsed_response = self.provider.parse_response(data)
+            usage = self.provider.parse_usage(data)
+            if not coalesced:
+                if self.config.cache is not None:
+                    self.config.cache.set(request_key, data)
+                self._record_usage(usage, latency)
 
-            if edge_trace:
-                llm_trace = LLMTraceSchema(
-                    messages=messages,
-                    tools=tools,
-                    parsed_response=parsed_response,
-                    model=self.config.model,
-                    settings=settings
-                )
-                edge_trace.llm_traces.append(llm_trace)
+            self._record_llm_trace(edge_trace, messages, tools, parsed_response, settings, limiter_wait, coalesced=coalesced, hedges=hedges, usage=usage, latency=latency)
 
             return {
                 "raw": data,
                 "content": parsed_response.model_dump()
             }
+        except CircuitOpenError:
+            if self.config.fallback is None:
+                raise
+            return self.config.fallback.send_message(messages, tools=tools, connection=connection, **kwargs)
         except requests.RequestException as e:
             raise
 
+    async def asend_message(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> Dict:
+        """Sends a request to the LLM provider without blocking the event loop.
+
+        The asynchronous counterpart of `send_message`, sent over the client's
+        pooled `aiohttp` session for the running loop.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            endpoint (str, optional): The API endpoint to use. If not provided, it will
+                be inferred from the provider.
+            tools (Optional[List[Dict]], optional): A list of tools to provide to the
+                LLM. Defaults to None.
+            connection (Optional[Any], optional): The connection object from a web server,
+                which can be used to check for client disconnection. Defaults to None.
+            **kwargs: Additional parameters to override the default settings.
+
+        Returns:
+            Dict: A dictionary containing the raw response from the provider and the
+                  parsed content.
+
+        Raises:
+            aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request times out.
+        """
+        full_url, payload, settings = self._prepare_request(messages, endpoint, tools, False, kwargs)
+
+        edge_trace = edge_trace_var.get()
+
+        request_key = self._request_key(full_url, payload)
+        cached = self._cached_response(edge_trace, request_key, messages, tools, settings)
+        if cached is not None:
+            return cached
+
+        self._check_budget()
+        start = time.perf_counter()
+        try:
+            if self.flights is not None:
+                (data, limiter_wait, hedges), coalesced = await self.flights.ado(request_key, lambda: self._afetch_hedged(full_url, payload, settings))
+            else:
+                (data, limiter_wait, hedges), coalesced = await self._afetch_hedged(full_url, payload, settings), False
+        except CircuitOpenError:
+            if self.config.fallback is None:
+                raise
+            return await self.config.fallback.asend_message(messages, tools=tools, connection=connection, **kwargs)
+        latency = time.perf_counter() - start
+        parsed_response = self.provider.parse_response(data)
+        usage = self.provider.parse_usage(data)
+        if not coalesced:
+            if self.config.cache is not None:
+                self.config.cache.set(request_key, data)
+            self._record_usage(usage, latency)
+
+        self._record_llm_trace(edge_trace, messages, tools, parsed_response, settings, limiter_wait, coalesced=coalesced, hedges=hedges, usage=usage, latency=latency)
+
+        return {
+            "raw": data,
+            "content": parsed_response.model_dump()
+        }
+
     async def stream_message(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> AsyncGenerator[str, None]:
         """Sends an asynchronous request to the LLM provider and streams the response.
 
+        This is the text of `stream_events`; use it to also receive tool calls,
+        token usage, finish reasons and errors.
+
         Args:
             messages (OrkesMessagesSchema): The messages to send to the LLM.
             endpoint (str, optional): The API endpoint to use. If not provided, it will
@@ -231,52 +891,191 @@ class UniversalLLMClient(LLMInterface):
 
         Raises:
             aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request times out.
         """
-        if endpoint is None:
-            if isinstance(self.provider, GoogleGeminiStrategy):
-                endpoint = f"/models/{self.config.model}:streamGenerateContent?alt=sse"
-            elif isinstance(self.provider, AnthropicStrategy):
-                endpoint = "/messages"
-            else:
-                endpoint = "/chat/completions"
+        async with contextlib.aclosing(self._stream(messages, endpoint, tools, connection, kwargs, StreamAccumulator())) as events:
+            async for event in events:
+                if event.type == StreamEvent.TEXT:
+                    yield event.text
 
-        full_url = f"{self.config.base_url}{endpoint}"
+    async def stream_events(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> AsyncGenerator[StreamEvent, None]:
+        """Sends an asynchronous request to the LLM provider and streams its events.
 
-        processed_tools = []
-        if tools:
-            for tool in tools:
-                if callable(tool):
-                    processed_tools.append(callable_to_orkes_tool_schema(tool))
-                else:
-                    processed_tools.append(tool)
+        The response body is decoded as it arrives by an `SSEDecoder`, and each
+        server-sent event is turned into stream events by the provider strategy's
+        `parse_stream_event`. Once the stream ends, the response it assembles is
+        recorded as an LLM trace, as for `send_message`.
 
-        payload = self.provider.prepare_payload(
-            self.config.model,
-            messages,
-            stream=True,
-            settings=self._merge_settings(kwargs),
-            tools=processed_tools if len(processed_tools) > 0 else None
-        )
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            endpoint (str, optional): The API endpoint to use. If not provided, it will
+                be inferred from the provider.
+            tools (Optional[List[Dict]], optional): A list of tools to provide to the
+                LLM. Defaults to None.
+            connection (Optional[Any], optional): The connection object from a web server,
+                which can be used to check for client disconnection. Defaults to None.
+            **kwargs: Additional parameters to override the default settings.
+
+        Yields:
+            StreamEvent: A text delta, tool call fragment, usage report, finish
+            reason or error sent by the provider.
+
+        Raises:
+            aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request times out.
+        """
+        async with contextlib.aclosing(self._stream(messages, endpoint, tools, connection, kwargs, StreamAccumulator())) as events:
+            async for event in events:
+                yield event
+
+    async def stream_response(self, messages: OrkesMessagesSchema, endpoint: str = None, tools: Optional[list[OrkesToolSchema | Callable]] = None, connection: Optional[Any] = None, **kwargs) -> AsyncGenerator[Union[StreamEvent, RequestSchema], None]:
+        """Streams the events of a response, then the response they assemble.
+
+        Use it to stream a response to users while still getting its tool calls,
+        without a second, non-streamed request.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to send to the LLM.
+            endpoint (str, optional): The API endpoint to use. If not provided, it will
+                be inferred from the provider.
+            tools (Optional[List[Dict]], optional): A list of tools to provide to the
+                LLM. Defaults to None.
+            connection (Optional[Any], optional): The connection object from a web server,
+                which can be used to check for client disconnection. Defaults to None.
+            **kwargs: Additional parameters to override the default settings.
+
+        Yields:
+            Union[StreamEvent, RequestSchema]: Each event of `stream_events`, then
+            the `RequestSchema` of the whole response, with the argument fragments
+            of each tool call stitched together.
+
+        Raises:
+            aiohttp.ClientError: If the request fails.
+            asyncio.TimeoutError: If the request times out.
+            ValueError: If the arguments of a tool call are not valid JSON.
+        """
+        accumulator = StreamAccumulator()
+        async with contextlib.aclosing(self._stream(messages, endpoint, tools, connection, kwargs, accumulator)) as events:
+            async for event in events:
+                yield event
+        yield accumulator.result()
+
+    async def _stream(self, messages: OrkesMessagesSchema, endpoint: Optional[str], tools: Optional[list], connection: Optional[Any], kwargs: Dict, accumulator: StreamAccumulator) -> AsyncGenerator[StreamEvent, None]:
+        """Streams the events of a response, adding each of them to `accumulator`.
+
+        Once the stream ends, the response assembled by `accumulator` is recorded
+        as an LLM trace of the edge being traced, if any.
+        """
+        full_url, payload, settings = self._prepare_request(messages, endpoint, tools, True, kwargs)
+
+        edge_trace = edge_trace_var.get()
 
         params = {}
 
+        self._check_budget()
+        start = time.perf_counter()
+        ttft = None
+        retry = RetryState(self.config.retry, self._retry_budget)
+        tokens = self._estimate_tokens(payload, settings)
+        # Only sending the request is retried, by `_apost`: once the server has
+        # answered, a retry could have it generate, and bill, the response twice.
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(full_url, headers=self.session_headers, json=payload, params=params) as response:
-                    response.raise_for_status()
-                    async for line in response.content:
-                        if connection and hasattr(connection, 'is_disconnected'):
-                            if await connection.is_disconnected():
-                                break
-
-                        decoded_line = line.decode('utf-8').strip()
-                        if not decoded_line:
-                            continue
-                        text_chunk = self.provider.parse_stream_chunk(decoded_line)
-                        if text_chunk:
-                            yield text_chunk
-        except (aiohttp.ClientError, asyncio.CancelledError) as e:
-            raise
+            with self._guard():
+                response, events, head, hedges = await self._aopen_stream(full_url, payload, params, retry, tokens)
+        except CircuitOpenError:
+            if self.config.fallback is None:
+                raise
+            # The fallback records its own trace.
+            async for event in self._fallback_events(messages, tools, connection, kwargs):
+                accumulator.add(event)
+                yield event
+            return
+        try:
+            async with response:
+                for event in head:
+                    if ttft is None and event.type in (StreamEvent.TEXT, StreamEvent.TOOL_CALL):
+                        ttft = time.perf_counter() - start
+                    accumulator.add(event)
+                    yield event
+                async for event in events:
+                    if connection and hasattr(connection, 'is_disconnected'):
+                        if await connection.is_disconnected():
+                            break
+
+                    if ttft is None and event.type in (StreamEvent.TEXT, StreamEvent.TOOL_CALL):
+                        ttft = time.perf_counter() - start
+                    accumulator.add(event)
+                    yield event
+        finally:
+            await events.aclose()
+            # The slot is held for as long as the stream is open.
+            self._release()
+        latency = time.perf_counter() - start
+        usage = self.provider.parse_stream_usage(accumulator.usage)
+        self._record_usage(usage, latency)
+        if edge_trace:
+            # The caller may only want text, so malformed tool call arguments
+            # are traced as they came rather than raised here.
+            self._record_llm_trace(edge_trace, messages, tools, accumulator.result(strict=False), settings, retry.limiter_wait, hedges=hedges, usage=usage, latency=latency, ttft=ttft)
+
+    async def _fallback_events(self, messages: OrkesMessagesSchema, tools: Optional[list], connection: Optional[Any], kwargs: Dict) -> AsyncGenerator[StreamEvent, None]:
+        """Streams the events of `config.fallback`, as text events if it only streams text."""
+        fallback = self.config.fallback
+        if hasattr(fallback, "stream_events"):
+            async for event in fallback.stream_events(messages, tools=tools, connection=connection, **kwargs):
+                yield event
+            return
+        async for chunk in fallback.stream_message(messages, tools=tools, connection=connection, **kwargs):
+            yield StreamEvent(StreamEvent.TEXT, text=chunk)
+
+    async def _read_events(self, response: aiohttp.ClientResponse) -> AsyncGenerator[StreamEvent, None]:
+        """Decodes the stream events of a response as its bytes arrive."""
+        decoder = SSEDecoder()
+        parse = self.provider.parse_stream_event
+        async for data in response.content.iter_any():
+            for sse in decoder.feed(data):
+                for event in parse(sse):
+                    yield event
+        for sse in decoder.flush():
+            for event in parse(sse):
+                yield event
+
+    async def _aopen_stream(self, full_url: str, payload: Dict, params: Dict, retry: RetryState, tokens: int) -> tuple:
+        """Sends a streamed request and reads it up to its first text or tool call.
+
+        The request is hedged by the client's hedger, if any, until a response
+        starts streaming content.
+
+        Returns:
+            tuple: The response, the generator of its remaining events, the
+            events read so far and the number of hedges sent. The caller must
+            close the generator and the response and release the limiter slot.
+        """
+        async def attempt(_):
+            response = await self._apost(full_url, payload, params, retry, tokens)
+            events = self._read_events(response)
+            head = []
+            try:
+                async for event in events:
+                    head.append(event)
+                    if event.type in (StreamEvent.TEXT, StreamEvent.TOOL_CALL):
+                        break
+                hedge_state = hedge_state_var.get()
+                return response, events, head, hedge_state.hedges if hedge_state is not None else 0
+            except BaseException:
+                await events.aclose()
+                response.close()
+                self._release()
+                raise
+
+        async def discard(opened):
+            await opened[1].aclose()
+            opened[0].close()
+            self._release()
+
+        if self.hedger is None:
+            return await attempt(0)
+        return await self.hedger.run(attempt, discard)
 
     def health_check(self, endpoint: str = "/health") -> bool:
         """Performs a health check on the LLM provider.
@@ -289,7 +1088,7 @@ class UniversalLLMClient(LLMInterface):
         """
         try:
             full_url = f"{self.config.base_url}{endpoint}"
-            response = requests.get(full_url, headers=self.session_headers)
+            response = self._get_session().get(full_url, headers=self.session_headers, timeout=self._timeout())
             return response.status_code == 200
         except:
             return False
@@ -322,6 +1121,24 @@ class LLMFactory:
         )
         return UniversalLLMClient(config, OpenAIStyleStrategy())
 
+    @staticmethod
+    def create_vllm_fleet(urls: List[str], model: str, api_key: str = "EMPTY", **balancer_options) -> "LoadBalancedLLMClient":
+        """Creates a client that balances requests over several vLLM replicas.
+
+        Args:
+            urls (List[str]): The base URLs of the replicas.
+            model (str): The name of the model they serve.
+            api_key (str, optional): The API key to use. Defaults to "EMPTY".
+            **balancer_options: Options passed to `LoadBalancedLLMClient`.
+
+        Returns:
+            LoadBalancedLLMClient: A client spreading requests over the replicas.
+        """
+        # Imported here: the balancer module builds on this one.
+        from orkes.services.balancer import LoadBalancedLLMClient
+        clients = [LLMFactory.create_vllm(url, model, api_key) for url in urls]
+        return LoadBalancedLLMClient(clients, **balancer_options)
+
     @staticmethod
     def create_openai(api_key: str, model: str = "gpt-4", base_url: str = "https://api.openai.com/v1") -> UniversalLLMClient:
         """Creates a client for the OpenAI API.
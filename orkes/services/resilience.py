@@ -0,0 +1,891 @@
+import asyncio
+import contextlib
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from orkes.shared.context import hedge_state_var
+
+
+class RetryPolicy:
+    """Retry, backoff and timeout settings for LLM requests.
+
+    Requests failing with a retryable status (429 and 5xx by default) or
+    failing to connect are retried with full-jitter exponential backoff: the
+    n-th retry waits a random time between 0 and
+    ``min(backoff_max, backoff_base * 2 ** n)`` seconds. A ``Retry-After``
+    header sent by the server takes precedence over the computed delay. Reads
+    that time out are not retried, as the server may still be generating the
+    response, and would be billed for it twice.
+
+    Attributes:
+        max_retries (int): The most retries of a single call. 0 disables retries.
+        backoff_base (float): The backoff ceiling of the first retry, in seconds.
+        backoff_max (float): The largest backoff ceiling, in seconds.
+        retry_statuses (frozenset[int]): The HTTP statuses that are retried.
+        total_timeout (Optional[float]): The longest time, in seconds, a call may
+            take across all of its attempts, backoffs and rate limiter waits. For
+            streams it bounds the time until the response starts. None leaves
+            calls unbounded.
+        max_retry_after (float): The longest ``Retry-After`` delay, in seconds,
+            that is waited for; longer delays fail the call instead.
+        budget_ratio (float): The retry tokens each call earns for its client.
+        budget_max (float): The most retry tokens a client can save up.
+    """
+    def __init__(
+        self,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        retry_statuses: Iterable[int] = (429, 500, 502, 503, 504),
+        total_timeout: Optional[float] = None,
+        max_retry_after: float = 60.0,
+        budget_ratio: float = 0.1,
+        budget_max: float = 10.0
+    ):
+        """Initializes the RetryPolicy object.
+
+        Args:
+            max_retries (int, optional): The most retries of a single call.
+                Defaults to 2.
+            backoff_base (float, optional): The backoff ceiling of the first retry,
+                in seconds. Defaults to 0.5.
+            backoff_max (float, optional): The largest backoff ceiling, in seconds.
+                Defaults to 8.0.
+            retry_statuses (Iterable[int], optional): The HTTP statuses to retry.
+                Defaults to 429, 500, 502, 503 and 504.
+            total_timeout (Optional[float], optional): The time limit of a call,
+                retries included, in seconds. Defaults to None.
+            max_retry_after (float, optional): The longest ``Retry-After`` honored,
+                in seconds. Defaults to 60.0.
+            budget_ratio (float, optional): The retry tokens earned per call.
+                Defaults to 0.1, i.e. one retry per ten calls once the saved
+                tokens are spent.
+            budget_max (float, optional): The most retry tokens saved up.
+                Defaults to 10.0.
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.total_timeout = total_timeout
+        self.max_retry_after = max_retry_after
+        self.budget_ratio = budget_ratio
+        self.budget_max = budget_max
+
+    def backoff(self, attempt: int) -> float:
+        """Returns a jittered delay before the given retry.
+
+        Args:
+            attempt (int): The number of retries already made.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+
+class RetryBudget:
+    """Caps retries at a fraction of a client's calls.
+
+    Every call earns `ratio` tokens, up to `max_tokens`, and every retry spends
+    one. When an upstream is down for good, clients stop multiplying its load
+    by their retry count once the saved tokens run out.
+
+    Attributes:
+        ratio (float): The tokens earned per call.
+        max_tokens (float): The most tokens that can be saved up.
+        tokens (float): The tokens currently available.
+    """
+    def __init__(self, ratio: float = 0.1, max_tokens: float = 10.0):
+        """Initializes a full RetryBudget.
+
+        Args:
+            ratio (float, optional): The tokens earned per call. Defaults to 0.1.
+            max_tokens (float, optional): The most tokens saved up. Defaults to 10.0.
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """Credits the budget for a new call."""
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        """Takes one token for a retry.
+
+        Returns:
+            bool: True if the retry is allowed.
+        """
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryState:
+    """Tracks the attempts of a single call under a `RetryPolicy`.
+
+    Attributes:
+        policy (RetryPolicy): The policy of the call.
+        budget (RetryBudget): The retry budget of the client making the call.
+        deadline (Optional[float]): The `time.monotonic` time the call must end by.
+        attempt (int): The number of retries made so far.
+        limiter_wait (float): The seconds the call's attempts spent waiting on
+            the client's `RateLimiter`.
+    """
+    def __init__(self, policy: RetryPolicy, budget: RetryBudget):
+        """Starts tracking a call and credits the client's budget for it.
+
+        Args:
+            policy (RetryPolicy): The policy of the call.
+            budget (RetryBudget): The retry budget of the client.
+        """
+        self.policy = policy
+        self.budget = budget
+        self.deadline = time.monotonic() + policy.total_timeout if policy.total_timeout is not None else None
+        self.attempt = 0
+        self.limiter_wait = 0.0
+        budget.deposit()
+
+    def remaining(self) -> Optional[float]:
+        """Returns the seconds left before the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cap(self, timeout: Optional[float]) -> Optional[float]:
+        """Caps a per-attempt timeout by the time left before the deadline.
+
+        Args:
+            timeout (Optional[float]): The configured timeout, None for unbounded.
+
+        Returns:
+            Optional[float]: The timeout to use for the next attempt.
+        """
+        remaining = self.remaining()
+        if remaining is None:
+            return timeout
+        if timeout is None:
+            return remaining
+        return min(timeout, remaining)
+
+    def is_retryable_status(self, status: int) -> bool:
+        """Tells whether a response status is retried by the policy."""
+        return status in self.policy.retry_statuses
+
+    def next_delay(self, retry_after: Optional[str] = None) -> Optional[float]:
+        """Decides whether to retry and how long to wait first.
+
+        Args:
+            retry_after (Optional[str], optional): The ``Retry-After`` header of
+                the failed response, if any.
+
+        Returns:
+            Optional[float]: The delay in seconds before the next attempt, or None
+            if the call must fail: retries or budget exhausted, a ``Retry-After``
+            too long to honor, or no time left before the deadline.
+        """
+        if self.attempt >= self.policy.max_retries:
+            return None
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = self.policy.backoff(self.attempt)
+        elif delay > self.policy.max_retry_after:
+            return None
+        remaining = self.remaining()
+        if remaining is not None and delay >= remaining:
+            return None
+        if not self.budget.try_spend():
+            return None
+        self.attempt += 1
+        return delay
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a ``Retry-After`` header.
+
+    Args:
+        value (Optional[str]): The header value, in seconds or as an HTTP date.
+
+    Returns:
+        Optional[float]: The delay in seconds, or None if the header is missing
+        or malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RateLimitConfig:
+    """Client-side limits on the requests sent to an LLM endpoint.
+
+    Attributes:
+        max_concurrency (Optional[int]): The most requests in flight at once.
+        requests_per_second (Optional[float]): The sustained request rate, with
+            bursts of up to one second's worth of requests.
+        tokens_per_minute (Optional[float]): The sustained token rate, with bursts
+            of up to one minute's worth of tokens. A request is charged an
+            estimate of its prompt tokens plus its ``max_tokens`` setting.
+        shared (bool): Whether every client of the same base URL and model in the
+            process shares one limiter, instead of each client having its own.
+    """
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        requests_per_second: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        shared: bool = False
+    ):
+        """Initializes the RateLimitConfig object.
+
+        Args:
+            max_concurrency (Optional[int], optional): The most requests in flight.
+                Defaults to None, for no limit.
+            requests_per_second (Optional[float], optional): The request rate.
+                Defaults to None, for no limit.
+            tokens_per_minute (Optional[float], optional): The token rate.
+                Defaults to None, for no limit.
+            shared (bool, optional): Whether the limiter is shared process-wide per
+                base URL and model. Defaults to False.
+        """
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.shared = shared
+
+
+class _TokenBucket:
+    """A token bucket that hands out reservations in arrival order.
+
+    Tokens may go negative: a request that finds too few tokens takes them
+    anyway and waits until the bucket has refilled to zero, so later requests
+    queue up behind it instead of overtaking it.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, cost: float) -> float:
+        """Takes `cost` tokens and returns how long to wait before using them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= cost
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def refund(self, cost: float):
+        """Gives back `cost` tokens taken by a reservation that was not used."""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + cost)
+
+
+class RateLimiter:
+    """Limits concurrent requests, requests per second and tokens per minute.
+
+    One limiter can be used from threads and event loops at the same time: the
+    sync `acquire` and async `aacquire` draw from the same slots and buckets, and
+    waiters of both kinds are served in arrival order. Every successful acquire
+    must be paired with a `release`.
+
+    Attributes:
+        max_concurrency (Optional[int]): The most requests in flight at once.
+        requests_per_second (Optional[float]): The sustained request rate.
+        tokens_per_minute (Optional[float]): The sustained token rate.
+        in_flight (int): The number of slots currently held.
+    """
+    def __init__(self, max_concurrency: Optional[int] = None, requests_per_second: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """Initializes the RateLimiter.
+
+        Args:
+            max_concurrency (Optional[int], optional): The most requests in flight.
+                Defaults to None, for no limit.
+            requests_per_second (Optional[float], optional): The request rate.
+                Defaults to None, for no limit.
+            tokens_per_minute (Optional[float], optional): The token rate.
+                Defaults to None, for no limit.
+
+        Raises:
+            ValueError: If a limit is not positive.
+        """
+        for name, limit in (("max_concurrency", max_concurrency), ("requests_per_second", requests_per_second), ("tokens_per_minute", tokens_per_minute)):
+            if limit is not None and limit <= 0:
+                raise ValueError(f"{name} must be positive, got {limit}.")
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.tokens_per_minute = tokens_per_minute
+        self.in_flight = 0
+        self._waiters: Deque[Union[threading.Event, Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = deque()
+        self._lock = threading.Lock()
+        self._requests = _TokenBucket(requests_per_second, max(requests_per_second, 1.0)) if requests_per_second else None
+        self._tokens = _TokenBucket(tokens_per_minute / 60.0, tokens_per_minute) if tokens_per_minute else None
+
+    def acquire(self, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """Waits for a slot and for the rate limits to allow a request.
+
+        Args:
+            tokens (int, optional): The tokens the request is expected to use.
+                Defaults to 0.
+            timeout (Optional[float], optional): The longest time to wait, in
+                seconds. Defaults to None, for no limit.
+
+        Returns:
+            float: The seconds spent waiting.
+
+        Raises:
+            TimeoutError: If the request cannot be allowed within `timeout`. No
+                slot is held then.
+        """
+        start = time.monotonic()
+        if self.max_concurrency is not None:
+            with self._lock:
+                event = None
+                if self.in_flight < self.max_concurrency and not self._waiters:
+                    self.in_flight += 1
+                else:
+                    event = threading.Event()
+                    self._waiters.append(event)
+            # A released slot is handed straight to the waiter.
+            if event is not None and not event.wait(timeout):
+                with self._lock:
+                    if event in self._waiters:
+                        self._waiters.remove(event)
+                        raise TimeoutError("Timed out waiting for a rate limiter slot.")
+                # The slot was handed over as the wait timed out; take it.
+        delay = self._reserve(tokens)
+        if delay > 0:
+            if timeout is not None and start + timeout - time.monotonic() < delay:
+                self._refund(tokens)
+                self.release()
+                raise TimeoutError("Timed out waiting for the rate limits.")
+            time.sleep(delay)
+        return time.monotonic() - start
+
+    async def aacquire(self, tokens: int = 0, timeout: Optional[float] = None) -> float:
+        """Awaitable counterpart of `acquire`.
+
+        Args:
+            tokens (int, optional): The tokens the request is expected to use.
+                Defaults to 0.
+            timeout (Optional[float], optional): The longest time to wait, in
+                seconds. Defaults to None, for no limit.
+
+        Returns:
+            float: The seconds spent waiting.
+
+        Raises:
+            asyncio.TimeoutError: If the request cannot be allowed within
+                `timeout`. No slot is held then.
+        """
+        start = time.monotonic()
+        if self.max_concurrency is not None:
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                waiter = None
+                if self.in_flight < self.max_concurrency and not self._waiters:
+                    self.in_flight += 1
+                else:
+                    waiter = (loop, loop.create_future())
+                    self._waiters.append(waiter)
+            if waiter is not None:
+                try:
+                    # wait_for cancels the future on timeout, which _cancel_waiter
+                    # handles as it does a cancellation.
+                    await asyncio.wait_for(waiter[1], timeout)
+                except (asyncio.CancelledError, asyncio.TimeoutError):
+                    self._cancel_waiter(waiter)
+                    raise
+        delay = self._reserve(tokens)
+        if delay > 0:
+            if timeout is not None and start + timeout - time.monotonic() < delay:
+                self._refund(tokens)
+                self.release()
+                raise asyncio.TimeoutError("Timed out waiting for the rate limits.")
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.release()
+                raise
+        return time.monotonic() - start
+
+    def release(self):
+        """Frees a slot, handing it to the longest-waiting caller, if any."""
+        if self.max_concurrency is None:
+            return
+        with self._lock:
+            if not self._waiters:
+                self.in_flight -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            loop, future = waiter
+            try:
+                loop.call_soon_threadsafe(self._grant, future)
+            except RuntimeError:
+                # The waiter's loop is closed; pass the slot on.
+                self.release()
+
+    def _grant(self, future: asyncio.Future):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    def _cancel_waiter(self, waiter: Tuple[asyncio.AbstractEventLoop, asyncio.Future]):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+                return
+        # The slot was handed over already. A cancelled future is passed on by
+        # _grant; a granted one is ours to give back.
+        if not waiter[1].cancelled():
+            self.release()
+
+    def _reserve(self, tokens: int) -> float:
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.reserve(1)
+        if self._tokens is not None and tokens:
+            delay = max(delay, self._tokens.reserve(tokens))
+        return delay
+
+    def _refund(self, tokens: int):
+        if self._requests is not None:
+            self._requests.refund(1)
+        if self._tokens is not None and tokens:
+            self._tokens.refund(tokens)
+
+
+_shared_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_shared_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: RateLimitConfig, base_url: str, model: str) -> RateLimiter:
+    """Returns the limiter for a client.
+
+    Args:
+        config (RateLimitConfig): The limits of the client.
+        base_url (str): The base URL the client sends requests to.
+        model (str): The model the client uses.
+
+    Returns:
+        RateLimiter: A new limiter, or with ``config.shared`` the limiter shared by
+        every client of `base_url` and `model`. The first client to ask for a
+        shared limiter sets its limits.
+    """
+    if not config.shared:
+        return RateLimiter(config.max_concurrency, config.requests_per_second, config.tokens_per_minute)
+    with _shared_limiters_lock:
+        key = (base_url, model)
+        if key not in _shared_limiters:
+            _shared_limiters[key] = RateLimiter(config.max_concurrency, config.requests_per_second, config.tokens_per_minute)
+        return _shared_limiters[key]
+
+
+class HedgePolicy:
+    """Settings for hedging slow LLM requests.
+
+    A call that has no response after the hedge delay sends a duplicate request;
+    whichever request answers first wins and the other is cancelled. The delay is
+    the `percentile` of the client's recent response times, so only the slowest
+    calls are hedged.
+
+    Attributes:
+        percentile (float): The response time percentile used as the hedge delay.
+        min_delay (float): The shortest hedge delay, in seconds.
+        max_delay (Optional[float]): The longest hedge delay, in seconds, or None.
+        initial_delay (float): The hedge delay until `min_samples` responses have
+            been timed.
+        min_samples (int): The responses timed before the percentile is used.
+        window (int): The number of recent response times kept.
+        max_hedges (int): The most duplicates sent for a single call.
+        budget_ratio (float): The hedges each call earns for its client.
+        budget_max (float): The most hedges a client can save up.
+    """
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 0.05,
+        max_delay: Optional[float] = None,
+        initial_delay: float = 1.0,
+        min_samples: int = 20,
+        window: int = 200,
+        max_hedges: int = 1,
+        budget_ratio: float = 0.05,
+        budget_max: float = 5.0
+    ):
+        """Initializes the HedgePolicy object.
+
+        Args:
+            percentile (float, optional): The response time percentile used as the
+                hedge delay. Defaults to 95.0.
+            min_delay (float, optional): The shortest hedge delay, in seconds.
+                Defaults to 0.05.
+            max_delay (Optional[float], optional): The longest hedge delay, in
+                seconds. Defaults to None.
+            initial_delay (float, optional): The hedge delay before enough responses
+                have been timed, in seconds. Defaults to 1.0.
+            min_samples (int, optional): The responses timed before the percentile
+                is used. Defaults to 20.
+            window (int, optional): The number of recent response times kept.
+                Defaults to 200.
+            max_hedges (int, optional): The most duplicates per call. Defaults to 1.
+            budget_ratio (float, optional): The hedges earned per call. Defaults to
+                0.05, i.e. at most about one extra request per twenty calls.
+            budget_max (float, optional): The most hedges saved up. Defaults to 5.0.
+
+        Raises:
+            ValueError: If `percentile` is not between 0 and 100.
+        """
+        if not 0 < percentile <= 100:
+            raise ValueError(f"percentile must be in (0, 100], got {percentile}.")
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.initial_delay = initial_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.max_hedges = max_hedges
+        self.budget_ratio = budget_ratio
+        self.budget_max = budget_max
+
+
+class HedgeState:
+    """The state of one hedged call, shared with its requests.
+
+    Attributes:
+        hedges (int): The duplicate requests sent so far.
+    """
+    def __init__(self):
+        """Initializes the HedgeState."""
+        self.hedges = 0
+
+
+class Hedger:
+    """Runs calls under a `HedgePolicy`, timing their responses.
+
+    While a call runs, `hedge_state_var` holds its `HedgeState`, so each of its
+    requests can report how many hedges had been sent.
+
+    Attributes:
+        policy (HedgePolicy): The hedging policy.
+        budget (RetryBudget): The budget hedges are taken from.
+        hedged (int): The duplicate requests sent so far.
+        wins (int): The calls answered by a duplicate request.
+    """
+    def __init__(self, policy: HedgePolicy):
+        """Initializes the Hedger.
+
+        Args:
+            policy (HedgePolicy): The hedging policy.
+        """
+        self.policy = policy
+        self.budget = RetryBudget(policy.budget_ratio, policy.budget_max)
+        self.hedged = 0
+        self.wins = 0
+        self._latencies: Deque[float] = deque(maxlen=policy.window)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Returns how long a call waits for a response before it is hedged."""
+        policy = self.policy
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < policy.min_samples:
+            delay = policy.initial_delay
+        else:
+            index = min(len(samples) - 1, int(len(samples) * policy.percentile / 100))
+            delay = samples[index]
+        delay = max(delay, policy.min_delay)
+        if policy.max_delay is not None:
+            delay = min(delay, policy.max_delay)
+        return delay
+
+    def observe(self, latency: float):
+        """Records the response time of a call.
+
+        Args:
+            latency (float): The response time, in seconds.
+        """
+        with self._lock:
+            self._latencies.append(latency)
+
+    async def run(self, attempt: Callable[[int], Awaitable[Any]], discard: Optional[Callable[[Any], Awaitable[None]]] = None) -> Any:
+        """Runs a call, hedging it if it is slow.
+
+        The n-th hedge is sent n hedge delays after the call started, as long as
+        the client's hedge budget allows. Requests that lose the race are
+        cancelled.
+
+        Args:
+            attempt (Callable[[int], Awaitable[Any]]): Sends a request, given the
+                number of hedges sent before it; 0 is the original request.
+            discard (Optional[Callable[[Any], Awaitable[None]]], optional): Releases
+                the result of a request that completed but lost the race.
+
+        Returns:
+            Any: The result of the first request to succeed.
+
+        Raises:
+            Exception: The error of the last request, if every request failed.
+        """
+        self.budget.deposit()
+        state = HedgeState()
+        token = hedge_state_var.set(state)
+        start = time.monotonic()
+        original = asyncio.ensure_future(attempt(0))
+        tasks: List[asyncio.Future] = [original]
+        hedging = True
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                timeout = None
+                if hedging and state.hedges < self.policy.max_hedges:
+                    timeout = max(self.delay() * (state.hedges + 1) - (time.monotonic() - start), 0.0)
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.budget.try_spend():
+                        state.hedges += 1
+                        with self._lock:
+                            self.hedged += 1
+                        tasks.append(asyncio.ensure_future(attempt(state.hedges)))
+                    else:
+                        hedging = False
+                    continue
+                winner = None
+                for task in [t for t in tasks if t in done]:
+                    tasks.remove(task)
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+                    elif discard is not None:
+                        await discard(task.result())
+                if winner is not None:
+                    self.observe(time.monotonic() - start)
+                    if winner is not original:
+                        with self._lock:
+                            self.wins += 1
+                    return winner.result()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                results = await asyncio.gather(*tasks, return_exceptions=True)
+                if discard is not None:
+                    for result in results:
+                        if not isinstance(result, BaseException):
+                            await discard(result)
+            hedge_state_var.reset(token)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the circuit breaker of its endpoint is open.
+
+    Attributes:
+        name (str): The name of the circuit breaker, usually the endpoint's base URL.
+        retry_after (float): The seconds until the breaker lets a trial call through.
+    """
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit '{name}' is open; retry in {retry_after:.1f}s.")
+
+
+class CircuitBreakerPolicy:
+    """Settings of a circuit breaker.
+
+    Attributes:
+        failure_rate (float): The share of failed calls, between 0 and 1, that
+            opens the circuit.
+        window (int): The number of recent calls the failure rate is computed over.
+        min_calls (int): The calls needed in the window before the circuit can open.
+        cool_down (float): How long, in seconds, the circuit stays open before it
+            lets trial calls through.
+        half_open_calls (int): The trial calls let through at once while half open.
+    """
+    def __init__(self, failure_rate: float = 0.5, window: int = 20, min_calls: int = 10, cool_down: float = 30.0, half_open_calls: int = 1):
+        """Initializes the CircuitBreakerPolicy object.
+
+        Args:
+            failure_rate (float, optional): The failure rate that opens the circuit.
+                Defaults to 0.5.
+            window (int, optional): The number of recent calls considered.
+                Defaults to 20.
+            min_calls (int, optional): The calls needed before the circuit can open.
+                Defaults to 10.
+            cool_down (float, optional): The seconds the circuit stays open.
+                Defaults to 30.0.
+            half_open_calls (int, optional): The concurrent trial calls while half
+                open. Defaults to 1.
+
+        Raises:
+            ValueError: If `failure_rate` is not between 0 and 1.
+        """
+        if not 0 < failure_rate <= 1:
+            raise ValueError(f"failure_rate must be in (0, 1], got {failure_rate}.")
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.cool_down = cool_down
+        self.half_open_calls = half_open_calls
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing.
+
+    The breaker starts ``"closed"``, letting every call through and recording
+    whether it failed. Once the failure rate of the last `policy.window` calls
+    reaches `policy.failure_rate`, it turns ``"open"`` and refuses calls with
+    `CircuitOpenError` for `policy.cool_down` seconds. It then turns
+    ``"half_open"`` and lets a few trial calls through: a success closes it, a
+    failure opens it again.
+
+    Attributes:
+        policy (CircuitBreakerPolicy): The settings of the breaker.
+        name (str): The name reported in errors and events.
+        state (str): "closed", "open" or "half_open".
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, policy: CircuitBreakerPolicy, name: str = "", is_failure: Optional[Callable[[BaseException], bool]] = None):
+        """Initializes a closed CircuitBreaker.
+
+        Args:
+            policy (CircuitBreakerPolicy): The settings of the breaker.
+            name (str, optional): The name reported in errors and events.
+                Defaults to "".
+            is_failure (Optional[Callable[[BaseException], bool]], optional): Tells
+                whether an error raised by a call counts as a failure. Errors that
+                do not count are not recorded at all. Defaults to counting every
+                `Exception`.
+        """
+        self.policy = policy
+        self.name = name
+        self.state = self.CLOSED
+        self._is_failure = is_failure or (lambda error: isinstance(error, Exception))
+        self._outcomes: Deque[bool] = deque(maxlen=policy.window)
+        self._opened_at = 0.0
+        self._trials = 0
+        # Counts the times the circuit opened, so calls admitted before the latest
+        # opening cannot act on the trials that follow it.
+        self._generation = 0
+        self._listeners: List[Callable[["CircuitBreaker", str, str], None]] = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[["CircuitBreaker", str, str], None]):
+        """Registers a function called with the breaker, the old and the new state on every state change.
+
+        Args:
+            listener (Callable[[CircuitBreaker, str, str], None]): The function to call.
+        """
+        self._listeners.append(listener)
+
+    @contextlib.contextmanager
+    def guard(self) -> Iterator[None]:
+        """Wraps a call, refusing it while the circuit is open and recording its outcome.
+
+        Raises:
+            CircuitOpenError: If the circuit is open.
+        """
+        admitted = self._before_call()
+        try:
+            yield
+        except BaseException as e:
+            self._after_call(admitted, False if self._is_failure(e) else None)
+            raise
+        self._after_call(admitted, True)
+
+    def _before_call(self) -> Tuple[int, bool]:
+        """Admits a call or refuses it.
+
+        Returns:
+            Tuple[int, bool]: The generation the call was admitted in and whether
+            it is a half-open trial, to be passed to `_after_call`.
+        """
+        with self._lock:
+            changed = None
+            if self.state == self.OPEN:
+                remaining = self._opened_at + self.policy.cool_down - time.monotonic()
+                if remaining > 0:
+                    raise CircuitOpenError(self.name, remaining)
+                changed = self._set_state(self.HALF_OPEN)
+            if self.state == self.HALF_OPEN:
+                if self._trials >= self.policy.half_open_calls:
+                    raise CircuitOpenError(self.name, 0.0)
+                self._trials += 1
+                admitted = (self._generation, True)
+            else:
+                admitted = (self._generation, False)
+        self._notify(changed)
+        return admitted
+
+    def _after_call(self, admitted: Tuple[int, bool], success: Optional[bool]):
+        """Records a call's outcome; None for a call that neither failed nor succeeded.
+
+        Only trial calls decide whether a half-open circuit closes, and calls
+        admitted before the circuit last opened are not recorded at all.
+        """
+        generation, trial = admitted
+        with self._lock:
+            changed = None
+            if generation != self._generation:
+                pass
+            elif trial and self.state == self.HALF_OPEN:
+                self._trials -= 1
+                if success:
+                    self._outcomes.clear()
+                    self._trials = 0
+                    changed = self._set_state(self.CLOSED)
+                elif success is False:
+                    changed = self._open()
+            elif self.state == self.CLOSED and success is not None:
+                self._outcomes.append(success)
+                failures = self._outcomes.count(False)
+                if len(self._outcomes) >= self.policy.min_calls and failures >= self.policy.failure_rate * len(self._outcomes):
+                    changed = self._open()
+        self._notify(changed)
+
+    def _open(self) -> Optional[Tuple[str, str]]:
+        self._opened_at = time.monotonic()
+        self._trials = 0
+        self._generation += 1
+        return self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> Optional[Tuple[str, str]]:
+        old, self.state = self.state, state
+        return (old, state) if old != state else None
+
+    def _notify(self, changed: Optional[Tuple[str, str]]):
+        # Listeners run outside the lock, so they may use the breaker.
+        if changed is not None:
+            for listener in self._listeners:
+                listener(self, *changed)
@@ -1,8 +1,10 @@
 from typing import Optional, Dict, AsyncGenerator, Any, List, Union
 from abc import ABC, abstractmethod
+import asyncio
 from requests import Response
 from pydantic import BaseModel
-from orkes.shared.schema import OrkesMessagesSchema, OrkesToolSchema, RequestSchema
+from orkes.shared.schema import OrkesMessageSchema, OrkesMessagesSchema, OrkesConversation, OrkesToolSchema, RequestSchema, UsageSchema
+from orkes.services.streaming import ServerSentEvent, StreamEvent
 
 
 class LLMProviderStrategy(ABC):
@@ -13,6 +15,9 @@ class LLMProviderStrategy(ABC):
     (e.g., OpenAI, Anthropic) should have its own implementation of this class.
     """
 
+    #: The most tool sets whose payload `tools_payload` keeps.
+    TOOLS_PAYLOAD_CACHE_SIZE = 64
+
     @abstractmethod
 
     def prepare_payload(self, model: str, messages: OrkesMessagesSchema, stream: bool, settings: Dict, tools: Optional[List[Dict]] = None) -> Dict:
@@ -58,6 +63,52 @@ class LLMProviderStrategy(ABC):
         """
         pass
 
+    def parse_stream_event(self, event: ServerSentEvent) -> List[StreamEvent]:
+        """Parses one server-sent event of a streaming response.
+
+        The built-in strategies parse each event's data once and return every
+        text delta, tool call fragment, usage report, finish reason and error it
+        holds. This default passes each data line to `parse_stream_chunk`, so
+        strategies that only implement it keep streaming text.
+
+        Args:
+            event (ServerSentEvent): The event, as decoded by `SSEDecoder`.
+
+        Returns:
+            List[StreamEvent]: The stream events of the event, in order.
+        """
+        events = []
+        for line in event.data.split("\n"):
+            text = self.parse_stream_chunk(f"data: {line}")
+            if text:
+                events.append(StreamEvent(StreamEvent.TEXT, text=text))
+        return events
+
+    def parse_usage(self, response_data: Dict) -> Optional[UsageSchema]:
+        """Extracts the token usage of a complete response.
+
+        Args:
+            response_data (Dict): The response data from the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if the
+            response does not report them, which is what this default returns.
+        """
+        return None
+
+    def parse_stream_usage(self, usage: Dict[str, Any]) -> Optional[UsageSchema]:
+        """Normalizes the token usage reported by the usage events of a stream.
+
+        Args:
+            usage (Dict[str, Any]): The `StreamEvent.usage` of every usage event of
+                the stream, merged in order, as `StreamAccumulator.usage` holds it.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if the
+            stream did not report them, which is what this default returns.
+        """
+        return None
+
     @abstractmethod
 
     def get_headers(self, api_key: str) -> Dict[str, str]:
@@ -98,6 +149,65 @@ class LLMProviderStrategy(ABC):
         pass
 
 
+    def encode_message(self, message: OrkesMessageSchema) -> Dict:
+        """Converts one message to the provider's format.
+
+        Args:
+            message (OrkesMessageSchema): The message to convert.
+
+        Returns:
+            Dict: The message in the provider's format.
+        """
+        return message.model_dump()
+
+    def encode_messages(self, messages: OrkesMessagesSchema) -> List[Dict]:
+        """Returns `encode_message` of every message, in order.
+
+        The messages of an `OrkesConversation` encoded by an earlier request are
+        not encoded again, so building the payload of a long conversation only
+        costs its new messages. The list returned for a conversation is shared,
+        so it must not be modified.
+
+        Args:
+            messages (OrkesMessagesSchema): The messages to convert.
+
+        Returns:
+            List[Dict]: The messages in the provider's format.
+        """
+        if isinstance(messages, OrkesConversation):
+            return messages.encoded(type(self), self.encode_message)
+        return [self.encode_message(message) for message in messages.messages]
+
+    def tools_payload(self, tools: List[OrkesToolSchema]) -> List[Dict]:
+        """Returns `get_tools_payload(tools)`, reusing it for the same tool objects.
+
+        Agents usually send the same tools on every turn, and tool schemas built
+        from callables are shared across calls, so the provider payload of a tool
+        set is cached by the identity of its tools. Up to `TOOLS_PAYLOAD_CACHE_SIZE`
+        tool sets are kept per strategy. The returned payload is shared, so it
+        must not be modified.
+
+        Args:
+            tools (List[OrkesToolSchema]): The tools to convert.
+
+        Returns:
+            List[Dict]: The tools in the provider's format.
+        """
+        cache = self.__dict__.get("_tools_payload_cache")
+        if cache is None:
+            cache = self.__dict__.setdefault("_tools_payload_cache", {})
+        key = tuple(id(tool) for tool in tools)
+        entry = cache.get(key)
+        # The tools are kept in the entry, so their ids cannot be reused while cached.
+        if entry is not None and all(a is b for a, b in zip(entry[0], tools)):
+            return entry[1]
+        payload = self.get_tools_payload(tools)
+        if len(cache) >= self.TOOLS_PAYLOAD_CACHE_SIZE:
+            cache.clear()
+        cache[key] = (tuple(tools), payload)
+        return payload
+
+
 class LLMInterface(ABC):
     """Abstract base class for LLM connections.
 
@@ -118,6 +228,21 @@ class LLMInterface(ABC):
         """
         pass
 
+    async def asend_message(self, message, **kwargs) -> Any:
+        """Sends a message to the LLM from an event loop.
+
+        The default implementation runs `send_message` in a worker thread, so it
+        never blocks the loop. Connections with a native async client override it.
+
+        Args:
+            message: The message to send.
+            **kwargs: Additional keyword arguments.
+
+        Returns:
+            Any: The same value as `send_message`.
+        """
+        return await asyncio.to_thread(self.send_message, message, **kwargs)
+
     @abstractmethod
     async def stream_message(self, message, **kwargs) -> AsyncGenerator[str, None]:
         """Streams the response from the LLM incrementally.
@@ -1,15 +1,32 @@
 from typing import Optional, Dict,List
 import json
 from orkes.services.schema import LLMProviderStrategy
-from orkes.shared.schema import RequestSchema, ToolCallSchema
+from orkes.services.streaming import ServerSentEvent, StreamEvent
+from orkes.shared import serialization
+from orkes.shared.schema import RequestSchema, ToolCallSchema, UsageSchema
 from typing import Optional, Dict,List, Union
-from orkes.shared.schema import OrkesMessagesSchema, OrkesToolSchema
+from orkes.shared.schema import OrkesMessageSchema, OrkesMessagesSchema, OrkesToolSchema
 
 class OpenAIStyleStrategy(LLMProviderStrategy):
     """A strategy for interacting with LLM providers that follow the OpenAI API format.
 
     This includes providers like OpenAI, vLLM, DeepSeek, and other compatible APIs.
+
+    Attributes:
+        stream_usage (bool): Whether streamed requests ask the server to report
+            their token usage, with ``stream_options``.
     """
+    def __init__(self, stream_usage: bool = False):
+        """Initializes the OpenAIStyleStrategy.
+
+        Args:
+            stream_usage (bool, optional): Whether streamed requests ask for their
+                token usage. Not every compatible server accepts ``stream_options``,
+                so it is off by default, and streams then report no usage.
+                Defaults to False.
+        """
+        self.stream_usage = stream_usage
+
     def get_headers(self, api_key: str) -> Dict[str, str]:
         """Returns the headers required for authentication with an OpenAI-style API.
 
@@ -33,8 +50,7 @@ class OpenAIStyleStrategy(LLMProviderStrategy):
         Returns:
             Dict[str, List[Dict]]: The messages in the provider's format.
         """
-        processed_messages = [msg.model_dump() for msg in messages.messages]
-        return {"messages": processed_messages}
+        return {"messages": self.encode_messages(messages)}
 
     def get_tools_payload(self, tools: List[OrkesToolSchema]) -> List[Dict]:
         """Converts a list of OrkesToolSchema objects into the format expected by an
@@ -73,8 +89,11 @@ class OpenAIStyleStrategy(LLMProviderStrategy):
             **settings,
             **message_payload
         }
+        if stream and self.stream_usage and "stream_options" not in settings:
+            # Without it, streams do not report their token usage.
+            payload["stream_options"] = {"include_usage": True}
         if tools:
-            payload['tools'] = self.get_tools_payload(tools)
+            payload['tools'] = self.tools_payload(tools)
         return payload
 
     def parse_response(self, response_data: Dict) -> RequestSchema:
@@ -127,6 +146,78 @@ class OpenAIStyleStrategy(LLMProviderStrategy):
         except (json.JSONDecodeError, KeyError, IndexError):
             return None
 
+    def parse_stream_event(self, event: ServerSentEvent) -> List[StreamEvent]:
+        """Parses a server-sent event of a streaming response from an OpenAI-style API.
+
+        Args:
+            event (ServerSentEvent): The event to parse.
+
+        Returns:
+            List[StreamEvent]: The text, tool call fragments, usage, finish reason
+            and error the event holds.
+        """
+        if event.data == "[DONE]":
+            return []
+        try:
+            data = serialization.loads(event.data)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(data, dict):
+            return []
+        if "error" in data:
+            return [StreamEvent(StreamEvent.ERROR, error=data["error"])]
+        events = []
+        for choice in data.get("choices") or ():
+            delta = choice.get("delta") or {}
+            if delta.get("content"):
+                events.append(StreamEvent(StreamEvent.TEXT, text=delta["content"]))
+            for tool_call in delta.get("tool_calls") or ():
+                function = tool_call.get("function") or {}
+                events.append(StreamEvent(
+                    StreamEvent.TOOL_CALL,
+                    index=tool_call.get("index", 0),
+                    tool_call_id=tool_call.get("id"),
+                    name=function.get("name"),
+                    arguments=function.get("arguments")
+                ))
+            if choice.get("finish_reason"):
+                events.append(StreamEvent(StreamEvent.FINISH, finish_reason=choice["finish_reason"]))
+        if data.get("usage"):
+            events.append(StreamEvent(StreamEvent.USAGE, usage=data["usage"]))
+        return events
+
+    def parse_usage(self, response_data: Dict) -> Optional[UsageSchema]:
+        """Extracts the token usage of a response from an OpenAI-style API.
+
+        Args:
+            response_data (Dict): The response data from the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if the
+            response has no usage.
+        """
+        return self.parse_stream_usage(response_data.get("usage") or {})
+
+    def parse_stream_usage(self, usage: Dict) -> Optional[UsageSchema]:
+        """Normalizes an OpenAI-style usage object, which a stream sends in its last chunk.
+
+        Args:
+            usage (Dict): The usage reported by the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if there
+            is no usage.
+        """
+        if not usage:
+            return None
+        input_tokens = usage.get("prompt_tokens") or 0
+        output_tokens = usage.get("completion_tokens") or 0
+        return UsageSchema(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=usage.get("total_tokens") or input_tokens + output_tokens
+        )
+
 class AnthropicStrategy(LLMProviderStrategy):
     """A strategy for interacting with the Anthropic API (Claude)."""
     def get_headers(self, api_key: str) -> Dict[str, str]:
@@ -153,7 +244,7 @@ class AnthropicStrategy(LLMProviderStrategy):
         Returns:
             Dict[str, Union[str, List[Dict]]]: The messages in the provider's format.
         """
-        processed_messages = [msg.model_dump() for msg in messages.messages]
+        processed_messages = self.encode_messages(messages)
 
         system_msg = next((msg['content'] for msg in processed_messages if msg['role'] == 'system'), None)
         chat_messages = [msg for msg in processed_messages if msg['role'] != 'system']
@@ -206,7 +297,7 @@ class AnthropicStrategy(LLMProviderStrategy):
         }
 
         if tools:
-            payload["tools"] = self.get_tools_payload(tools)
+            payload["tools"] = self.tools_payload(tools)
 
         return payload
 
@@ -268,6 +359,92 @@ class AnthropicStrategy(LLMProviderStrategy):
         except:
             return None
 
+    def parse_stream_event(self, event: ServerSentEvent) -> List[StreamEvent]:
+        """Parses a server-sent event of a streaming response from the Anthropic API.
+
+        Args:
+            event (ServerSentEvent): The event to parse.
+
+        Returns:
+            List[StreamEvent]: The text, tool call fragments, usage, finish reason
+            and error the event holds.
+        """
+        try:
+            data = serialization.loads(event.data)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(data, dict):
+            return []
+        kind = data.get("type", event.event)
+        if kind == "content_block_delta":
+            delta = data.get("delta") or {}
+            if delta.get("type") == "input_json_delta":
+                return [StreamEvent(StreamEvent.TOOL_CALL, index=data.get("index", 0), arguments=delta.get("partial_json", ""))]
+            if delta.get("text"):
+                return [StreamEvent(StreamEvent.TEXT, text=delta["text"])]
+            return []
+        if kind == "content_block_start":
+            block = data.get("content_block") or {}
+            if block.get("type") == "tool_use":
+                return [StreamEvent(StreamEvent.TOOL_CALL, index=data.get("index", 0), tool_call_id=block.get("id"), name=block.get("name"))]
+            if block.get("text"):
+                return [StreamEvent(StreamEvent.TEXT, text=block["text"])]
+            return []
+        if kind == "message_start":
+            usage = (data.get("message") or {}).get("usage")
+            return [StreamEvent(StreamEvent.USAGE, usage=usage)] if usage else []
+        if kind == "message_delta":
+            events = []
+            if data.get("usage"):
+                events.append(StreamEvent(StreamEvent.USAGE, usage=data["usage"]))
+            # The mock server and older API versions nest the usage in the delta.
+            elif (data.get("delta") or {}).get("usage"):
+                events.append(StreamEvent(StreamEvent.USAGE, usage=data["delta"]["usage"]))
+            stop_reason = (data.get("delta") or {}).get("stop_reason")
+            if stop_reason:
+                events.append(StreamEvent(StreamEvent.FINISH, finish_reason=stop_reason))
+            return events
+        if kind == "error":
+            return [StreamEvent(StreamEvent.ERROR, error=data.get("error", data))]
+        return []
+
+    def parse_usage(self, response_data: Dict) -> Optional[UsageSchema]:
+        """Extracts the token usage of a response from the Anthropic API.
+
+        Args:
+            response_data (Dict): The response data from the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if the
+            response has no usage.
+        """
+        return self.parse_stream_usage(response_data.get("usage") or {})
+
+    def parse_stream_usage(self, usage: Dict) -> Optional[UsageSchema]:
+        """Normalizes an Anthropic usage object.
+
+        A stream reports the input tokens in its ``message_start`` event and the
+        running count of output tokens in its ``message_delta`` events, so their
+        merged usage holds the totals of the call.
+
+        Args:
+            usage (Dict): The usage reported by the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if there
+            is no usage.
+        """
+        if not usage:
+            return None
+        # Prompt tokens read from or written to the cache are not in input_tokens.
+        input_tokens = (
+            (usage.get("input_tokens") or 0)
+            + (usage.get("cache_creation_input_tokens") or 0)
+            + (usage.get("cache_read_input_tokens") or 0)
+        )
+        output_tokens = usage.get("output_tokens") or 0
+        return UsageSchema(input_tokens=input_tokens, output_tokens=output_tokens, total_tokens=input_tokens + output_tokens)
+
 class GoogleGeminiStrategy(LLMProviderStrategy):
     """A strategy for interacting with the Google Gemini REST API."""
     def get_headers(self, api_key: str) -> Dict[str, str]:
@@ -293,16 +470,23 @@ class GoogleGeminiStrategy(LLMProviderStrategy):
         Returns:
             Dict[str, List[Dict]]: The messages in the provider's format.
         """
-        processed_messages = [msg.model_dump() for msg in messages.messages]
+        return {"contents": self.encode_messages(messages)}
 
-        gemini_contents = []
-        for msg in processed_messages:
-            role = "user" if msg['role'] == "user" else "model"
-            gemini_contents.append({
-                "role": role,
-                "parts": [{"text": msg['content']}]
-            })
-        return {"contents": gemini_contents}
+    def encode_message(self, message: OrkesMessageSchema) -> Dict:
+        """Converts one message to a Google Gemini content.
+
+        Args:
+            message (OrkesMessageSchema): The message to convert.
+
+        Returns:
+            Dict: The message as a Gemini content, with the "model" role for
+            every author but the user.
+        """
+        role = "user" if message.role == "user" else "model"
+        return {
+            "role": role,
+            "parts": [{"text": message.content}]
+        }
 
     def get_tools_payload(self, tools: List[OrkesToolSchema]) -> List[Dict]:
         """Converts a list of OrkesToolSchema objects into the format expected by the
@@ -350,7 +534,7 @@ class GoogleGeminiStrategy(LLMProviderStrategy):
         }
 
         if tools:
-            payload['tools'] = self.get_tools_payload(tools)
+            payload['tools'] = self.tools_payload(tools)
 
         return payload
 
@@ -413,3 +597,75 @@ class GoogleGeminiStrategy(LLMProviderStrategy):
             return data['candidates'][0]['content']['parts'][0]['text']
         except (json.JSONDecodeError, KeyError, IndexError):
             return None
+
+    def parse_stream_event(self, event: ServerSentEvent) -> List[StreamEvent]:
+        """Parses a server-sent event of a streaming response from the Google Gemini API.
+
+        Gemini sends each function call whole, so its tool call events have no
+        index.
+
+        Args:
+            event (ServerSentEvent): The event to parse.
+
+        Returns:
+            List[StreamEvent]: The text, tool calls, usage, finish reason and error
+            the event holds.
+        """
+        try:
+            data = serialization.loads(event.data)
+        except json.JSONDecodeError:
+            return []
+        if not isinstance(data, dict):
+            return []
+        if "error" in data:
+            return [StreamEvent(StreamEvent.ERROR, error=data["error"])]
+        events = []
+        for candidate in data.get("candidates") or ():
+            for part in (candidate.get("content") or {}).get("parts") or ():
+                if part.get("text"):
+                    events.append(StreamEvent(StreamEvent.TEXT, text=part["text"]))
+                elif "functionCall" in part:
+                    call = part["functionCall"]
+                    events.append(StreamEvent(
+                        StreamEvent.TOOL_CALL,
+                        name=call.get("name"),
+                        arguments=serialization.dumps(call.get("args") or {}).decode("utf-8")
+                    ))
+            if candidate.get("finishReason"):
+                events.append(StreamEvent(StreamEvent.FINISH, finish_reason=candidate["finishReason"]))
+        if data.get("usageMetadata"):
+            events.append(StreamEvent(StreamEvent.USAGE, usage=data["usageMetadata"]))
+        return events
+
+    def parse_usage(self, response_data: Dict) -> Optional[UsageSchema]:
+        """Extracts the token usage of a response from the Google Gemini API.
+
+        Args:
+            response_data (Dict): The response data from the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if the
+            response has no usage metadata.
+        """
+        return self.parse_stream_usage(response_data.get("usageMetadata") or {})
+
+    def parse_stream_usage(self, usage: Dict) -> Optional[UsageSchema]:
+        """Normalizes Gemini usage metadata, which every chunk of a stream may carry with running totals.
+
+        Args:
+            usage (Dict): The usage metadata reported by the provider.
+
+        Returns:
+            Optional[UsageSchema]: The tokens the call consumed, or None if there
+            is no usage metadata.
+        """
+        if not usage:
+            return None
+        input_tokens = usage.get("promptTokenCount") or 0
+        # Thinking tokens are billed as output.
+        output_tokens = (usage.get("candidatesTokenCount") or 0) + (usage.get("thoughtsTokenCount") or 0)
+        return UsageSchema(
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            total_tokens=usage.get("totalTokenCount") or input_tokens + output_tokens
+        )
@@ -0,0 +1,250 @@
+from typing import Any, Dict, List, Optional
+from orkes.shared.schema import RequestSchema, ToolCallSchema
+from orkes.shared import serialization
+
+
+class ServerSentEvent:
+    """One event of a server-sent event (SSE) stream.
+
+    Attributes:
+        event (str): The event type, "message" unless the server set one with an
+            ``event:`` line.
+        data (str): The ``data:`` lines of the event, joined by newlines.
+        id (Optional[str]): The event id, if the server sent one.
+    """
+
+    __slots__ = ("event", "data", "id")
+
+    def __init__(self, data: str, event: str = "message", id: Optional[str] = None):
+        """Initializes the ServerSentEvent.
+
+        Args:
+            data (str): The data of the event.
+            event (str, optional): The event type. Defaults to "message".
+            id (Optional[str], optional): The event id. Defaults to None.
+        """
+        self.data = data
+        self.event = event
+        self.id = id
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ServerSentEvent):
+            return NotImplemented
+        return (self.event, self.data, self.id) == (other.event, other.data, other.id)
+
+    def __repr__(self) -> str:
+        return f"ServerSentEvent(event={self.event!r}, data={self.data!r}, id={self.id!r})"
+
+
+class SSEDecoder:
+    """Incrementally decodes a server-sent event stream from raw bytes.
+
+    Bytes are fed as they arrive from the network, in chunks of any size, and
+    every event completed by a chunk is returned. Lines may end with LF, CRLF
+    or CR, an event may span several ``data:`` lines, and comment lines are
+    skipped, following the WHATWG specification. Only ``data:`` values are
+    decoded from UTF-8, and only once their event is complete.
+    """
+
+    def __init__(self):
+        """Initializes the SSEDecoder."""
+        self._buffer = b""
+        self._event: Optional[str] = None
+        self._data: List[bytes] = []
+        self._id: Optional[str] = None
+
+    def feed(self, chunk: bytes) -> List[ServerSentEvent]:
+        """Decodes a chunk of the stream.
+
+        Args:
+            chunk (bytes): The next bytes of the stream.
+
+        Returns:
+            List[ServerSentEvent]: The events the chunk completed, in order.
+        """
+        buffer = self._buffer + chunk if self._buffer else chunk
+        # A trailing CR may be the first half of a CRLF, so it waits for the next chunk.
+        end = max(buffer.rfind(b"\n"), buffer.rfind(b"\r", 0, len(buffer) - 1))
+        if end < 0:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[end + 1:]
+        events: List[ServerSentEvent] = []
+        for line in buffer[:end + 1].splitlines():
+            self._process_line(line, events)
+        return events
+
+    def flush(self) -> List[ServerSentEvent]:
+        """Ends the stream, returning the event left without a closing blank line, if any."""
+        events: List[ServerSentEvent] = []
+        buffer, self._buffer = self._buffer, b""
+        for line in buffer.splitlines():
+            self._process_line(line, events)
+        self._process_line(b"", events)
+        return events
+
+    def _process_line(self, line: bytes, events: List[ServerSentEvent]) -> None:
+        if not line:
+            if self._data:
+                data = b"\n".join(self._data).decode("utf-8")
+                events.append(ServerSentEvent(data, self._event or "message", self._id))
+            self._event = None
+            self._data = []
+            return
+        if line[0] == 58:  # ":" starts a comment, which servers send as keep-alives.
+            return
+        field, colon, value = line.partition(b":")
+        if colon and value[:1] == b" ":
+            value = value[1:]
+        if field == b"data":
+            self._data.append(value)
+        elif field == b"event":
+            self._event = value.decode("utf-8")
+        elif field == b"id":
+            self._id = value.decode("utf-8")
+
+
+class StreamEvent:
+    """A provider-independent event of a streamed LLM response.
+
+    Provider strategies turn each server-sent event into stream events with
+    `LLMProviderStrategy.parse_stream_event`.
+
+    Attributes:
+        type (str): One of "text", "tool_call", "usage", "finish" or "error".
+        text (Optional[str]): The text delta of a "text" event.
+        index (Optional[int]): The position of the tool call a "tool_call" event
+            belongs to. Fragments of the same call share it. None for providers
+            that only send complete calls.
+        tool_call_id (Optional[str]): The id of the tool call, on its first fragment.
+        name (Optional[str]): The name of the function called, on its first fragment.
+        arguments (Optional[str]): A fragment of the JSON arguments of the call.
+        usage (Optional[Dict[str, Any]]): The token usage reported by the provider,
+            as it sent it, for a "usage" event.
+        finish_reason (Optional[str]): Why the model stopped, for a "finish" event.
+        error (Optional[Any]): The error sent by the provider, for an "error" event.
+    """
+
+    TEXT = "text"
+    TOOL_CALL = "tool_call"
+    USAGE = "usage"
+    FINISH = "finish"
+    ERROR = "error"
+
+    __slots__ = ("type", "text", "index", "tool_call_id", "name", "arguments", "usage", "finish_reason", "error")
+
+    def __init__(
+        self,
+        type: str,
+        text: Optional[str] = None,
+        index: Optional[int] = None,
+        tool_call_id: Optional[str] = None,
+        name: Optional[str] = None,
+        arguments: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        finish_reason: Optional[str] = None,
+        error: Optional[Any] = None
+    ):
+        """Initializes the StreamEvent. See the class attributes for the arguments."""
+        self.type = type
+        self.text = text
+        self.index = index
+        self.tool_call_id = tool_call_id
+        self.name = name
+        self.arguments = arguments
+        self.usage = usage
+        self.finish_reason = finish_reason
+        self.error = error
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, StreamEvent):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__ if getattr(self, slot) is not None)
+        return f"StreamEvent({fields})"
+
+
+class StreamAccumulator:
+    """Assembles the stream events of a response into its `RequestSchema`.
+
+    Text deltas are concatenated, and the argument fragments of each tool call
+    are joined in order before being parsed as JSON. Fragments are matched by
+    their index; tool call events without one are complete calls of their own.
+
+    Attributes:
+        text (List[str]): The text deltas received so far.
+        tool_calls (Dict[Any, Dict[str, Any]]): The tool calls received so far,
+            in order, each with its id, name and argument fragments.
+        usage (Dict[str, Any]): The token usage reported by the provider, merged
+            across events.
+        finish_reason (Optional[str]): Why the model stopped, if it said so.
+        errors (List[Any]): The errors sent by the provider.
+    """
+
+    #: The argument key under which a lenient `result` keeps arguments that are not valid JSON.
+    RAW_ARGUMENTS_KEY = "__raw_arguments__"
+
+    def __init__(self):
+        """Initializes the StreamAccumulator."""
+        self.text: List[str] = []
+        self.tool_calls: Dict[Any, Dict[str, Any]] = {}
+        self.usage: Dict[str, Any] = {}
+        self.finish_reason: Optional[str] = None
+        self.errors: List[Any] = []
+
+    def add(self, event: StreamEvent) -> None:
+        """Adds the next event of the stream.
+
+        Args:
+            event (StreamEvent): The event to add.
+        """
+        kind = event.type
+        if kind == StreamEvent.TEXT:
+            self.text.append(event.text)
+        elif kind == StreamEvent.TOOL_CALL:
+            key = event.index if event.index is not None else ("whole", len(self.tool_calls))
+            call = self.tool_calls.get(key)
+            if call is None:
+                call = self.tool_calls[key] = {"id": None, "name": None, "arguments": []}
+            if event.tool_call_id:
+                call["id"] = event.tool_call_id
+            if event.name:
+                call["name"] = event.name
+            if event.arguments:
+                call["arguments"].append(event.arguments)
+        elif kind == StreamEvent.USAGE:
+            self.usage.update(event.usage or {})
+        elif kind == StreamEvent.FINISH:
+            self.finish_reason = event.finish_reason
+        elif kind == StreamEvent.ERROR:
+            self.errors.append(event.error)
+
+    def result(self, strict: bool = True) -> RequestSchema:
+        """Returns the response assembled from the events added so far.
+
+        Args:
+            strict (bool, optional): Whether to raise on tool call arguments that
+                are not valid JSON. If False, such arguments are kept as text under
+                `RAW_ARGUMENTS_KEY` instead. Defaults to True.
+
+        Returns:
+            RequestSchema: The tool calls of the response if it has any, or its text.
+
+        Raises:
+            ValueError: If `strict` and the arguments of a tool call are not valid JSON.
+        """
+        if not self.tool_calls:
+            return RequestSchema(content_type="message", content="".join(self.text))
+        tools_called = []
+        for call in self.tool_calls.values():
+            arguments = "".join(call["arguments"])
+            try:
+                parsed = serialization.loads(arguments) if arguments else {}
+            except ValueError as e:
+                if strict:
+                    raise ValueError(f"Unexpected tool call arguments for '{call['name']}': {arguments}") from e
+                parsed = {self.RAW_ARGUMENTS_KEY: arguments}
+            tools_called.append(ToolCallSchema(function_name=call["name"] or "", arguments=parsed))
+        return RequestSchema(content_type="tool_calls", content=tools_called)
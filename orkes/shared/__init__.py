@@ -1,20 +1,31 @@
-from .context import edge_id_var, trace_var, edge_trace_var
-from .schema import ToolParameter, OrkesToolSchema, OrkesMessageSchema, OrkesMessagesSchema, ToolDefinition, ToolCallSchema, RequestSchema
+from .context import edge_id_var, trace_var, edge_trace_var, hedge_state_var, usage_var
+from .schema import ToolParameter, OrkesToolSchema, OrkesMessageSchema, OrkesMessagesSchema, OrkesConversation, ToolDefinition, ToolCallSchema, RequestSchema, UsageSchema
 from .utils import format_start_time, format_elapsed_time, get_instances_from_func, create_dict_from_typeddict
+from .serialization import Serializer, StdlibSerializer, OrjsonSerializer, MsgspecSerializer, get_serializer, set_serializer
 
 __all__ = [
     "edge_id_var",
     "trace_var",
     "edge_trace_var",
+    "hedge_state_var",
+    "usage_var",
     "ToolParameter",
     "ToolCallSchema",
     "RequestSchema",
+    "UsageSchema",
     "OrkesToolSchema",
     "OrkesMessageSchema",
     "OrkesMessagesSchema",
+    "OrkesConversation",
     "ToolDefinition",
     "format_start_time",
     "format_elapsed_time",
     "get_instances_from_func",
     "create_dict_from_typeddict",
+    "Serializer",
+    "StdlibSerializer",
+    "OrjsonSerializer",
+    "MsgspecSerializer",
+    "get_serializer",
+    "set_serializer",
 ]
@@ -6,7 +6,8 @@ from contextvars import ContextVar
 from typing import Optional, TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from orkes.graph.schema import TracesSchema, EdgeTrace
+    from orkes.graph.schema import TracesSchema, EdgeTrace, RunUsage
+    from orkes.services.resilience import HedgeState
 
 #: Context variable for storing the ID of the currently executing graph edge.
 edge_id_var: ContextVar[Optional[str]] = ContextVar("edge_id", default=None)
@@ -19,3 +20,11 @@ trace_var: ContextVar[Optional[TracesSchema]] = ContextVar("trace", default=None
 #: Context variable for storing the EdgeTrace object.
 edge_trace_var: ContextVar[Optional[EdgeTrace]] = ContextVar("edge_trace", default=None)
 """Context variable for storing the EdgeTrace object."""
+
+#: Context variable for storing the state of the hedged call being made.
+hedge_state_var: ContextVar[Optional[HedgeState]] = ContextVar("hedge_state", default=None)
+"""Context variable for storing the state of the hedged call being made."""
+
+#: Context variable for storing the LLM usage of the run being executed.
+usage_var: ContextVar[Optional[RunUsage]] = ContextVar("usage", default=None)
+"""Context variable for storing the LLM usage of the run being executed."""
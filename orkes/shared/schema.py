@@ -1,5 +1,5 @@
-from typing import Any, Dict, List, Optional, Callable, Union
-from pydantic import BaseModel
+from typing import Any, Dict, Iterable, List, Optional, Callable, Tuple, Union
+from pydantic import BaseModel, PrivateAttr
 
 
 class ToolCallSchema(BaseModel):
@@ -30,6 +30,20 @@ class RequestSchema(BaseModel):
     content : Union[str, List[ToolCallSchema]]
 
 
+class UsageSchema(BaseModel):
+    """Represents the tokens an LLM call consumed, whatever the provider.
+
+    Attributes:
+        input_tokens (int): The tokens of the prompt, including cached ones.
+        output_tokens (int): The tokens generated by the model.
+        total_tokens (int): The tokens the provider counts for the call, usually
+                            the sum of the two.
+    """
+    input_tokens: int = 0
+    output_tokens: int = 0
+    total_tokens: int = 0
+
+
 class ToolParameter(BaseModel):
     """Represents the JSON Schema for the parameters of a tool.
 
@@ -107,6 +121,68 @@ class OrkesMessagesSchema(BaseModel):
     messages: List[OrkesMessageSchema]
 
 
+class OrkesConversation(OrkesMessagesSchema):
+    """An append-only conversation that remembers how its messages were encoded.
+
+    Provider strategies encode each message of a plain `OrkesMessagesSchema`
+    on every request, so a long agent session re-encodes its whole history on
+    every turn. A conversation keeps the encoded form of its messages for each
+    strategy and only encodes the messages appended since the last request.
+
+    Add messages with `append` or `extend`, and do not modify messages once
+    added. Messages that were removed or replaced are noticed by identity, and
+    are encoded again along with every message after them, but edits to a
+    message in place go unnoticed.
+
+    Attributes:
+        messages (List[OrkesMessageSchema]): The messages of the conversation.
+    """
+    _encoded: Dict[Any, Tuple[List[Dict], Tuple[OrkesMessageSchema, ...]]] = PrivateAttr(default_factory=dict)
+
+    def append(self, message: OrkesMessageSchema) -> None:
+        """Adds a message to the end of the conversation.
+
+        Args:
+            message (OrkesMessageSchema): The message to add.
+        """
+        self.messages.append(message)
+
+    def extend(self, messages: Iterable[OrkesMessageSchema]) -> None:
+        """Adds messages to the end of the conversation.
+
+        Args:
+            messages (Iterable[OrkesMessageSchema]): The messages to add.
+        """
+        self.messages.extend(messages)
+
+    def encoded(self, key: Any, encode: Callable[[OrkesMessageSchema], Dict]) -> List[Dict]:
+        """Returns the encoded messages, encoding only those not encoded before.
+
+        Args:
+            key (Any): Identifies the encoding, e.g. the strategy class.
+            encode (Callable[[OrkesMessageSchema], Dict]): Encodes one message.
+
+        Returns:
+            List[Dict]: The encoded messages, in order. The list and its items are
+            shared with later calls, so they must not be modified.
+        """
+        messages = self.messages
+        encoded, sources = self._encoded.get(key, ([], ()))
+        # The encoded prefix still valid ends at the first message replaced since.
+        count = min(len(sources), len(messages))
+        for i, (source, message) in enumerate(zip(sources, messages)):
+            if source is not message:
+                count = i
+                break
+        if count == len(encoded) == len(messages):
+            return encoded
+        # A new list each time, so lists returned earlier, e.g. held by payloads
+        # still in flight, never change.
+        encoded = [*encoded[:count], *(encode(message) for message in messages[count:])]
+        self._encoded[key] = (encoded, tuple(messages))
+        return encoded
+
+
 
 class ToolDefinition(BaseModel):
     """A universal schema for defining a tool that can be used by an LLM.
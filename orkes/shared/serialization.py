@@ -0,0 +1,203 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Union
+
+import pydantic_core
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class Serializer(ABC):
+    """Abstract base class for the JSON serializers used by Orkes.
+
+    Every serializer writes compact UTF-8 JSON, or JSON indented by two spaces,
+    and writes values that are not JSON types as their ``str()`` rather than
+    failing. Pydantic models are serialized to bytes directly by pydantic's own
+    serializer, without building an intermediate dictionary.
+
+    Attributes:
+        name (str): The name `set_serializer` knows the serializer by.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        """Serializes a value to JSON.
+
+        Args:
+            obj (Any): The value to serialize.
+            indent (bool, optional): Whether to indent the JSON. Defaults to False.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON.
+        """
+        pass
+
+    @abstractmethod
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """Parses JSON.
+
+        Args:
+            data (Union[bytes, str]): The JSON to parse.
+
+        Returns:
+            Any: The parsed value.
+
+        Raises:
+            json.JSONDecodeError: If `data` is not valid JSON, whatever the backend.
+        """
+        pass
+
+    def dump_model(self, model: BaseModel, indent: bool = False, include: Optional[set] = None) -> bytes:
+        """Serializes a pydantic model to JSON.
+
+        Args:
+            model (BaseModel): The model to serialize.
+            indent (bool, optional): Whether to indent the JSON. Defaults to False.
+            include (Optional[set], optional): The fields to keep. Defaults to all.
+
+        Returns:
+            bytes: The UTF-8 encoded JSON.
+        """
+        return pydantic_core.to_json(model, indent=2 if indent else None, include=include, serialize_unknown=True)
+
+
+class StdlibSerializer(Serializer):
+    """Serializes with the standard library's `json` module."""
+
+    name = "json"
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    """Serializes with `orjson <https://github.com/ijl/orjson>`_, if it is installed."""
+
+    name = "orjson"
+
+    def __init__(self):
+        """Initializes the OrjsonSerializer.
+
+        Raises:
+            ImportError: If orjson is not installed.
+        """
+        if orjson is None:
+            raise ImportError("orjson is not installed. Install it with `pip install orjson`.")
+        self._options = orjson.OPT_NON_STR_KEYS
+        self._indent_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        return orjson.dumps(obj, default=str, option=self._indent_options if indent else self._options)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecSerializer(Serializer):
+    """Serializes with `msgspec <https://jcristharif.com/msgspec/>`_, if it is installed."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        """Initializes the MsgspecSerializer.
+
+        Raises:
+            ImportError: If msgspec is not installed.
+        """
+        if msgspec is None:
+            raise ImportError("msgspec is not installed. Install it with `pip install msgspec`.")
+        self._encoder = msgspec.json.Encoder(enc_hook=str)
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any, indent: bool = False) -> bytes:
+        data = self._encoder.encode(obj)
+        return msgspec.json.format(data, indent=2) if indent else data
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            doc = data if isinstance(data, str) else data.decode("utf-8", "replace")
+            raise json.JSONDecodeError(str(e), doc, 0) from e
+
+
+SERIALIZERS = {
+    StdlibSerializer.name: StdlibSerializer,
+    OrjsonSerializer.name: OrjsonSerializer,
+    MsgspecSerializer.name: MsgspecSerializer,
+}
+
+
+def available_serializers() -> List[str]:
+    """Returns the names of the serializers that can be used, fastest first."""
+    names = []
+    if orjson is not None:
+        names.append(OrjsonSerializer.name)
+    if msgspec is not None:
+        names.append(MsgspecSerializer.name)
+    names.append(StdlibSerializer.name)
+    return names
+
+
+def _create(name: str) -> Serializer:
+    if name not in SERIALIZERS:
+        raise ValueError(f"Unknown serializer '{name}', expected one of {list(SERIALIZERS)}.")
+    return SERIALIZERS[name]()
+
+
+_serializer: Serializer = _create(available_serializers()[0])
+
+
+def get_serializer() -> Serializer:
+    """Returns the serializer in use: orjson if installed, then msgspec, then the standard library, unless set otherwise."""
+    return _serializer
+
+
+def set_serializer(serializer: Union[Serializer, str]) -> Serializer:
+    """Sets the serializer used by clients, runners and trace sinks.
+
+    Args:
+        serializer (Union[Serializer, str]): A serializer, or the name of a built-in
+            one: "orjson", "msgspec" or "json".
+
+    Returns:
+        Serializer: The serializer now in use.
+
+    Raises:
+        ValueError: If the name is unknown.
+        ImportError: If the backend of the serializer is not installed.
+    """
+    global _serializer
+    _serializer = _create(serializer) if isinstance(serializer, str) else serializer
+    return _serializer
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serializes a value to JSON with the serializer in use. See `Serializer.dumps`."""
+    return _serializer.dumps(obj, indent)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses JSON with the serializer in use. See `Serializer.loads`."""
+    return _serializer.loads(data)
+
+
+def dump_model(model: BaseModel, indent: bool = False, include: Optional[set] = None) -> bytes:
+    """Serializes a pydantic model to JSON with the serializer in use. See `Serializer.dump_model`."""
+    return _serializer.dump_model(model, indent, include)
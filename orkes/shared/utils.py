@@ -4,8 +4,12 @@ import datetime
 import ast
 import inspect
 import sys
+import weakref
 from orkes.shared.schema import OrkesToolSchema, ToolParameter
 
+# Schemas of the functions converted so far, dropped along with the function.
+_tool_schema_cache: "weakref.WeakKeyDictionary[Callable, OrkesToolSchema]" = weakref.WeakKeyDictionary()
+
 
 def callable_to_orkes_tool_schema(fn: Callable) -> OrkesToolSchema:
     """
@@ -16,12 +20,30 @@ def callable_to_orkes_tool_schema(fn: Callable) -> OrkesToolSchema:
     The docstring is expected to be in a format that includes a main description
     and an 'Args' section for parameter details.
 
+    The schema is built once per function and reused on later calls; methods
+    share the schema of their underlying function across instances. The returned
+    schema is shared, so it must not be modified.
+
     Args:
         fn (Callable): The function to convert.
 
     Returns:
         OrkesToolSchema: A schema representing the function as a tool.
     """
+    key = getattr(fn, "__func__", fn)
+    try:
+        schema = _tool_schema_cache.get(key)
+    except TypeError:
+        # Not weakly referenceable, so it cannot be cached.
+        return _build_tool_schema(fn)
+    if schema is None:
+        schema = _build_tool_schema(fn)
+        _tool_schema_cache[key] = schema
+    return schema
+
+
+def _build_tool_schema(fn: Callable) -> OrkesToolSchema:
+    """Builds the OrkesToolSchema of a function; see `callable_to_orkes_tool_schema`."""
     signature = inspect.signature(fn)
     docstring = inspect.getdoc(fn) or ""
     doc_parts = docstring.split('Args:')
@@ -5,6 +5,7 @@ from pathlib import Path
 import os
 import argparse
 from orkes.shared.utils import format_elapsed_time, format_start_time
+from orkes.shared import serialization
 
 # Default color palette for function nodes in the visualization.
 DEFAULT_FUNCTION_NODE_COLORS = [
@@ -171,19 +172,43 @@ class TraceInspector:
             edges.append(edge_data)
         return edges
 
+    def _expand_state_deltas(self, data: Dict) -> List[Dict]:
+        """Rebuilds the full state snapshot of each edge of a delta-encoded trace.
+
+        Args:
+            data (Dict): The trace, recorded with snapshot_mode "delta".
+
+        Returns:
+            List[Dict]: The edge traces, each with its `state_snapshot` filled in.
+        """
+        # Imported here, as the graph package itself imports the visualizer.
+        from orkes.graph.schema import TracesSchema
+        states = TracesSchema.model_validate(data).iter_states()
+        edges_trace = []
+        for edge_trace, state in zip(data.get('edges_trace', []), states):
+            edge_trace = {key: value for key, value in edge_trace.items() if key != 'state_delta'}
+            edge_trace['state_snapshot'] = state
+            edges_trace.append(edge_trace)
+        return edges_trace
+
     def generate_html(self, trace_data: Union[str, Dict]) -> str:
         """Generates the HTML content for the visualization.
 
         Args:
             trace_data (Union[str, Dict]): Either a dictionary containing the trace
-                                           or a path to a JSON file.
+                                           or a path to a JSON or JSON Lines
+                                           (``.jsonl``) trace file.
 
         Returns:
             str: The complete HTML content.
         """
-        if isinstance(trace_data, (str, Path)):
-            with open(trace_data, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+        if isinstance(trace_data, (str, Path)) and str(trace_data).endswith('.jsonl'):
+            # Imported here, as the graph package itself imports the visualizer.
+            from orkes.graph.tracing import read_jsonl_trace
+            data = read_jsonl_trace(trace_data)
+        elif isinstance(trace_data, (str, Path)):
+            with open(trace_data, 'rb') as f:
+                data = serialization.loads(f.read())
         else:
             data = trace_data
 
@@ -196,7 +221,10 @@ class TraceInspector:
         status = data.get('status', 'FAILED')
         nodes = self._process_nodes(data.get('nodes_trace', []))
         graph_description = data.get('graph_description') if data.get('graph_description') else "No description provided."
-        edges = self._process_edges(data.get('edges_trace', []))
+        if data.get('snapshot_mode') == 'delta':
+            edges = self._process_edges(self._expand_state_deltas(data))
+        else:
+            edges = self._process_edges(data.get('edges_trace', []))
         
         title_card_content = self._build_title_card({
             "page_title": f"Graph: {graph_name}",
@@ -221,7 +249,8 @@ class TraceInspector:
 
         Args:
             trace_data (Union[str, Dict]): Either a dictionary containing the trace
-                                           or a path to a JSON file.
+                                           or a path to a JSON or JSON Lines
+                                           (``.jsonl``) trace file.
             output_path (str, optional): The path to save the HTML file. Defaults to "".
         """
         html_content = self.generate_html(trace_data)
@@ -0,0 +1,80 @@
+import time
+import asyncio
+import pytest
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+from orkes.graph.utils import orkes_tracable
+from orkes.shared.context import edge_trace_var
+
+# Define the state
+class AsyncState(TypedDict):
+    request_id: str
+    counter: int
+    path: str
+
+@orkes_tracable
+async def fake_llm_call(request_id: str) -> str:
+    await asyncio.sleep(0.05)
+    return f"reply to {request_id}"
+
+# Define node functions
+async def async_node(state: AsyncState) -> Dict:
+    state['path'] += await fake_llm_call(state['request_id'])
+    state['counter'] += 1
+    return state
+
+def sync_node(state: AsyncState) -> Dict:
+    # Plain nodes run in an executor thread and must still see the edge trace.
+    assert edge_trace_var.get() is not None
+    state['path'] += " | sync"
+    return state
+
+async def should_loop(state: AsyncState) -> str:
+    if state['counter'] < 2:
+        return "LOOP"
+    return "END"
+
+def build_graph():
+    workflow = OrkesGraph(state=AsyncState, name="async_graph")
+    workflow.add_node("llm", async_node)
+    workflow.add_node("post", sync_node)
+    workflow.add_edge(workflow.START, "llm")
+    workflow.add_edge("llm", "post")
+    workflow.add_conditional_edge("post", should_loop, {
+        "LOOP": "llm",
+        "END": "END"
+    })
+    return workflow.compile()
+
+@pytest.mark.asyncio
+async def test_arun_concurrent_runs():
+    """
+    Drives many concurrent runs of one compiled graph on a single event loop and
+    checks each keeps its own state and trace.
+    """
+    app = build_graph()
+    num_runs = 200
+
+    start = time.perf_counter()
+    contexts = await asyncio.gather(*[
+        app.arun_with_context({"request_id": f"r{i}", "counter": 0, "path": ""})
+        for i in range(num_runs)
+    ])
+    elapsed = time.perf_counter() - start
+
+    # Each run awaits two 50ms calls; serial execution would take ~20s.
+    assert elapsed < 5
+    for i, ctx in enumerate(contexts):
+        assert ctx.graph_state["counter"] == 2
+        assert ctx.graph_state["path"] == f"reply to r{i} | sync" * 2
+        assert ctx.trace.status == "FINISHED"
+        llm_edges = [edge for edge in ctx.trace.edges_trace if edge.from_node == "llm"]
+        assert len(llm_edges) == 2
+        for edge in llm_edges:
+            assert len(edge.function_traces) == 1
+            assert edge.function_traces[0].return_value == f"reply to r{i}"
+
+def test_run_rejects_coroutine_nodes():
+    app = build_graph()
+    with pytest.raises(TypeError, match="arun"):
+        app.run({"request_id": "r0", "counter": 0, "path": ""})
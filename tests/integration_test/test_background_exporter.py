@@ -0,0 +1,131 @@
+import gc
+import json
+import threading
+import weakref
+import pytest
+from typing import TypedDict, Dict, List
+from orkes.graph.core import OrkesGraph
+from orkes.graph.schema import TracesSchema
+from orkes.graph.tracing import (
+    BackgroundTraceExporter,
+    FileTraceExporter,
+    InMemoryTraceExporter,
+    TraceExporter,
+    _live_exporters,
+)
+
+# Define the state
+class ExportState(TypedDict):
+    counter: int
+
+# Define node functions
+def step_node(state: ExportState) -> Dict:
+    state['counter'] += 1
+    return state
+
+def build_graph(sink):
+    workflow = OrkesGraph(state=ExportState, name="export_graph", trace_sink=sink)
+    workflow.add_node("step", step_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_edge("step", "END")
+    return workflow.compile()
+
+class SlowExporter(TraceExporter):
+    """Blocks every export until released, to simulate a slow backend."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.batches: List[List[TracesSchema]] = []
+
+    def export(self, traces: List[TracesSchema]) -> None:
+        self.release.wait(30)
+        self.batches.append(traces)
+
+def test_runs_are_exported_in_batches():
+    memory = InMemoryTraceExporter()
+    exporter = BackgroundTraceExporter(memory, batch_size=4, flush_interval=0.05)
+    app = build_graph(exporter)
+
+    run_ids = [app.run_with_context({"counter": 0}).run_id for _ in range(10)]
+    assert exporter.flush(timeout=5)
+    assert [t.run_id for t in memory.traces] == run_ids
+    assert exporter.exported == 10
+    assert exporter.dropped == 0
+    exporter.shutdown()
+
+def test_slow_exporter_never_blocks_runs():
+    slow = SlowExporter()
+    exporter = BackgroundTraceExporter(slow, max_queue_size=2, batch_size=1, flush_interval=0.01)
+    app = build_graph(exporter)
+
+    for _ in range(10):
+        app.run({"counter": 0})
+
+    # Every run finished while the first export was still blocked.
+    assert slow.batches == []
+    # One trace is held by the worker, two wait in the queue, the rest are dropped.
+    assert exporter.dropped >= 7
+    slow.release.set()
+    exporter.shutdown()
+    assert exporter.exported + exporter.dropped == 10
+
+def test_shutdown_flushes_pending_traces(tmp_path):
+    exporter = BackgroundTraceExporter(FileTraceExporter(str(tmp_path)), flush_interval=10)
+    app = build_graph(exporter)
+    run_id = app.run_with_context({"counter": 0}).run_id
+
+    exporter.shutdown()
+    with open(tmp_path / f"trace_{run_id}.json", encoding="utf-8") as f:
+        assert json.load(f)["status"] == "FINISHED"
+    assert not exporter.submit(app.trace)
+    assert exporter.dropped == 1
+
+def test_exporter_errors_are_counted():
+    class FailingExporter(TraceExporter):
+        def export(self, traces):
+            raise IOError("disk full")
+
+    exporter = BackgroundTraceExporter(FailingExporter(), flush_interval=0.01)
+    app = build_graph(exporter)
+    app.run({"counter": 0})
+
+    assert exporter.flush(timeout=5)
+    assert exporter.failed == 1
+    assert isinstance(exporter.last_error, IOError)
+    exporter.shutdown()
+
+def test_submits_racing_shutdown_are_exported_or_dropped():
+    memory = InMemoryTraceExporter()
+    exporter = BackgroundTraceExporter(memory, flush_interval=0.01)
+    app = build_graph(exporter)
+    trace = app.run_with_context({"counter": 0})
+    exporter.flush(timeout=5)
+    start = threading.Barrier(5)
+
+    def submit_many():
+        start.wait()
+        for _ in range(200):
+            exporter.submit(trace)
+
+    threads = [threading.Thread(target=submit_many) for _ in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    exporter.shutdown()
+    for t in threads:
+        t.join()
+
+    # No trace may be queued behind the stop marker and go uncounted.
+    assert exporter.exported + exporter.dropped == 801
+    assert len(memory.traces) == exporter.exported
+
+def test_shut_down_exporters_are_not_kept_alive():
+    exporter = BackgroundTraceExporter(InMemoryTraceExporter())
+    assert exporter in _live_exporters
+    exporter.shutdown()
+    assert exporter not in _live_exporters
+
+    ref = weakref.ref(exporter)
+    del exporter
+    gc.collect()
+    assert ref() is None
@@ -0,0 +1,87 @@
+import time
+import asyncio
+import pytest
+from typing import TypedDict, Dict
+from concurrent.futures import ThreadPoolExecutor
+from orkes.graph.core import OrkesGraph
+
+ITEM_DELAY = 0.05
+
+# Define the state
+class EvalState(TypedDict):
+    question: int
+    answer: int
+
+# Define node functions
+def answer_node(state: EvalState) -> Dict:
+    time.sleep(ITEM_DELAY)
+    if state['question'] == 3:
+        raise ValueError("cannot answer question 3")
+    state['answer'] = state['question'] * 2
+    return state
+
+async def async_answer_node(state: EvalState) -> Dict:
+    await asyncio.sleep(ITEM_DELAY)
+    if state['question'] == 3:
+        raise ValueError("cannot answer question 3")
+    state['answer'] = state['question'] * 2
+    return state
+
+def build_graph(node, traced: bool = True):
+    workflow = OrkesGraph(state=EvalState, name="eval_graph", traced=traced)
+    workflow.add_node("answer", node)
+    workflow.add_edge(workflow.START, "answer")
+    workflow.add_edge("answer", workflow.END)
+    return workflow.compile()
+
+def check_results(results, num_items):
+    assert [result.index for result in results] == list(range(num_items))
+    for result in results:
+        if result.index == 3:
+            assert result.status == "FAILED"
+            assert isinstance(result.error, ValueError)
+            assert result.state is None
+        elif result.index == 5:
+            # Rejected before running: unknown state key.
+            assert result.status == "FAILED"
+            assert isinstance(result.error, KeyError)
+            assert result.run_id is None
+        else:
+            assert result.status == "FINISHED"
+            assert result.error is None
+            assert result.state["answer"] == result.index * 2
+
+def make_states(num_items):
+    states = [{"question": i, "answer": 0} for i in range(num_items)]
+    states[5] = {"question": 5, "unknown": 0}
+    return states
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_run_batch_in_input_order(traced):
+    app = build_graph(answer_node, traced=traced)
+    num_items = 40
+
+    start = time.perf_counter()
+    results = app.run_batch(make_states(num_items), max_concurrency=10)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < num_items * ITEM_DELAY / 2
+    check_results(results, num_items)
+    if traced:
+        assert results[0].trace.status == "FINISHED"
+        assert results[3].trace.status == "FAILED"
+
+def test_iter_batch_with_custom_executor():
+    app = build_graph(answer_node, traced=False)
+    num_items = 20
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(app.iter_batch(iter(make_states(num_items)), max_concurrency=4, executor=executor))
+    assert sorted(result.index for result in results) == list(range(num_items))
+    check_results(sorted(results, key=lambda result: result.index), num_items)
+
+@pytest.mark.asyncio
+async def test_arun_batch():
+    app = build_graph(async_answer_node)
+    num_items = 40
+    results = await app.arun_batch(make_states(num_items), max_concurrency=20)
+    check_results(results, num_items)
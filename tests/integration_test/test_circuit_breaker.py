@@ -0,0 +1,84 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import pytest
+import requests
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.resilience import CircuitBreakerPolicy, CircuitOpenError, RetryPolicy
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, fallback: UniversalLLMClient = None) -> UniversalLLMClient:
+    config = LLMConfig(
+        api_key="EMPTY",
+        base_url=base_url,
+        model="test-model",
+        retry=RetryPolicy(max_retries=0),
+        circuit_breaker=CircuitBreakerPolicy(failure_rate=0.5, window=4, min_calls=4, cool_down=0.5),
+        fallback=fallback
+    )
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_open_circuit_fails_fast(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/flaky/{key}/4/503/v1") as client:
+        events = []
+        client.breaker.add_listener(lambda breaker, old, new: events.append(new))
+        for _ in range(4):
+            with pytest.raises(requests.HTTPError):
+                client.send_message(make_messages())
+        with pytest.raises(CircuitOpenError):
+            client.send_message(make_messages())
+        assert attempts(mock_server, key) == 4
+
+        # After the cool-down a trial call goes through and closes the circuit.
+        time.sleep(0.6)
+        client.send_message(make_messages())
+        assert events == ["open", "half_open", "closed"]
+        assert attempts(mock_server, key) == 5
+
+def test_open_circuit_routes_to_fallback(mock_server):
+    key = uuid.uuid4().hex
+    fallback_key = uuid.uuid4().hex
+    fallback = UniversalLLMClient(LLMConfig(api_key="EMPTY", base_url=f"{mock_server}/flaky/{fallback_key}/0/500/v1", model="test-model"), OpenAIStyleStrategy())
+    client = make_client(f"{mock_server}/flaky/{key}/100/500/v1", fallback)
+
+    async def main():
+        async with client, fallback:
+            for _ in range(4):
+                with pytest.raises(Exception):
+                    await client.asend_message(make_messages())
+            response = await client.asend_message(make_messages())
+            chunks = [chunk async for chunk in client.stream_message(make_messages())]
+            return response, chunks
+
+    response, chunks = asyncio.run(main())
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert "".join(chunks)
+    assert client.breaker.state == "open"
+    assert attempts(mock_server, key) == 4
+    assert attempts(mock_server, fallback_key) == 2
@@ -0,0 +1,124 @@
+import subprocess
+import time
+import os
+import sys
+import asyncio
+import gc
+import threading
+import warnings
+import pytest
+import requests
+from orkes.services.connectors import LLMFactory, LLMConfig, PoolConfig, UniversalLLMClient
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def connections_seen(server: str) -> int:
+    return requests.get(f"{server}/debug/connections").json()["count"]
+
+def reset_connections(server: str):
+    requests.delete(f"{server}/debug/connections")
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_send_message_reuses_connection(mock_server):
+    with LLMFactory.create_vllm(url=f"{mock_server}/v1", model="test-model") as client:
+        reset_connections(mock_server)
+        for _ in range(5):
+            response = client.send_message(make_messages())
+            assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+        assert connections_seen(mock_server) == 1
+    assert client._session is None
+
+@pytest.mark.asyncio
+async def test_stream_message_reuses_connection(mock_server):
+    async with LLMFactory.create_vllm(url=f"{mock_server}/v1", model="test-model") as client:
+        reset_connections(mock_server)
+        for _ in range(3):
+            chunks = [chunk async for chunk in client.stream_message(make_messages())]
+            assert "Hello from OpenAI/vLLM" in "".join(chunks)
+        assert connections_seen(mock_server) == 1
+        session = client._get_async_session()
+    assert session.closed
+
+def test_async_pool_per_event_loop(mock_server):
+    client = LLMFactory.create_vllm(url=f"{mock_server}/v1", model="test-model")
+
+    async def stream():
+        session = client._get_async_session()
+        content = "".join([chunk async for chunk in client.stream_message(make_messages())])
+        await client.aclose()
+        return session, content
+
+    # Each asyncio.run uses a new loop, which must get a session of its own.
+    first_session, first = asyncio.run(stream())
+    second_session, second = asyncio.run(stream())
+    assert "Hello from OpenAI/vLLM" in first and "Hello from OpenAI/vLLM" in second
+    assert first_session is not second_session
+    assert first_session.closed and second_session.closed
+
+def test_finished_event_loops_release_their_pools(mock_server):
+    client = LLMFactory.create_vllm(url=f"{mock_server}/v1", model="test-model")
+
+    async def send():
+        await client.asend_message(make_messages())
+        return client._get_async_session()
+
+    # Without aclose, each session is closed as its asyncio.run loop shuts down.
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        sessions = [asyncio.run(send()) for _ in range(5)]
+        gc.collect()
+    assert all(session.closed for session in sessions)
+    assert len(client._async_sessions) <= 1
+    assert not [w for w in caught if issubclass(w.category, ResourceWarning)]
+    asyncio.run(send())
+    assert len(client._async_sessions) == 1
+    client.close()
+
+def test_threads_share_a_client_across_loops(mock_server):
+    client = LLMFactory.create_vllm(url=f"{mock_server}/v1", model="test-model")
+    errors = []
+
+    async def send():
+        await client.asend_message(make_messages())
+
+    # Each thread's loops add sessions while the others prune theirs.
+    def worker():
+        try:
+            for _ in range(5):
+                asyncio.run(send())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    client.close()
+    assert errors == []
+    assert client._async_sessions == {}
+
+def test_read_timeout_is_applied(mock_server):
+    config = LLMConfig(api_key="EMPTY", base_url=f"{mock_server}/v1", model="test-model",
+                       pool=PoolConfig(read_timeout=0.01))
+    client = UniversalLLMClient(config, OpenAIStyleStrategy())
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.send_message(make_messages())
+    client.close()
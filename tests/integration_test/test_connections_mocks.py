@@ -168,3 +168,61 @@ async def test_gemini_tool_calling_mock(mock_server):
 
     assert tool_name == "get_weather"
     assert "San Francisco" in str(tool_arguments)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider", ["openai", "gemini", "anthropic"])
+async def test_asend_message_matches_send_message(mock_server, provider):
+    if provider == "openai":
+        client = LLMFactory.create_vllm(url=f"{mock_server}/v1", model="meta-llama/Llama-2-7b-chat-hf")
+    elif provider == "gemini":
+        client = LLMFactory.create_gemini(api_key="test-key", model="gemini-pro", base_url=f"{mock_server}/v1beta")
+    else:
+        client = LLMFactory.create_anthropic(api_key="test-key", base_url=f"{mock_server}/v1")
+
+    messages = OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+    async with client:
+        sync_response = client.send_message(messages)
+        async_response = await client.asend_message(messages)
+    assert async_response == sync_response
+
+@pytest.mark.asyncio
+async def test_asend_message_runs_concurrently_and_is_traced(mock_server):
+    from typing import TypedDict
+    from orkes.graph.core import OrkesGraph
+
+    client = LLMFactory.create_vllm(url=f"{mock_server}/v1", model="meta-llama/Llama-2-7b-chat-hf")
+
+    class ChatState(TypedDict):
+        reply: str
+
+    # The calls in flight, and the most seen at once.
+    in_flight = {"now": 0, "peak": 0}
+
+    async def llm_node(state: ChatState) -> ChatState:
+        messages = OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        try:
+            response = await client.asend_message(messages)
+        finally:
+            in_flight["now"] -= 1
+        state['reply'] = response['content']['content']
+        return state
+
+    graph = OrkesGraph(state=ChatState, name="async_llm_graph")
+    graph.add_node("llm", llm_node)
+    graph.add_edge(graph.START, "llm")
+    graph.add_edge("llm", graph.END)
+    app = graph.compile()
+
+    # Each call waits 0.1s on the server, so a call blocking the loop would
+    # finish before the next one starts.
+    import asyncio
+    contexts = await asyncio.gather(*(app.arun_with_context({"reply": ""}) for _ in range(20)))
+    await client.aclose()
+
+    assert in_flight["peak"] > 1
+    for ctx in contexts:
+        assert "Hello from OpenAI/vLLM" in ctx.graph_state['reply']
+        llm_traces = [t for edge in ctx.trace.edges_trace for t in edge.llm_traces]
+        assert len(llm_traces) == 1
@@ -0,0 +1,44 @@
+import time
+from orkes.services.strategies import OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
+from orkes.shared.schema import OrkesConversation, OrkesMessagesSchema, OrkesMessageSchema
+
+NUM_TURNS = 200
+
+def make_turn(i: int) -> OrkesMessageSchema:
+    return OrkesMessageSchema(role="user" if i % 2 == 0 else "assistant", content=f"Turn {i}: " + "lorem ipsum dolor sit amet " * 10)
+
+def test_payload_build_time_over_a_session():
+    """Builds the payload of every turn of a session, from plain messages and from a conversation."""
+    for strategy in (OpenAIStyleStrategy(), AnthropicStrategy(), GoogleGeminiStrategy()):
+        history = []
+        start = time.perf_counter()
+        for i in range(NUM_TURNS):
+            history.append(make_turn(i))
+            plain = strategy.prepare_payload("test-model", OrkesMessagesSchema(messages=history), stream=False, settings={})
+        plain_elapsed = time.perf_counter() - start
+
+        # Counts the messages encoded, which the conversation keeps to the new ones.
+        encode_message = strategy.encode_message
+        encoded = []
+        def spy(message: OrkesMessageSchema):
+            encoded.append(message)
+            return encode_message(message)
+        strategy.encode_message = spy
+
+        conversation = OrkesConversation(messages=[])
+        start = time.perf_counter()
+        for i in range(NUM_TURNS):
+            turn = make_turn(i)
+            conversation.append(turn)
+            cached = strategy.prepare_payload("test-model", conversation, stream=False, settings={})
+            assert encoded == [turn]
+            encoded.clear()
+        cached_elapsed = time.perf_counter() - start
+
+        print("\n" + "=" * 50)
+        print(f"{type(strategy).__name__}, {NUM_TURNS} turns")
+        print(f"OrkesMessagesSchema:  {plain_elapsed:.4f}s")
+        print(f"OrkesConversation:    {cached_elapsed:.4f}s")
+        print("=" * 50)
+
+        assert cached == plain
@@ -0,0 +1,64 @@
+import time
+import pytest
+from typing import TypedDict, Dict, List
+from orkes.graph.core import OrkesGraph
+
+NUM_EXTRA_KEYS = 500
+LOOP_STEPS = 2_000
+
+# Define the state: a small counter next to many large keys.
+WideState = TypedDict("WideState", {
+    "counter": int,
+    "messages": List[str],
+    **{f"context_{i}": str for i in range(NUM_EXTRA_KEYS)},
+})
+
+# Define node functions
+def step_node(state: WideState) -> Dict:
+    state['counter'] += 1
+    return state
+
+def summarize_node(state: WideState) -> Dict:
+    # Returning a partial update must keep working with copy-on-write.
+    return {"messages": state['messages'] + [f"done after {state['counter']}"]}
+
+def should_loop(state: WideState) -> str:
+    if state['counter'] < LOOP_STEPS:
+        return "LOOP"
+    return "END"
+
+def build_graph(copy_on_write: bool):
+    workflow = OrkesGraph(state=WideState, name="wide_graph", traced=False, copy_on_write=copy_on_write)
+    workflow.add_node("step", step_node)
+    workflow.add_node("summarize", summarize_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_conditional_edge("step", should_loop, {
+        "LOOP": "step",
+        "END": "summarize"
+    }, max_passes=LOOP_STEPS)
+    workflow.add_edge("summarize", workflow.END)
+    return workflow.compile()
+
+def make_state():
+    state = {"counter": 0, "messages": ["hello"] * 1000}
+    state.update({f"context_{i}": "x" * 100 for i in range(NUM_EXTRA_KEYS)})
+    return state
+
+def test_copy_on_write_matches_shallow_copy():
+    timings = {}
+    results = {}
+    for copy_on_write in (False, True):
+        app = build_graph(copy_on_write)
+        start = time.perf_counter()
+        results[copy_on_write] = app.run(make_state())
+        timings[copy_on_write] = time.perf_counter() - start
+
+    print("\n" + "=" * 50)
+    print(f"{LOOP_STEPS} steps over a {NUM_EXTRA_KEYS + 2}-key state")
+    print(f"Shallow copy per step:   {timings[False]:.4f}s")
+    print(f"Copy-on-write per step:  {timings[True]:.4f}s")
+    print("=" * 50)
+
+    assert results[True] == results[False]
+    assert results[True]["counter"] == LOOP_STEPS
+    assert results[True]["messages"][-1] == f"done after {LOOP_STEPS}"
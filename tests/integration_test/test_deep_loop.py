@@ -0,0 +1,64 @@
+import sys
+import time
+import pytest
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+
+LOOP_STEPS = 10_000
+
+# Define the state
+class DeepLoopState(TypedDict):
+    counter: int
+    max_depth: int
+
+def _stack_depth() -> int:
+    depth = 0
+    frame = sys._getframe()
+    while frame is not None:
+        depth += 1
+        frame = frame.f_back
+    return depth
+
+# Define node functions
+def step_node(state: DeepLoopState) -> Dict:
+    state['counter'] += 1
+    state['max_depth'] = max(state['max_depth'], _stack_depth())
+    return state
+
+def should_loop(state: DeepLoopState) -> str:
+    if state['counter'] < LOOP_STEPS:
+        return "LOOP"
+    return "END"
+
+def build_loop_graph(traced: bool):
+    workflow = OrkesGraph(state=DeepLoopState, name="deep_loop_graph", traced=traced)
+    workflow.add_node("step", step_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_conditional_edge("step", should_loop, {
+        "LOOP": "step",
+        "END": "END"
+    }, max_passes=LOOP_STEPS)
+    return workflow.compile()
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_deep_loop_runs_in_constant_stack_depth(traced):
+    """
+    Runs a 10k-step loop, far beyond what the recursive traversal could reach
+    before hitting the interpreter recursion limit, and checks that the stack
+    never grows with the number of steps.
+    """
+    assert LOOP_STEPS > sys.getrecursionlimit()
+
+    app = build_loop_graph(traced)
+    start = time.perf_counter()
+    final_state = app.run({"counter": 0, "max_depth": 0})
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{LOOP_STEPS} steps (traced={traced}): {elapsed:.4f}s "
+          f"({elapsed / LOOP_STEPS * 1_000_000:.2f}us/step)")
+
+    assert final_state["counter"] == LOOP_STEPS
+    # The depth seen by the node must not depend on the step count.
+    assert final_state["max_depth"] < _stack_depth() + 50
+    if traced:
+        assert len(app.trace.edges_trace) == LOOP_STEPS + 1
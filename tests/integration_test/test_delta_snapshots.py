@@ -0,0 +1,89 @@
+import json
+import pytest
+from typing import TypedDict, Dict, List
+from orkes.graph.core import OrkesGraph
+from orkes.visualizer.generator import TraceInspector
+
+LOOP_STEPS = 200
+
+# Define the state
+class DeltaState(TypedDict):
+    counter: int
+    history: List[int]
+    payload: str
+    scratch: str
+
+# Define node functions
+def step_node(state: DeltaState) -> Dict:
+    state['counter'] += 1
+    if state['counter'] % 50 == 0:
+        state['history'] = state['history'] + [state['counter']]
+    if state['counter'] % 2:
+        state['scratch'] = f"odd {state['counter']}"
+    return state
+
+def should_loop(state: DeltaState) -> str:
+    if state['counter'] < LOOP_STEPS:
+        return "LOOP"
+    return "END"
+
+def build_graph(snapshot_mode: str):
+    workflow = OrkesGraph(state=DeltaState, name="delta_graph", snapshot_mode=snapshot_mode)
+    workflow.add_node("step", step_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_conditional_edge("step", should_loop, {
+        "LOOP": "step",
+        "END": "END"
+    }, max_passes=LOOP_STEPS)
+    return workflow.compile()
+
+def initial_state() -> Dict:
+    return {"counter": 0, "history": [], "payload": "x" * 10_000}
+
+def test_delta_trace_rebuilds_full_snapshots():
+    """
+    Runs the same loop in both snapshot modes and checks that the delta trace
+    rebuilds exactly the state recorded by the full trace at every edge, while
+    serializing to a fraction of the size.
+    """
+    full_app = build_graph("full")
+    full_app.run(initial_state())
+    delta_app = build_graph("delta")
+    delta_app.run(initial_state())
+
+    full_trace, delta_trace = full_app.trace, delta_app.trace
+    assert delta_trace.snapshot_mode == "delta"
+    assert delta_trace.initial_state == initial_state()
+    assert len(delta_trace.edges_trace) == len(full_trace.edges_trace) == LOOP_STEPS + 1
+
+    for edge in full_trace.edges_trace:
+        assert delta_trace.rebuild_state(edge.edge_run_number) == edge.state_snapshot
+        assert full_trace.rebuild_state(edge.edge_run_number) == edge.state_snapshot
+
+    # The large, never-rebound payload is only stored once.
+    deltas = [edge.state_delta for edge in delta_trace.edges_trace]
+    assert all("payload" not in d.changed for d in deltas)
+    assert any("scratch" in d.added for d in deltas)
+
+    full_size = len(full_trace.model_dump_json())
+    delta_size = len(delta_trace.model_dump_json())
+    print(f"\ntrace size: full={full_size} bytes, delta={delta_size} bytes")
+    assert delta_size * 10 < full_size
+
+    with pytest.raises(KeyError):
+        delta_trace.rebuild_state(LOOP_STEPS + 10)
+
+def test_inspector_expands_delta_trace():
+    app = build_graph("delta")
+    app.run(initial_state())
+    data = json.loads(app.trace.model_dump_json())
+
+    edges = TraceInspector()._expand_state_deltas(data)
+    last = max(edges, key=lambda et: et["edge_run_number"])
+    assert last["state_snapshot"] == app.trace.rebuild_state(last["edge_run_number"])
+    assert "state_delta" not in last
+    TraceInspector().generate_html(data)
+
+def test_invalid_snapshot_mode_is_rejected():
+    with pytest.raises(ValueError):
+        OrkesGraph(state=DeltaState, snapshot_mode="partial")
@@ -0,0 +1,97 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import pytest
+import requests
+from types import SimpleNamespace
+from orkes.services.balancer import LoadBalancedLLMClient
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.resilience import HedgePolicy
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.context import edge_trace_var
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, hedge: HedgePolicy = None) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", hedge=hedge)
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_slow_call_is_hedged(mock_server):
+    key = uuid.uuid4().hex
+    client = make_client(f"{mock_server}/straggler/{key}/3/v1", HedgePolicy(initial_delay=0.3))
+    edge_trace = SimpleNamespace(llm_traces=[])
+
+    async def main():
+        edge_trace_var.set(edge_trace)
+        async with client:
+            return await client.asend_message(make_messages())
+
+    start = time.monotonic()
+    response = asyncio.run(main())
+    assert time.monotonic() - start < 2
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert attempts(mock_server, key) == 2
+    assert edge_trace.llm_traces[0].hedges == 1
+    assert client.hedger.wins == 1
+    assert client.limiter is None
+
+def test_slow_stream_start_is_hedged(mock_server):
+    key = uuid.uuid4().hex
+    client = make_client(f"{mock_server}/straggler/{key}/3/v1", HedgePolicy(initial_delay=0.3))
+
+    async def main():
+        async with client:
+            return [chunk async for chunk in client.stream_message(make_messages())]
+
+    start = time.monotonic()
+    chunks = asyncio.run(main())
+    assert time.monotonic() - start < 2
+    assert "".join(chunks)
+    assert attempts(mock_server, key) == 2
+
+def test_balancer_hedges_to_another_replica(mock_server):
+    balancer = LoadBalancedLLMClient(
+        [make_client(f"{mock_server}/slow/3/v1"), make_client(f"{mock_server}/v1")],
+        hedge=HedgePolicy(initial_delay=0.3)
+    )
+    edge_trace = SimpleNamespace(llm_traces=[])
+
+    async def main():
+        edge_trace_var.set(edge_trace)
+        async with balancer:
+            response = await balancer.asend_message(make_messages())
+            chunks = [chunk async for chunk in balancer.stream_message(make_messages())]
+            return response, chunks
+
+    start = time.monotonic()
+    response, chunks = asyncio.run(main())
+    assert time.monotonic() - start < 2
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert "".join(chunks)
+    assert [trace.hedges for trace in edge_trace.llm_traces] == [1, 1]
+    stats = balancer.stats()
+    assert all(replica["outstanding"] == 0 for replica in stats.values())
+    assert stats[f"{mock_server}/slow/3/v1"]["failures"] == 0
@@ -0,0 +1,92 @@
+import json
+import pytest
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+from orkes.graph.schema import TracePolicy
+from orkes.graph.tracing import JsonlTraceSink, read_jsonl_trace
+from orkes.visualizer.generator import TraceInspector
+
+LOOP_STEPS = 50
+
+# Define the state
+class SinkState(TypedDict):
+    counter: int
+    fail_at: int
+
+# Define node functions
+def step_node(state: SinkState) -> Dict:
+    state['counter'] += 1
+    if state['counter'] == state['fail_at']:
+        raise RuntimeError("node failed")
+    return state
+
+def should_loop(state: SinkState) -> str:
+    if state['counter'] < LOOP_STEPS:
+        return "LOOP"
+    return "END"
+
+def build_graph(sink, traced=True, snapshot_mode="full"):
+    workflow = OrkesGraph(state=SinkState, name="sink_graph", traced=traced,
+                          snapshot_mode=snapshot_mode, trace_sink=sink)
+    workflow.add_node("step", step_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_conditional_edge("step", should_loop, {
+        "LOOP": "step",
+        "END": "END"
+    }, max_passes=LOOP_STEPS)
+    return workflow.compile()
+
+@pytest.mark.parametrize("snapshot_mode", ["full", "delta"])
+def test_jsonl_sink_streams_full_trace(tmp_path, snapshot_mode):
+    sink = JsonlTraceSink(traces_dir=str(tmp_path))
+    app = build_graph(sink, snapshot_mode=snapshot_mode)
+    app.run({"counter": 0, "fail_at": -1})
+
+    path = sink.path_for(app.run_id)
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line)["record"] for line in f]
+    assert records[0] == "header"
+    assert records[-1] == "footer"
+    assert records.count("edge") == LOOP_STEPS + 1
+
+    data = read_jsonl_trace(path)
+    assert data == json.loads(app.trace.model_dump_json(exclude={"sampled"}))
+
+    html = TraceInspector().generate_html(path)
+    assert "sink_graph" in html
+
+def test_jsonl_sink_keeps_edges_of_failed_run(tmp_path):
+    sink = JsonlTraceSink(traces_dir=str(tmp_path))
+    app = build_graph(sink)
+    with pytest.raises(RuntimeError):
+        app.run({"counter": 0, "fail_at": 10})
+
+    data = read_jsonl_trace(sink.path_for(app.run_id))
+    assert data["status"] == "FAILED"
+    assert len(data["edges_trace"]) == 10
+
+def test_jsonl_sink_outlives_ring_buffer(tmp_path):
+    sink = JsonlTraceSink(traces_dir=str(tmp_path))
+    app = build_graph(sink, traced=TracePolicy(max_edges=5), snapshot_mode="delta")
+    app.run({"counter": 0, "fail_at": -1})
+
+    assert len(app.trace.edges_trace) == 5
+    data = read_jsonl_trace(sink.path_for(app.run_id))
+    assert len(data["edges_trace"]) == LOOP_STEPS + 1
+    assert data["dropped_edges"] == 0
+    assert data["initial_state"] == {"counter": 0, "fail_at": -1}
+
+def test_read_jsonl_trace_marks_truncated_run_incomplete(tmp_path):
+    sink = JsonlTraceSink(traces_dir=str(tmp_path))
+    app = build_graph(sink)
+    app.run({"counter": 0, "fail_at": -1})
+
+    path = sink.path_for(app.run_id)
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(lines[:-1])
+
+    data = read_jsonl_trace(path)
+    assert data["status"] == "INCOMPLETE"
+    assert len(data["edges_trace"]) == LOOP_STEPS + 1
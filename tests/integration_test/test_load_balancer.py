@@ -0,0 +1,96 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import pytest
+import requests
+from orkes.services.balancer import LoadBalancedLLMClient
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.resilience import RetryPolicy
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+# Nothing listens on this port, so requests to it fail to connect.
+DEAD_REPLICA = "http://localhost:8009/v1"
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", retry=RetryPolicy(max_retries=0))
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_requests_go_to_the_least_loaded_replica(mock_server):
+    keys = [uuid.uuid4().hex for _ in range(3)]
+    balancer = LoadBalancedLLMClient([make_client(f"{mock_server}/counted/{key}/0.3/v1") for key in keys])
+
+    async def main():
+        async with balancer:
+            await asyncio.gather(*(balancer.asend_message(make_messages()) for _ in range(6)))
+
+    asyncio.run(main())
+    assert [attempts(mock_server, key) for key in keys] == [2, 2, 2]
+    stats = balancer.stats()
+    assert all(replica["outstanding"] == 0 and replica["requests"] == 2 for replica in stats.values())
+    assert all(replica["latency"] >= 0.3 for replica in stats.values())
+
+@pytest.mark.parametrize("strategy", ["least_outstanding", "power_of_two"])
+def test_failing_replica_is_ejected_and_readmitted(mock_server, strategy):
+    key = uuid.uuid4().hex
+    with LoadBalancedLLMClient(
+        [make_client(DEAD_REPLICA), make_client(f"{mock_server}/counted/{key}/0/v1")],
+        strategy=strategy, max_failures=2, ejection_time=2.0
+    ) as balancer:
+        failures = 0
+        for _ in range(10):
+            try:
+                balancer.send_message(make_messages())
+            except requests.ConnectionError:
+                failures += 1
+        assert failures == 2
+        assert balancer.stats()[DEAD_REPLICA]["available"] is False
+        assert attempts(mock_server, key) == 8
+
+        time.sleep(2.1)
+        assert balancer.stats()[DEAD_REPLICA]["available"] is True
+
+def test_health_checks_keep_replicas_out_of_rotation(mock_server):
+    with LoadBalancedLLMClient([make_client(DEAD_REPLICA), make_client(f"{mock_server}/v1")], health_check_interval=0.1) as balancer:
+        time.sleep(0.5)
+        assert balancer.stats()[DEAD_REPLICA]["available"] is False
+        assert balancer.stats()[f"{mock_server}/v1"]["available"] is True
+        for _ in range(3):
+            balancer.send_message(make_messages())
+        assert balancer.stats()[DEAD_REPLICA]["requests"] == 0
+
+def test_passing_health_check_keeps_ejection(mock_server):
+    with LoadBalancedLLMClient([make_client(f"{mock_server}/v1"), make_client(f"{mock_server}/v1")], ejection_time=30.0) as balancer:
+        assert list(balancer.stats()) == [f"{mock_server}/v1", f"{mock_server}/v1#2"]
+        ejected = balancer.replicas[0]
+        ejected.ejected_until = time.monotonic() + 30.0
+        ejected.consecutive_failures = 3
+        assert balancer.health_check("/health") is True
+        # The endpoint answers its health check, but stays ejected for failing requests.
+        assert balancer.stats()[f"{mock_server}/v1"]["available"] is False
+        assert balancer.stats()[f"{mock_server}/v1#2"]["available"] is True
+        assert ejected.consecutive_failures == 3
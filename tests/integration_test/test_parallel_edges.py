@@ -0,0 +1,126 @@
+import time
+import asyncio
+import operator
+import pytest
+from typing import Annotated, TypedDict, Dict, List
+from orkes.graph.core import OrkesGraph
+
+BRANCH_DELAY = 0.2
+
+# Define the state
+class SearchState(TypedDict):
+    user_query: str
+    raw_results: Annotated[List[str], operator.add]
+    calls: Annotated[int, operator.add]
+    final_answer: str
+
+# Define node functions
+def planner_node(state: SearchState) -> Dict:
+    state['raw_results'] = ["plan"]
+    return state
+
+def make_search_node(name: str):
+    def search_node(state: SearchState) -> Dict:
+        time.sleep(BRANCH_DELAY)
+        return {"raw_results": [f"{name}:{state['user_query']}"], "calls": 1}
+    return search_node
+
+def make_async_search_node(name: str):
+    async def search_node(state: SearchState) -> Dict:
+        await asyncio.sleep(BRANCH_DELAY)
+        return {"raw_results": [f"{name}:{state['user_query']}"], "calls": 1}
+    return search_node
+
+def rank_node(state: SearchState) -> Dict:
+    return {"raw_results": [f"ranked"], "calls": 1}
+
+def synthesis_node(state: SearchState) -> Dict:
+    state['final_answer'] = " | ".join(state['raw_results'])
+    return state
+
+def build_graph(node_factory, traced: bool = True, copy_on_write: bool = False):
+    workflow = OrkesGraph(state=SearchState, name="parallel_graph", traced=traced, copy_on_write=copy_on_write)
+    workflow.add_node("planner", planner_node)
+    for name in ("web", "news", "docs"):
+        workflow.add_node(name, node_factory(name))
+    workflow.add_node("rank", rank_node)
+    workflow.add_node("synthesis", synthesis_node)
+    workflow.add_edge(workflow.START, "planner")
+    workflow.add_parallel_edge("planner", ["web", "news", "docs"], "synthesis")
+    workflow.add_edge("web", "synthesis")
+    workflow.add_edge("news", "synthesis")
+    # A branch may span several nodes before reaching the join node.
+    workflow.add_edge("docs", "rank")
+    workflow.add_edge("rank", "synthesis")
+    workflow.add_edge("synthesis", workflow.END)
+    return workflow.compile()
+
+EXPECTED_RESULTS = ["plan", "web:q", "news:q", "docs:q", "ranked"]
+
+@pytest.mark.parametrize("traced", [False, True])
+def test_parallel_branches_run_concurrently(traced):
+    app = build_graph(make_search_node, traced=traced)
+
+    start = time.perf_counter()
+    final_state = app.run({"user_query": "q", "raw_results": [], "calls": 0, "final_answer": ""})
+    elapsed = time.perf_counter() - start
+
+    # Three branches of BRANCH_DELAY each would take 3x as long serially.
+    assert elapsed < BRANCH_DELAY * 2
+    assert final_state["raw_results"] == EXPECTED_RESULTS
+    assert final_state["calls"] == 4
+    assert final_state["final_answer"] == " | ".join(EXPECTED_RESULTS)
+
+    if traced:
+        executed_nodes = sorted(edge.from_node for edge in app.trace.edges_trace)
+        assert executed_nodes == sorted(["START", "planner", "web", "news", "docs", "rank", "synthesis"])
+        parallel_edge = next(edge for edge in app.trace.edges_trace if edge.from_node == "planner")
+        assert parallel_edge.meta["branches"] == ["web", "news", "docs"]
+
+@pytest.mark.asyncio
+async def test_parallel_branches_with_arun():
+    app = build_graph(make_async_search_node)
+
+    start = time.perf_counter()
+    final_state = await app.arun({"user_query": "q", "raw_results": [], "calls": 0, "final_answer": ""})
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < BRANCH_DELAY * 2
+    assert final_state["raw_results"] == EXPECTED_RESULTS
+    assert final_state["calls"] == 4
+
+def test_every_node_of_a_branch_is_reduced_with_copy_on_write():
+    initial = {"user_query": "q", "raw_results": [], "calls": 0, "final_answer": ""}
+    final_state = build_graph(make_search_node, copy_on_write=True).run(dict(initial))
+    assert (final_state["raw_results"], final_state["calls"]) == (EXPECTED_RESULTS, 4)
+    final_state = asyncio.run(build_graph(make_async_search_node, copy_on_write=True).arun(dict(initial)))
+    assert (final_state["raw_results"], final_state["calls"]) == (EXPECTED_RESULTS, 4)
+
+class ConflictState(TypedDict):
+    answer: str
+
+def write_a(state: ConflictState) -> Dict:
+    return {"answer": "a"}
+
+def write_b(state: ConflictState) -> Dict:
+    return {"answer": "b"}
+
+def test_conflicting_branch_writes_without_reducer():
+    workflow = OrkesGraph(state=ConflictState, traced=False)
+    workflow.add_node("a", write_a)
+    workflow.add_node("b", write_b)
+    workflow.add_parallel_edge(workflow.START, ["a", "b"], workflow.END)
+    workflow.add_edge("a", workflow.END)
+    workflow.add_edge("b", workflow.END)
+    app = workflow.compile()
+
+    with pytest.raises(ValueError, match="answer"):
+        app.run({"answer": ""})
+
+def test_parallel_edge_validation():
+    workflow = OrkesGraph(state=ConflictState)
+    workflow.add_node("a", write_a)
+    with pytest.raises(ValueError):
+        workflow.add_parallel_edge(workflow.START, ["a"], workflow.END)
+    with pytest.raises(ValueError):
+        workflow.add_parallel_edge(workflow.START, ["a", "missing"], workflow.END)
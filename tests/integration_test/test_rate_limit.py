@@ -0,0 +1,81 @@
+import subprocess
+import time
+import os
+import sys
+import asyncio
+import threading
+import pytest
+from types import SimpleNamespace
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.resilience import RateLimitConfig
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.context import edge_trace_var
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, rate_limit: RateLimitConfig) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", rate_limit=rate_limit)
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_concurrency_limit_queues_async_calls(mock_server):
+    client = make_client(f"{mock_server}/slow/0.3/v1", RateLimitConfig(max_concurrency=2))
+    # The slots held right after each call is let through.
+    held = []
+    aacquire = client.limiter.aacquire
+    async def spy(*args, **kwargs):
+        wait = await aacquire(*args, **kwargs)
+        held.append(client.limiter.in_flight)
+        return wait
+    client.limiter.aacquire = spy
+
+    async def call():
+        edge_trace = SimpleNamespace(llm_traces=[])
+        edge_trace_var.set(edge_trace)
+        await client.asend_message(make_messages())
+        return edge_trace.llm_traces[0].limiter_wait
+
+    async def main():
+        try:
+            return await asyncio.gather(*(call() for _ in range(4)))
+        finally:
+            await client.aclose()
+
+    start = time.monotonic()
+    waits = asyncio.run(main())
+    assert time.monotonic() - start >= 0.6
+    # Never more than two calls in flight; two of them waited for a slot.
+    assert len(held) == 4 and max(held) == 2
+    assert sorted(waits)[2] >= 0.25
+    assert client.limiter.in_flight == 0
+
+def test_shared_limit_spans_clients_and_sync_calls(mock_server):
+    limit = RateLimitConfig(max_concurrency=1, shared=True)
+    clients = [make_client(f"{mock_server}/slow/0.2/v1", limit) for _ in range(3)]
+    assert clients[0].limiter is clients[1].limiter
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=client.send_message, args=(make_messages(),)) for client in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert time.monotonic() - start >= 0.6
+    for client in clients:
+        client.close()
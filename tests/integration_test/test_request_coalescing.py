@@ -0,0 +1,74 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import threading
+import pytest
+import requests
+from types import SimpleNamespace
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.context import edge_trace_var
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", coalesce=True)
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages(content: str = "Hello!") -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content=content)])
+
+def test_identical_async_calls_share_one_request(mock_server):
+    key = uuid.uuid4().hex
+    client = make_client(f"{mock_server}/counted/{key}/0.3/v1")
+
+    async def call(content):
+        edge_trace = SimpleNamespace(llm_traces=[])
+        edge_trace_var.set(edge_trace)
+        response = await client.asend_message(make_messages(content))
+        return response, edge_trace.llm_traces[0].coalesced
+
+    async def main():
+        async with client:
+            return await asyncio.gather(*(call("Hello!") for _ in range(5)), call("Different"))
+
+    results = asyncio.run(main())
+    assert attempts(mock_server, key) == 2
+    assert sorted(coalesced for _, coalesced in results[:5]) == [False, True, True, True, True]
+    assert results[5][1] is False
+    assert all(response == results[0][0] for response, _ in results[:5])
+    assert client.flights.coalesced == 4
+
+def test_identical_sync_calls_share_one_request(mock_server):
+    key = uuid.uuid4().hex
+    responses = []
+    with make_client(f"{mock_server}/counted/{key}/0.3/v1") as client:
+        threads = [threading.Thread(target=lambda: responses.append(client.send_message(make_messages()))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # Once the flight has landed, the next call is sent again.
+        client.send_message(make_messages())
+    assert len(responses) == 4
+    assert attempts(mock_server, key) == 2
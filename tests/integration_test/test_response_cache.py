@@ -0,0 +1,74 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import pytest
+import requests
+from types import SimpleNamespace
+from orkes.services.cache import InMemoryResponseCache, SQLiteResponseCache
+from orkes.services.connectors import LLMConfig, UniversalLLMClient
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.context import edge_trace_var
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, cache) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", cache=cache)
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages(content: str = "Hello!") -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content=content)])
+
+def test_repeated_calls_are_served_from_cache(mock_server):
+    key = uuid.uuid4().hex
+    cache = InMemoryResponseCache()
+    edge_trace = SimpleNamespace(llm_traces=[])
+    token = edge_trace_var.set(edge_trace)
+    try:
+        with make_client(f"{mock_server}/flaky/{key}/0/500/v1", cache) as client:
+            first = client.send_message(make_messages())
+            second = client.send_message(make_messages())
+            client.send_message(make_messages("Something else"))
+    finally:
+        edge_trace_var.reset(token)
+
+    assert first == second
+    assert attempts(mock_server, key) == 2
+    assert [trace.cache_hit for trace in edge_trace.llm_traces] == [False, True, False]
+    assert cache.stats() == {"hits": 1, "misses": 2, "evictions": 0}
+
+def test_async_calls_share_the_cache(mock_server, tmp_path):
+    key = uuid.uuid4().hex
+    cache = SQLiteResponseCache(str(tmp_path / "cache.sqlite"))
+    base_url = f"{mock_server}/flaky/{key}/0/500/v1"
+    with make_client(base_url, cache) as client:
+        client.send_message(make_messages())
+
+    async def main():
+        async with make_client(base_url, cache) as client:
+            return await client.asend_message(make_messages())
+
+    response = asyncio.run(main())
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert attempts(mock_server, key) == 1
+    assert cache.hits == 1
+    cache.close()
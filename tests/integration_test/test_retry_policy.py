@@ -0,0 +1,164 @@
+import subprocess
+import time
+import os
+import sys
+import uuid
+import asyncio
+import pytest
+import requests
+from orkes.services.connectors import LLMConfig, PoolConfig, UniversalLLMClient
+from orkes.services.resilience import RetryPolicy, RateLimitConfig
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, pool: PoolConfig = None, **policy) -> UniversalLLMClient:
+    policy.setdefault("backoff_base", 0.01)
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model", pool=pool, retry=RetryPolicy(**policy))
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def attempts(server: str, key: str) -> int:
+    return requests.get(f"{server}/debug/attempts/{key}").json()["count"]
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def test_retries_server_errors_until_success(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/flaky/{key}/2/503/v1") as client:
+        response = client.send_message(make_messages())
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert attempts(mock_server, key) == 3
+
+def test_gives_up_after_max_retries(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/flaky/{key}/5/500/v1", max_retries=2) as client:
+        with pytest.raises(requests.HTTPError):
+            client.send_message(make_messages())
+    assert attempts(mock_server, key) == 3
+
+def test_client_errors_are_not_retried(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/flaky/{key}/1/400/v1") as client:
+        with pytest.raises(requests.HTTPError):
+            client.send_message(make_messages())
+    assert attempts(mock_server, key) == 1
+
+def test_retry_after_is_honored(mock_server):
+    key = uuid.uuid4().hex
+    # The jittered backoff would be at most 0.01s; Retry-After asks for 0.05s.
+    with make_client(f"{mock_server}/flaky/{key}/2/429/v1") as client:
+        start = time.perf_counter()
+        client.send_message(make_messages())
+        elapsed = time.perf_counter() - start
+    assert elapsed >= 0.1
+    assert attempts(mock_server, key) == 3
+
+def test_retry_budget_limits_retries(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/flaky/{key}/5/503/v1", max_retries=5, budget_max=1, budget_ratio=0) as client:
+        with pytest.raises(requests.HTTPError):
+            client.send_message(make_messages())
+        assert attempts(mock_server, key) == 2
+        # The budget is spent, so the next call is not retried at all.
+        with pytest.raises(requests.HTTPError):
+            client.send_message(make_messages())
+    assert attempts(mock_server, key) == 3
+
+def test_total_timeout_bounds_sync_call(mock_server):
+    with make_client(f"{mock_server}/slow/2/v1", total_timeout=0.3) as client:
+        start = time.perf_counter()
+        with pytest.raises(requests.Timeout):
+            client.send_message(make_messages())
+    assert time.perf_counter() - start < 1
+
+def test_total_timeout_bounds_sync_body(mock_server):
+    # Every read of the body is quick, but the whole body takes seconds.
+    with make_client(f"{mock_server}/dripping/0.1/v1", total_timeout=0.5) as client:
+        start = time.perf_counter()
+        with pytest.raises(requests.Timeout):
+            client.send_message(make_messages())
+    assert time.perf_counter() - start < 1
+
+def test_total_timeout_bounds_limiter_wait(mock_server):
+    config = LLMConfig(api_key="EMPTY", base_url=f"{mock_server}/v1", model="test-model",
+                       retry=RetryPolicy(total_timeout=0.3), rate_limit=RateLimitConfig(max_concurrency=1))
+    with UniversalLLMClient(config, OpenAIStyleStrategy()) as client:
+        client.limiter.acquire()
+        start = time.perf_counter()
+        with pytest.raises(requests.Timeout):
+            client.send_message(make_messages())
+        assert time.perf_counter() - start < 1
+
+        async def main():
+            with pytest.raises(asyncio.TimeoutError):
+                await client.asend_message(make_messages())
+            await client.aclose()
+
+        asyncio.run(main())
+        client.limiter.release()
+        assert client.limiter.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_total_timeout_bounds_async_call(mock_server):
+    async with make_client(f"{mock_server}/slow/2/v1", total_timeout=0.3) as client:
+        start = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await client.asend_message(make_messages())
+    assert time.perf_counter() - start < 1
+
+@pytest.mark.asyncio
+async def test_asend_message_retries(mock_server):
+    key = uuid.uuid4().hex
+    async with make_client(f"{mock_server}/flaky/{key}/2/502/v1") as client:
+        response = await client.asend_message(make_messages())
+    assert "Hello from OpenAI/vLLM" in response["content"]["content"]
+    assert attempts(mock_server, key) == 3
+
+@pytest.mark.asyncio
+async def test_stream_is_not_retried_once_answered(mock_server):
+    key = uuid.uuid4().hex
+    # The server answered, so it may be generating; sending again could bill twice.
+    async with make_client(f"{mock_server}/stalled/{key}/1/0/v1", pool=PoolConfig(read_timeout=0.3)) as client:
+        with pytest.raises(asyncio.TimeoutError):
+            [chunk async for chunk in client.stream_message(make_messages())]
+    assert attempts(mock_server, key) == 1
+
+def test_read_timeouts_are_not_retried(mock_server):
+    key = uuid.uuid4().hex
+    with make_client(f"{mock_server}/counted/{key}/0.5/v1", pool=PoolConfig(read_timeout=0.1)) as client:
+        with pytest.raises(requests.ReadTimeout):
+            client.send_message(make_messages())
+    assert attempts(mock_server, key) == 1
+
+def test_connection_errors_are_retried():
+    # Nothing listens on this port, so every attempt fails to connect.
+    with make_client("http://localhost:8009/v1", max_retries=2) as client:
+        with pytest.raises(requests.ConnectionError):
+            client.send_message(make_messages())
+        assert client._retry_budget.tokens == client.config.retry.budget_max - 2
+
+@pytest.mark.asyncio
+async def test_stream_is_not_retried_after_first_chunk(mock_server):
+    key = uuid.uuid4().hex
+    chunks = []
+    async with make_client(f"{mock_server}/stalled/{key}/1/1/v1", pool=PoolConfig(read_timeout=0.3)) as client:
+        with pytest.raises(asyncio.TimeoutError):
+            async for chunk in client.stream_message(make_messages()):
+                chunks.append(chunk)
+    assert chunks == ["Hello"]
+    assert attempts(mock_server, key) == 1
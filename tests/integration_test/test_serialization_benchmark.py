@@ -0,0 +1,48 @@
+import json
+import time
+from orkes.graph.schema import LLMTraceSchema
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared import serialization
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema, RequestSchema
+
+NUM_MESSAGES = 5000
+REPEATS = 5
+
+def make_history() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[
+        OrkesMessageSchema(role="user" if i % 2 == 0 else "assistant", content=f"Message {i}: " + "lorem ipsum dolor sit amet " * 20)
+        for i in range(NUM_MESSAGES)
+    ])
+
+def best_of(fn) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def test_serialization_of_large_histories():
+    history = make_history()
+    payload = OpenAIStyleStrategy().prepare_payload("test-model", history, stream=False, settings={"max_tokens": 100})
+    trace = LLMTraceSchema(messages=history, parsed_response=RequestSchema(content_type="message", content="Hi"), model="test-model")
+    encoded_payload = json.dumps(payload).encode("utf-8")
+
+    timings = {
+        "payload json.dumps": best_of(lambda: json.dumps(payload).encode("utf-8")),
+        "trace model_dump + json.dump": best_of(lambda: json.dumps(trace.model_dump(), indent=4)),
+        "response json.loads": best_of(lambda: json.loads(encoded_payload)),
+    }
+    for name in serialization.available_serializers():
+        serializer = serialization.SERIALIZERS[name]()
+        assert serializer.loads(serializer.dumps(payload)) == payload
+        assert serializer.loads(serializer.dump_model(trace, indent=True)) == json.loads(json.dumps(trace.model_dump()))
+        timings[f"payload {name}"] = best_of(lambda: serializer.dumps(payload))
+        timings[f"trace dump_model ({name})"] = best_of(lambda: serializer.dump_model(trace, indent=True))
+        timings[f"response {name}"] = best_of(lambda: serializer.loads(encoded_payload))
+
+    print("\n" + "=" * 50)
+    print(f"{NUM_MESSAGES} messages, {len(encoded_payload) / 1e6:.1f} MB payload, best of {REPEATS}")
+    for name, elapsed in timings.items():
+        print(f"{name:<32} {elapsed * 1000:8.2f} ms")
+    print("=" * 50)
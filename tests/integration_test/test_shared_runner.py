@@ -0,0 +1,70 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+
+# Define the state
+class SharedRunnerState(TypedDict):
+    request_id: str
+    counter: int
+    path: str
+
+# Define node functions
+def node_a(state: SharedRunnerState) -> Dict:
+    state['counter'] += 1
+    state['path'] += f"{state['request_id']}:A "
+    return state
+
+def should_loop(state: SharedRunnerState) -> str:
+    if state['counter'] < 5:
+        return "LOOP"
+    return "END"
+
+def build_graph(traced: bool = True):
+    workflow = OrkesGraph(state=SharedRunnerState, name="shared_runner_graph", traced=traced)
+    workflow.add_node("A", node_a)
+    workflow.add_edge(workflow.START, "A")
+    # max_passes=5 only allows a single run's worth of loops, so counters
+    # leaking between runs would make the second run fail.
+    workflow.add_conditional_edge("A", should_loop, {
+        "LOOP": "A",
+        "END": "END"
+    }, max_passes=5)
+    return workflow.compile()
+
+def test_pass_counters_do_not_leak_between_runs():
+    app = build_graph()
+    for i in range(3):
+        final_state = app.run({"request_id": f"r{i}", "counter": 0, "path": ""})
+        assert final_state["counter"] == 5
+        assert len(app.trace.edges_trace) == 6
+
+def test_invoke_state_is_not_mutated():
+    app = build_graph(traced=False)
+    invoke_state = {"request_id": "r0", "counter": 0, "path": ""}
+    final_state = app.run(invoke_state)
+    assert invoke_state["counter"] == 0
+    assert final_state["counter"] == 5
+
+def test_shared_runner_across_thread_pool():
+    """
+    Runs one compiled graph from many threads and checks that each run kept its
+    own state, trace and run ID.
+    """
+    app = build_graph()
+
+    def run_request(i):
+        return app.run_with_context({"request_id": f"r{i}", "counter": 0, "path": ""})
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        contexts = list(pool.map(run_request, range(32)))
+
+    assert len({ctx.run_id for ctx in contexts}) == 32
+    for i, ctx in enumerate(contexts):
+        assert ctx.graph_state["counter"] == 5
+        assert ctx.graph_state["path"] == f"r{i}:A " * 5
+        assert ctx.trace.run_id == ctx.run_id
+        assert ctx.trace.status == "FINISHED"
+        assert [edge.edge_run_number for edge in ctx.trace.edges_trace] == list(range(1, 7))
+        for edge in ctx.trace.edges_trace[1:]:
+            assert edge.state_snapshot["request_id"] == f"r{i}"
@@ -0,0 +1,156 @@
+import subprocess
+import time
+import os
+import sys
+import asyncio
+import pytest
+import aiohttp
+from types import SimpleNamespace
+from orkes.services.connectors import LLMConfig, UniversalLLMClient, LLMFactory
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.services.streaming import StreamAccumulator
+from orkes.shared.context import edge_trace_var
+from orkes.shared.schema import RequestSchema
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+BURST_CHUNKS = 5000
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model")
+    return UniversalLLMClient(config, OpenAIStyleStrategy())
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+def get_weather(location: str) -> str:
+    """Gets the weather of a location.
+
+    Args:
+        location (str): The city to get the weather of.
+    """
+    return "sunny"
+
+def test_stream_events_include_tool_calls_and_usage(mock_server):
+    async def main():
+        async with make_client(f"{mock_server}/v1") as client:
+            return [event async for event in client.stream_events(make_messages(), tools=[get_weather])]
+
+    events = asyncio.run(main())
+    assert [event.type for event in events] == ["tool_call", "tool_call", "tool_call", "finish", "usage"]
+    assert events[0].name == "get_weather" and events[0].tool_call_id == "call_123"
+    assert "".join(event.arguments for event in events[:3]) == '{"location": "San Francisco"}'
+    assert events[3].finish_reason == "tool_calls"
+    assert events[4].usage["total_tokens"] == 21
+
+def test_stream_response_assembles_tool_calls_and_records_trace(mock_server):
+    edge_trace = SimpleNamespace(llm_traces=[])
+
+    async def main():
+        edge_trace_var.set(edge_trace)
+        async with make_client(f"{mock_server}/v1") as client:
+            return [item async for item in client.stream_response(make_messages(), tools=[get_weather])]
+
+    items = asyncio.run(main())
+    result = items[-1]
+    assert isinstance(result, RequestSchema)
+    assert all(not isinstance(item, RequestSchema) for item in items[:-1])
+    assert result.content_type == "tool_calls"
+    assert result.content[0].function_name == "get_weather"
+    assert result.content[0].arguments == {"location": "San Francisco"}
+    assert len(edge_trace.llm_traces) == 1
+    assert edge_trace.llm_traces[0].parsed_response == result
+
+def test_stream_message_records_trace(mock_server):
+    edge_trace = SimpleNamespace(llm_traces=[])
+
+    async def main():
+        edge_trace_var.set(edge_trace)
+        async with make_client(f"{mock_server}/v1") as client:
+            return "".join([chunk async for chunk in client.stream_message(make_messages())])
+
+    assert asyncio.run(main()) == "Hello from OpenAI/vLLM"
+    assert [trace.parsed_response.content for trace in edge_trace.llm_traces] == ["Hello from OpenAI/vLLM"]
+
+def test_malformed_tool_call_only_fails_stream_response(mock_server):
+    edge_trace = SimpleNamespace(llm_traces=[])
+    url = f"{mock_server}/truncated/v1"
+
+    async def read_events():
+        edge_trace_var.set(edge_trace)
+        async with make_client(url) as client:
+            return [event async for event in client.stream_events(make_messages(), tools=[get_weather])]
+
+    async def read_response():
+        async with make_client(url) as client:
+            return [item async for item in client.stream_response(make_messages(), tools=[get_weather])]
+
+    assert len(asyncio.run(read_events())) == 2
+    call = edge_trace.llm_traces[0].parsed_response.content[0]
+    assert call.arguments == {StreamAccumulator.RAW_ARGUMENTS_KEY: '{"location": '}
+    with pytest.raises(ValueError):
+        asyncio.run(read_response())
+
+def test_stream_events_read_anthropic_event_lines(mock_server):
+    async def main():
+        client = LLMFactory.create_anthropic(api_key="EMPTY", base_url=f"{mock_server}/v1", model="claude-3-opus-20240229")
+        async with client:
+            return [event async for event in client.stream_events(make_messages())]
+
+    events = asyncio.run(main())
+    assert "".join(event.text for event in events if event.type == "text") == "Hello from Claude"
+    assert events[0].type == "usage" and events[0].usage["input_tokens"] == 10
+    assert events[-1].type == "finish" and events[-1].finish_reason == "end_turn"
+
+def test_stream_decoding_throughput(mock_server):
+    """Compares line-by-line parsing with the incremental decoder on a fast stream."""
+    url = f"{mock_server}/burst/{BURST_CHUNKS}/v1"
+    strategy = OpenAIStyleStrategy()
+
+    async def read_lines():
+        payload = {"model": "test-model", "messages": [{"role": "user", "content": "Hello!"}], "stream": True}
+        chunks = []
+        async with aiohttp.ClientSession() as session:
+            async with session.post(f"{url}/chat/completions", json=payload) as response:
+                async for line in response.content:
+                    decoded_line = line.decode('utf-8').strip()
+                    if decoded_line:
+                        text_chunk = strategy.parse_stream_chunk(decoded_line)
+                        if text_chunk:
+                            chunks.append(text_chunk)
+        return chunks
+
+    async def read_events():
+        async with make_client(url) as client:
+            return [chunk async for chunk in client.stream_message(make_messages())]
+
+    timings = {}
+    results = {}
+    for name, reader in (("lines", read_lines), ("decoder", read_events)):
+        asyncio.run(reader())  # Warm up the server and the connection code.
+        start = time.perf_counter()
+        results[name] = asyncio.run(reader())
+        timings[name] = time.perf_counter() - start
+
+    print("\n" + "=" * 50)
+    print(f"{BURST_CHUNKS} streamed chunks")
+    print(f"Line by line:        {timings['lines']:.4f}s ({BURST_CHUNKS / timings['lines']:.0f} chunks/s)")
+    print(f"Incremental decoder: {timings['decoder']:.4f}s ({BURST_CHUNKS / timings['decoder']:.0f} chunks/s)")
+    print("=" * 50)
+
+    assert results["decoder"] == results["lines"]
+    assert len(results["decoder"]) == BURST_CHUNKS
@@ -0,0 +1,142 @@
+import subprocess
+import time
+import os
+import sys
+import asyncio
+import pytest
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+from orkes.graph.schema import RunUsage, TokenBudgetExceededError
+from orkes.services.connectors import LLMConfig, UniversalLLMClient, LLMFactory
+from orkes.services.strategies import OpenAIStyleStrategy
+from orkes.shared.context import usage_var
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+@pytest.fixture(scope="module")
+def mock_server():
+    # Start the mock server in a separate process
+    mock_server_path = os.path.join(os.path.dirname(__file__), '..', 'mock_servers', 'mock_llm_server.py')
+    server_process = subprocess.Popen([sys.executable, mock_server_path])
+
+    # Give the server a moment to start
+    time.sleep(5)
+
+    yield "http://localhost:8000"
+
+    # Terminate the mock server process
+    server_process.terminate()
+    server_process.wait()
+
+def make_client(base_url: str, stream_usage: bool = False) -> UniversalLLMClient:
+    config = LLMConfig(api_key="EMPTY", base_url=base_url, model="test-model")
+    return UniversalLLMClient(config, OpenAIStyleStrategy(stream_usage=stream_usage))
+
+def make_messages() -> OrkesMessagesSchema:
+    return OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hello!")])
+
+class AgentState(TypedDict):
+    turns: int
+    reply: str
+
+def should_loop(state: AgentState) -> str:
+    return "LOOP" if state["turns"] < 5 else "END"
+
+def build_graph(node, token_budget=None):
+    workflow = OrkesGraph(state=AgentState, name="agent_graph", token_budget=token_budget)
+    workflow.add_node("agent", node)
+    workflow.add_edge(workflow.START, "agent")
+    workflow.add_conditional_edge("agent", should_loop, {
+        "LOOP": "agent",
+        "END": "END"
+    })
+    return workflow.compile()
+
+def test_send_message_records_usage_and_latency(mock_server):
+    client = make_client(f"{mock_server}/v1")
+
+    def agent(state: AgentState) -> Dict:
+        state["reply"] = client.send_message(make_messages())["content"]["content"]
+        state["turns"] += 1
+        return state
+
+    ctx = build_graph(agent).run_with_context({"turns": 0, "reply": ""})
+    llm_traces = [llm_trace for edge in ctx.trace.edges_trace for llm_trace in edge.llm_traces]
+    assert len(llm_traces) == 5
+    for llm_trace in llm_traces:
+        assert (llm_trace.input_tokens, llm_trace.output_tokens, llm_trace.total_tokens) == (9, 12, 21)
+        assert llm_trace.latency >= 0.1  # The mock server waits 0.1s.
+        assert llm_trace.ttft is None
+    assert (ctx.trace.llm_calls, ctx.trace.total_input_tokens, ctx.trace.total_output_tokens, ctx.trace.total_tokens) == (5, 45, 60, 105)
+    assert ctx.trace.llm_latency == pytest.approx(sum(llm_trace.latency for llm_trace in llm_traces))
+    client.close()
+
+def test_token_budget_stops_an_agent_loop(mock_server):
+    client = make_client(f"{mock_server}/v1")
+
+    def agent(state: AgentState) -> Dict:
+        client.send_message(make_messages())
+        state["turns"] += 1
+        return state
+
+    app = build_graph(agent, token_budget=50)
+    with pytest.raises(TokenBudgetExceededError) as info:
+        app.run({"turns": 0, "reply": ""})
+    # 21 tokens per call: the third call crosses the budget and the loop stops.
+    assert info.value.total_tokens == 63
+    assert app.graph_state["turns"] == 3
+    assert app.trace.status == "BUDGET_EXCEEDED"
+    assert app.trace.llm_calls == 3
+    client.close()
+
+def test_client_refuses_requests_over_budget(mock_server):
+    client = make_client(f"{mock_server}/v1")
+    token = usage_var.set(RunUsage(token_budget=10))
+    try:
+        client.send_message(make_messages())
+        with pytest.raises(TokenBudgetExceededError):
+            client.send_message(make_messages())
+        assert usage_var.get().llm_calls == 1
+    finally:
+        usage_var.reset(token)
+        client.close()
+
+@pytest.mark.parametrize("stream_usage, expected", [(True, (9, 3, 12)), (False, (None, None, None))])
+def test_streams_record_usage_and_ttft(mock_server, stream_usage, expected):
+    async def agent(state: AgentState) -> Dict:
+        async with make_client(f"{mock_server}/v1", stream_usage) as client:
+            state["reply"] = "".join([chunk async for chunk in client.stream_message(make_messages())])
+        state["turns"] = 5
+        return state
+
+    ctx = asyncio.run(build_graph(agent).arun_with_context({"turns": 0, "reply": ""}))
+    assert ctx.graph_state["reply"] == "Hello from OpenAI/vLLM"
+    llm_trace = ctx.trace.edges_trace[-1].llm_traces[0]
+    assert (llm_trace.input_tokens, llm_trace.output_tokens, llm_trace.total_tokens) == expected
+    # The mock server waits 0.1s between chunks, after the first one.
+    assert llm_trace.ttft < llm_trace.latency
+    assert llm_trace.latency >= 0.3
+    assert ctx.trace.total_tokens == (expected[2] or 0)
+
+@pytest.mark.parametrize("provider, stream, expected", [
+    ("anthropic", False, (10, 20, 30)),
+    ("anthropic", True, (10, 20, 30)),
+    ("gemini", False, (4, 10, 14)),
+    ("gemini", True, (4, 3, 7)),
+])
+def test_provider_usage(mock_server, provider, stream, expected):
+    if provider == "anthropic":
+        client = LLMFactory.create_anthropic(api_key="EMPTY", base_url=f"{mock_server}/v1")
+    else:
+        client = LLMFactory.create_gemini(api_key="EMPTY", base_url=f"{mock_server}/v1beta")
+    usage = RunUsage()
+
+    async def main():
+        usage_var.set(usage)
+        async with client:
+            if stream:
+                return [chunk async for chunk in client.stream_message(make_messages())]
+            return await client.asend_message(make_messages())
+
+    asyncio.run(main())
+    assert (usage.input_tokens, usage.output_tokens, usage.total_tokens) == expected
+    assert usage.llm_calls == 1
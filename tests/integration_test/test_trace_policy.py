@@ -0,0 +1,99 @@
+import time
+import pytest
+from typing import TypedDict, Dict
+from orkes.graph.core import OrkesGraph
+from orkes.graph.schema import TracePolicy
+
+LOOP_STEPS = 1_000
+
+# Define the state
+class PolicyState(TypedDict):
+    counter: int
+    label: str
+
+# Define node functions
+def step_node(state: PolicyState) -> Dict:
+    state['counter'] += 1
+    state['label'] = f"step {state['counter']}"
+    if state['counter'] % 100 == 0:
+        time.sleep(0.01)
+    return state
+
+def should_loop(state: PolicyState) -> str:
+    if state['counter'] < LOOP_STEPS:
+        return "LOOP"
+    return "END"
+
+def failing_node(state: PolicyState) -> Dict:
+    raise RuntimeError("boom")
+
+def build_graph(traced, snapshot_mode: str = "full"):
+    workflow = OrkesGraph(state=PolicyState, name="policy_graph", traced=traced, snapshot_mode=snapshot_mode)
+    workflow.add_node("step", step_node)
+    workflow.add_edge(workflow.START, "step")
+    workflow.add_conditional_edge("step", should_loop, {
+        "LOOP": "step",
+        "END": "END"
+    }, max_passes=LOOP_STEPS)
+    return workflow.compile()
+
+@pytest.mark.parametrize("snapshot_mode", ["full", "delta"])
+def test_ring_buffer_keeps_last_edges(snapshot_mode):
+    app = build_graph(TracePolicy(max_edges=10), snapshot_mode)
+    app.run({"counter": 0, "label": ""})
+    trace = app.trace
+
+    assert isinstance(trace.edges_trace, list)
+    assert len(trace.edges_trace) == 10
+    assert trace.total_edges == LOOP_STEPS + 1
+    assert trace.dropped_edges == LOOP_STEPS + 1 - 10
+    assert trace.status == "FINISHED"
+
+    # The retained edges are the last ten, and their states can still be rebuilt.
+    # Each edge records the state handed to its source node.
+    last = trace.edges_trace[-1]
+    assert last.edge_run_number == LOOP_STEPS + 1
+    assert trace.rebuild_state(last.edge_run_number)["counter"] == LOOP_STEPS - 1
+    first = trace.edges_trace[0]
+    assert trace.rebuild_state(first.edge_run_number)["counter"] == LOOP_STEPS - 10
+
+def test_sampling_records_one_run_in_k():
+    app = build_graph(TracePolicy(sample_rate=3))
+    traces = [app.run_with_context({"counter": 0, "label": ""}).trace for _ in range(6)]
+
+    assert [t.sampled for t in traces] == [True, False, False, True, False, False]
+    for trace in traces:
+        assert trace.total_edges == LOOP_STEPS + 1
+        assert trace.status == "FINISHED"
+        assert trace.elapsed_time > 0
+        assert len(trace.edges_trace) == (LOOP_STEPS + 1 if trace.sampled else 0)
+
+@pytest.mark.parametrize("snapshot_mode", ["full", "delta"])
+def test_threshold_keeps_only_slow_edges(snapshot_mode):
+    app = build_graph(TracePolicy(min_elapsed=0.005), snapshot_mode)
+    app.run({"counter": 0, "label": ""})
+    trace = app.trace
+
+    assert len(trace.edges_trace) == LOOP_STEPS // 100
+    assert trace.dropped_edges == trace.total_edges - LOOP_STEPS // 100
+    # Dropped edges fold into the next recorded delta, so states stay exact.
+    for edge in trace.edges_trace:
+        assert trace.rebuild_state(edge.edge_run_number)["counter"] % 100 == 99
+
+def test_failed_run_still_gets_a_summary():
+    workflow = OrkesGraph(state=PolicyState, name="failing_graph", traced=TracePolicy(max_edges=5))
+    workflow.add_node("fail", failing_node)
+    workflow.add_edge(workflow.START, "fail")
+    workflow.add_edge("fail", "END")
+    app = workflow.compile()
+
+    with pytest.raises(RuntimeError):
+        app.run({"counter": 0, "label": ""})
+    assert app.trace.status == "FAILED"
+    assert app.trace.total_edges == 2
+    assert app.trace.elapsed_time > 0
+    assert isinstance(app.trace.edges_trace, list)
+
+def test_invalid_policy_is_rejected():
+    with pytest.raises(ValueError):
+        TracePolicy(max_edges=0)
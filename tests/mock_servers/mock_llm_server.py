@@ -1,5 +1,5 @@
 from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
 from pydantic import BaseModel
 import uvicorn
 import json
@@ -9,6 +9,24 @@ from typing import Optional
 
 app = FastAPI()
 
+# Client (host, port) pairs seen so far, one per TCP connection.
+seen_connections = set()
+
+@app.middleware("http")
+async def record_connection(request: Request, call_next):
+    if request.client is not None and not request.url.path.startswith("/debug"):
+        seen_connections.add((request.client.host, request.client.port))
+    return await call_next(request)
+
+@app.get("/debug/connections")
+async def get_connections():
+    return {"count": len(seen_connections)}
+
+@app.delete("/debug/connections")
+async def reset_connections():
+    seen_connections.clear()
+    return {"count": 0}
+
 # --- Pydantic Models ---
 
 class ChatCompletionRequest(BaseModel):
@@ -18,6 +36,7 @@ class ChatCompletionRequest(BaseModel):
     stop: list = None
     temperature: float = 0.7
     stream: bool = False
+    stream_options: Optional[dict] = None
     tools: Optional[list] = None
 
 class CompletionRequest(BaseModel):
@@ -41,7 +60,7 @@ class ClaudeRequest(BaseModel):
 
 # --- OpenAI & vLLM ---
 
-async def openai_stream_generator():
+async def openai_stream_generator(include_usage: bool = False):
     response = {
         "id": "chatcmpl-123",
         "object": "chat.completion.chunk",
@@ -60,13 +79,52 @@ async def openai_stream_generator():
     response["choices"][0]["delta"] = {}
     response["choices"][0]["finish_reason"] = "stop"
     yield f"data: {json.dumps(response)}\n\n"
+    if include_usage:
+        yield f"data: {json.dumps({**response, 'choices': [], 'usage': {'prompt_tokens': 9, 'completion_tokens': 3, 'total_tokens': 12}})}\n\n"
     yield "data: [DONE]\n\n"
 
 
+async def openai_tool_call_stream_generator():
+    base = {"id": "chatcmpl-123", "object": "chat.completion.chunk", "created": 1677652288, "model": "gpt-3.5-turbo"}
+    deltas = [
+        {"role": "assistant", "content": None, "tool_calls": [{"index": 0, "id": "call_123", "type": "function", "function": {"name": "get_weather", "arguments": ""}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": "{\"location\": "}}]},
+        {"tool_calls": [{"index": 0, "function": {"arguments": "\"San Francisco\"}"}}]},
+    ]
+    for delta in deltas:
+        yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})}\n\n"
+        await asyncio.sleep(0.05)
+    yield f"data: {json.dumps({**base, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'tool_calls'}]})}\n\n"
+    yield f"data: {json.dumps({**base, 'choices': [], 'usage': {'prompt_tokens': 9, 'completion_tokens': 12, 'total_tokens': 21}})}\n\n"
+    yield "data: [DONE]\n\n"
+
+async def burst_stream_generator(chunks: int):
+    response = {
+        "id": "chatcmpl-123",
+        "object": "chat.completion.chunk",
+        "created": 1677652288,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"delta": {"content": "token "}, "index": 0, "finish_reason": None}],
+    }
+    line = f"data: {json.dumps(response)}\n\n"
+    # Several events per network write, as a fast server sends them.
+    for _ in range(chunks // 50):
+        yield line * 50
+    yield line * (chunks % 50)
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/v1/health")
+async def health():
+    return {"status": "ok"}
+
 @app.post("/v1/chat/completions")
 async def create_chat_completion(request: ChatCompletionRequest):
+    if request.stream and request.tools:
+        return StreamingResponse(openai_tool_call_stream_generator(), media_type="text/event-stream")
     if request.stream:
-        return StreamingResponse(openai_stream_generator(), media_type="application/x-ndjson")
+        include_usage = bool((request.stream_options or {}).get("include_usage"))
+        return StreamingResponse(openai_stream_generator(include_usage), media_type="application/x-ndjson")
     
     if request.tools:
         return {
@@ -107,6 +165,92 @@ async def create_chat_completion(request: ChatCompletionRequest):
             "usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21},
         }
 
+# --- Failure injection (OpenAI style) ---
+
+# Attempts seen per test key, so each test can use its own counter.
+attempts = {}
+
+@app.get("/debug/attempts/{key}")
+async def get_attempts(key: str):
+    return {"count": attempts.get(key, 0)}
+
+@app.post("/flaky/{key}/{failures}/{status}/v1/chat/completions")
+async def flaky_chat_completion(key: str, failures: int, status: int, request: ChatCompletionRequest):
+    """Fails the first `failures` attempts of a key with `status`, then succeeds."""
+    attempts[key] = attempts.get(key, 0) + 1
+    if attempts[key] <= failures:
+        headers = {"Retry-After": "0.05"} if status == 429 else {}
+        return JSONResponse(status_code=status, content={"error": "injected failure"}, headers=headers)
+    return await create_chat_completion(request)
+
+@app.post("/slow/{delay}/v1/chat/completions")
+async def slow_chat_completion(delay: float, request: ChatCompletionRequest):
+    """Waits `delay` seconds before answering."""
+    await asyncio.sleep(delay)
+    return await create_chat_completion(request)
+
+async def dripping_body_generator(delay: float):
+    body = json.dumps({
+        "id": "chatcmpl-123",
+        "object": "chat.completion",
+        "created": 1677652288,
+        "model": "test-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello from OpenAI/vLLM"}, "finish_reason": "stop"}],
+    })
+    for i in range(0, len(body), 10):
+        yield body[i:i + 10]
+        await asyncio.sleep(delay)
+
+@app.post("/dripping/{delay}/v1/chat/completions")
+async def dripping_chat_completion(delay: float, request: ChatCompletionRequest):
+    """Answers at once, but sends the body ten bytes every `delay` seconds."""
+    return StreamingResponse(dripping_body_generator(delay), media_type="application/json")
+
+@app.post("/counted/{key}/{delay}/v1/chat/completions")
+async def counted_chat_completion(key: str, delay: float, request: ChatCompletionRequest):
+    """Counts the attempts of a key and waits `delay` seconds before answering."""
+    attempts[key] = attempts.get(key, 0) + 1
+    await asyncio.sleep(delay)
+    return await create_chat_completion(request)
+
+@app.post("/straggler/{key}/{delay}/v1/chat/completions")
+async def straggler_chat_completion(key: str, delay: float, request: ChatCompletionRequest):
+    """Waits `delay` seconds before answering the first attempt of a key; later attempts answer at once."""
+    attempts[key] = attempts.get(key, 0) + 1
+    if attempts[key] == 1:
+        await asyncio.sleep(delay)
+    return await create_chat_completion(request)
+
+@app.post("/burst/{chunks}/v1/chat/completions")
+async def burst_chat_completion(chunks: int, request: ChatCompletionRequest):
+    """Streams `chunks` text chunks as fast as possible."""
+    return StreamingResponse(burst_stream_generator(chunks), media_type="text/event-stream")
+
+async def truncated_tool_call_stream_generator():
+    """Streams a tool call whose arguments are cut off."""
+    generator = openai_tool_call_stream_generator()
+    for _ in range(2):
+        yield await generator.__anext__()
+    yield "data: [DONE]\n\n"
+
+@app.post("/truncated/v1/chat/completions")
+async def truncated_chat_completion(request: ChatCompletionRequest):
+    return StreamingResponse(truncated_tool_call_stream_generator(), media_type="text/event-stream")
+
+async def stalled_stream_generator(chunks: int):
+    generator = openai_stream_generator()
+    for _ in range(chunks):
+        yield await generator.__anext__()
+    await asyncio.sleep(30)
+
+@app.post("/stalled/{key}/{failures}/{chunks}/v1/chat/completions")
+async def stalled_stream_completion(key: str, failures: int, chunks: int, request: ChatCompletionRequest):
+    """Stalls the stream of the first `failures` attempts of a key after `chunks` chunks."""
+    attempts[key] = attempts.get(key, 0) + 1
+    if attempts[key] <= failures:
+        return StreamingResponse(stalled_stream_generator(chunks), media_type="application/x-ndjson")
+    return await create_chat_completion(request)
+
 # --- Gemini ---
 
 async def gemini_stream_generator():
@@ -122,6 +266,7 @@ async def gemini_stream_generator():
     yield f"data: {json.dumps(response)}\n\n"
     await asyncio.sleep(0.1)
     response["candidates"][0]["finishReason"] = "STOP"
+    response["usageMetadata"] = {"promptTokenCount": 4, "candidatesTokenCount": 3, "totalTokenCount": 7}
     yield f"data: {json.dumps(response)}\n\n"
 
 @app.post("/v1beta/models/{model}:generateContent")
@@ -158,6 +303,7 @@ async def generate_gemini_content(model: str, request: GeminiRequest):
                 ],
             }
         ],
+        "usageMetadata": {"promptTokenCount": 4, "candidatesTokenCount": 10, "totalTokenCount": 14},
         "promptFeedback": {"safetyRatings": [{"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "probability": "NEGLIGIBLE"}]}
     }
     
@@ -168,15 +314,15 @@ async def generate_gemini_content(model: str, request: GeminiRequest):
 # --- Claude ---
 
 async def claude_stream_generator():
-    yield f"data: {json.dumps({'type': 'message_start', 'message': {'id': 'msg-123', 'type': 'message', 'role': 'assistant', 'content': [], 'model': 'claude-3-opus-20240229', 'stop_reason': None, 'usage': {'input_tokens': 10, 'output_tokens': 1}}})}\n\n"
+    yield f"event: message_start\ndata: {json.dumps({'type': 'message_start', 'message': {'id': 'msg-123', 'type': 'message', 'role': 'assistant', 'content': [], 'model': 'claude-3-opus-20240229', 'stop_reason': None, 'usage': {'input_tokens': 10, 'output_tokens': 1}}})}\n\n"
     await asyncio.sleep(0.1)
-    yield f"data: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Hello'}})}\n\n"
+    yield f"event: content_block_delta\ndata: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': 'Hello'}})}\n\n"
     await asyncio.sleep(0.1)
-    yield f"data: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' from'}})}\n\n"
+    yield f"event: content_block_delta\ndata: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' from'}})}\n\n"
     await asyncio.sleep(0.1)
-    yield f"data: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' Claude'}})}\n\n"
+    yield f"event: content_block_delta\ndata: {json.dumps({'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': ' Claude'}})}\n\n"
     await asyncio.sleep(0.1)
-    yield f"data: {json.dumps({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'usage': {'output_tokens': 20}}})}\n\n"
+    yield f"event: message_delta\ndata: {json.dumps({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'usage': {'output_tokens': 20}}})}\n\n"
 
 
 @app.post("/v1/messages")
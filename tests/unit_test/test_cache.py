@@ -0,0 +1,86 @@
+import time
+from orkes.services.cache import InMemoryResponseCache, SQLiteResponseCache, make_cache_key
+
+def test_cache_key_is_canonical():
+    url = "http://localhost/v1/chat/completions"
+    assert make_cache_key(url, {"a": 1, "b": [1, 2]}) == make_cache_key(url, {"b": [1, 2], "a": 1})
+    assert make_cache_key(url, {"a": 1}) != make_cache_key(url, {"a": 2})
+    assert make_cache_key(url, {"a": 1}) != make_cache_key(url + "/other", {"a": 1})
+
+def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryResponseCache(max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.set("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    assert cache.get("c") == {"v": 3}
+    assert cache.stats() == {"hits": 3, "misses": 1, "evictions": 1}
+
+def test_caches_expire_entries(tmp_path):
+    for cache in (InMemoryResponseCache(ttl=0.05), SQLiteResponseCache(str(tmp_path / "cache.sqlite"), ttl=0.05)):
+        cache.set("a", {"v": 1})
+        assert cache.get("a") == {"v": 1}
+        time.sleep(0.1)
+        assert cache.get("a") is None
+        assert cache.evictions == 1
+        assert len(cache) == 0
+
+def test_sqlite_cache_persists_and_caps_entries(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteResponseCache(path, max_entries=2)
+    cache.set("a", {"v": 1})
+    cache.set("b", {"v": 2})
+    cache.set("c", {"v": 3})
+    assert len(cache) == 2
+    assert cache.evictions == 1
+    cache.close()
+
+    cache = SQLiteResponseCache(path)
+    assert cache.get("a") is None
+    assert cache.get("c") == {"v": 3}
+    cache.clear()
+    assert len(cache) == 0
+    cache.close()
+
+def test_single_flight_shares_results_across_threads_and_tasks():
+    import asyncio
+    import threading
+    import pytest
+    from orkes.services.cache import SingleFlight
+
+    flights = SingleFlight()
+    calls = 0
+    started = threading.Event()
+
+    def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        time.sleep(0.1)
+        return {"v": 1}
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flights.do("k", fetch)))
+    leader.start()
+    started.wait()
+
+    async def follower():
+        return await flights.ado("k", lambda: asyncio.sleep(0, {"v": 2}))
+
+    results.append(asyncio.run(follower()))
+    results.append(flights.do("k", fetch))
+    leader.join()
+    # The last call started once the flight had landed.
+    assert results[0] == ({"v": 1}, False)
+    assert results[1] == ({"v": 1}, True)
+    assert results[2] == ({"v": 1}, False)
+    assert calls == 2
+    assert flights.coalesced == 1
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flights.do("k", fail)
@@ -0,0 +1,62 @@
+from orkes.services.strategies import OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
+from orkes.shared.schema import OrkesConversation, OrkesMessagesSchema, OrkesMessageSchema
+
+class CountingStrategy(OpenAIStyleStrategy):
+    def __init__(self):
+        self.encoded = 0
+
+    def encode_message(self, message):
+        self.encoded += 1
+        return super().encode_message(message)
+
+def make_messages(count: int, start: int = 0) -> list:
+    return [
+        OrkesMessageSchema(role="system" if i == 0 else ("user" if i % 2 else "assistant"), content=f"message {i}")
+        for i in range(start, start + count)
+    ]
+
+def test_conversation_only_encodes_new_messages():
+    strategy = CountingStrategy()
+    conversation = OrkesConversation(messages=make_messages(3))
+    first = strategy.prepare_payload("m", conversation, stream=False, settings={})["messages"]
+    assert strategy.encoded == 3
+    conversation.append(make_messages(1, 3)[0])
+    conversation.extend(make_messages(2, 4))
+    second = strategy.prepare_payload("m", conversation, stream=False, settings={})["messages"]
+    assert strategy.encoded == 6
+    assert len(first) == 3 and len(second) == 6
+    assert strategy.prepare_payload("m", conversation, stream=False, settings={})["messages"] is second
+    assert strategy.encoded == 6
+
+def test_conversation_reencodes_when_history_is_rewritten():
+    strategy = CountingStrategy()
+    conversation = OrkesConversation(messages=make_messages(4))
+    strategy.encode_messages(conversation)
+    conversation.messages[-1] = OrkesMessageSchema(role="user", content="edited")
+    assert strategy.encode_messages(conversation)[-1]["content"] == "edited"
+    assert strategy.encoded == 5
+    del conversation.messages[1:]
+    assert len(strategy.encode_messages(conversation)) == 1
+
+def test_conversation_reencodes_from_a_replaced_earlier_message():
+    strategy = CountingStrategy()
+    conversation = OrkesConversation(messages=make_messages(4))
+    strategy.encode_messages(conversation)
+    conversation.messages[0] = OrkesMessageSchema(role="system", content="new prompt")
+    encoded = strategy.encode_messages(conversation)
+    assert encoded[0]["content"] == "new prompt"
+    assert [message["content"] for message in encoded[1:]] == ["message 1", "message 2", "message 3"]
+    assert strategy.encoded == 8
+    conversation.messages[2] = OrkesMessageSchema(role="user", content="edited")
+    assert strategy.encode_messages(conversation)[2]["content"] == "edited"
+    # Only the replaced message and those after it are encoded again.
+    assert strategy.encoded == 10
+
+def test_conversation_payloads_match_plain_messages():
+    messages = make_messages(5)
+    conversation = OrkesConversation(messages=list(messages))
+    for strategy in (OpenAIStyleStrategy(), AnthropicStrategy(), GoogleGeminiStrategy()):
+        plain = strategy.prepare_payload("m", OrkesMessagesSchema(messages=messages), stream=False, settings={})
+        assert strategy.prepare_payload("m", conversation, stream=False, settings={}) == plain
+        # Served from the encoding cached for this strategy.
+        assert strategy.prepare_payload("m", conversation, stream=False, settings={}) == plain
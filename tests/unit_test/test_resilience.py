@@ -0,0 +1,267 @@
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from orkes.services.resilience import RetryPolicy, RetryBudget, RetryState, parse_retry_after
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("2") == 2.0
+    assert parse_retry_after("soon") is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 < parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 30
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(backoff_base=1, backoff_max=4)
+    assert all(0 <= policy.backoff(attempt) <= 4 for attempt in range(10))
+
+def test_retry_state_limits():
+    budget = RetryBudget(ratio=0.5, max_tokens=2)
+    state = RetryState(RetryPolicy(max_retries=5), budget)
+    # The budget starts full: two retries, then none until calls earn tokens.
+    assert state.next_delay() is not None
+    assert state.next_delay() is not None
+    assert state.next_delay() is None
+    RetryState(RetryPolicy(), budget)
+    RetryState(RetryPolicy(), budget)
+    assert state.next_delay() is not None
+
+    state = RetryState(RetryPolicy(max_retry_after=10), RetryBudget())
+    assert state.next_delay("60") is None
+    assert state.next_delay("1") == 1.0
+
+    state = RetryState(RetryPolicy(total_timeout=0.5), RetryBudget())
+    assert state.next_delay("1") is None
+    assert state.cap(None) <= 0.5
+    assert state.cap(0.1) == 0.1
+
+def test_rate_limiter_shares_slots_between_threads_and_tasks():
+    import asyncio
+    import threading
+    import time
+    from orkes.services.resilience import RateLimiter
+
+    limiter = RateLimiter(max_concurrency=2)
+    peak = 0
+    active = 0
+    lock = threading.Lock()
+
+    def hold(seconds):
+        nonlocal peak, active
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(seconds)
+        with lock:
+            active -= 1
+
+    def worker():
+        limiter.acquire()
+        try:
+            hold(0.05)
+        finally:
+            limiter.release()
+
+    async def task():
+        await limiter.aacquire()
+        try:
+            await asyncio.to_thread(hold, 0.05)
+        finally:
+            limiter.release()
+
+    async def tasks():
+        await asyncio.gather(*(task() for _ in range(4)))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    asyncio.run(tasks())
+    for t in threads:
+        t.join()
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+def test_rate_limiter_serves_waiters_in_order():
+    import asyncio
+    from orkes.services.resilience import RateLimiter
+
+    limiter = RateLimiter(max_concurrency=1)
+    order = []
+
+    async def task(i):
+        await limiter.aacquire()
+        order.append(i)
+        await asyncio.sleep(0.01)
+        limiter.release()
+
+    async def main():
+        await limiter.aacquire()
+        tasks = [asyncio.create_task(task(i)) for i in range(5)]
+        await asyncio.sleep(0.01)
+        # A cancelled waiter gives up its place without losing the slot.
+        tasks[2].cancel()
+        limiter.release()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    assert order == [0, 1, 3, 4]
+    assert limiter.in_flight == 0
+
+def test_rate_limiter_paces_requests():
+    import time
+    from orkes.services.resilience import RateLimiter, RateLimitConfig, get_rate_limiter
+
+    limiter = RateLimiter(requests_per_second=20)
+    start = time.monotonic()
+    waits = [limiter.acquire() for _ in range(30)]
+    # The first 20 requests are a burst; the next 10 come 50ms apart.
+    assert waits[0] < 0.01
+    assert time.monotonic() - start >= 0.45
+
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter.acquire(tokens=600) < 0.01
+    # The bucket is empty; 10 tokens take a second to refill.
+    assert limiter.acquire(tokens=10) >= 0.9
+
+    config = RateLimitConfig(max_concurrency=1, shared=True)
+    assert get_rate_limiter(config, "http://a", "m") is get_rate_limiter(config, "http://a", "m")
+    assert get_rate_limiter(config, "http://a", "m") is not get_rate_limiter(config, "http://b", "m")
+    assert get_rate_limiter(RateLimitConfig(), "http://a", "m") is not get_rate_limiter(RateLimitConfig(), "http://a", "m")
+
+def test_rate_limiter_gives_up_after_timeout():
+    import asyncio
+    import pytest
+    from orkes.services.resilience import RateLimiter
+
+    limiter = RateLimiter(max_concurrency=1)
+    limiter.acquire()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+
+    async def main():
+        with pytest.raises(asyncio.TimeoutError):
+            await limiter.aacquire(timeout=0.05)
+
+    asyncio.run(main())
+    # The timed out waiters left the queue, so the slot goes to the next caller.
+    limiter.release()
+    assert limiter.acquire(timeout=0) == pytest.approx(0, abs=0.01)
+    limiter.release()
+    assert limiter.in_flight == 0
+
+    limiter = RateLimiter(tokens_per_minute=600)
+    limiter.acquire(tokens=600)
+    # Refilling 600 tokens takes a minute, so the wait is refused at once.
+    with pytest.raises(TimeoutError):
+        limiter.acquire(tokens=600, timeout=1)
+    # The refused request gave its tokens back: 10 more take a second, not a minute.
+    assert limiter.acquire(tokens=10, timeout=2) < 1.5
+
+def test_hedger_sends_a_duplicate_for_slow_calls():
+    import asyncio
+    from orkes.services.resilience import HedgePolicy, Hedger
+    from orkes.shared.context import hedge_state_var
+
+    hedger = Hedger(HedgePolicy(initial_delay=0.05, budget_max=1, budget_ratio=0))
+    cancelled = []
+
+    async def attempt(n):
+        try:
+            # The original request is slow, the hedge is fast.
+            await asyncio.sleep(1 if n == 0 else 0.01)
+        except asyncio.CancelledError:
+            cancelled.append(n)
+            raise
+        return n, hedge_state_var.get().hedges
+
+    assert asyncio.run(hedger.run(attempt)) == (1, 1)
+    assert cancelled == [0]
+    assert hedger.hedged == 1 and hedger.wins == 1
+
+    # The budget is spent, so the slow call is left to finish.
+    async def slow(n):
+        await asyncio.sleep(0.1)
+        return n
+
+    assert asyncio.run(hedger.run(slow)) == 0
+    assert hedger.hedged == 1
+
+def test_hedge_delay_follows_latency_percentile():
+    from orkes.services.resilience import HedgePolicy, Hedger
+
+    hedger = Hedger(HedgePolicy(percentile=90, min_samples=10, initial_delay=2.0, min_delay=0.0))
+    assert hedger.delay() == 2.0
+    for i in range(1, 101):
+        hedger.observe(i / 100)
+    assert hedger.delay() == 0.91
+
+def test_circuit_breaker_opens_and_recovers():
+    import time
+    import pytest
+    from orkes.services.resilience import CircuitBreaker, CircuitBreakerPolicy, CircuitOpenError
+
+    breaker = CircuitBreaker(CircuitBreakerPolicy(failure_rate=0.5, window=4, min_calls=4, cool_down=0.1), "test")
+    events = []
+    breaker.add_listener(lambda b, old, new: events.append((old, new)))
+
+    def call(fail):
+        with breaker.guard():
+            if fail:
+                raise ConnectionError("down")
+
+    for _ in range(2):
+        call(False)
+        with pytest.raises(ConnectionError):
+            call(True)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError) as info:
+        call(False)
+    assert 0 < info.value.retry_after <= 0.1
+
+    # A failed trial opens the circuit again, a successful one closes it.
+    time.sleep(0.15)
+    with pytest.raises(ConnectionError):
+        call(True)
+    assert breaker.state == "open"
+    time.sleep(0.15)
+    call(False)
+    assert breaker.state == "closed"
+    assert events == [("closed", "open"), ("open", "half_open"), ("half_open", "open"), ("open", "half_open"), ("half_open", "closed")]
+
+def test_circuit_breaker_ignores_errors_that_are_not_failures():
+    import pytest
+    from orkes.services.resilience import CircuitBreaker, CircuitBreakerPolicy
+
+    breaker = CircuitBreaker(CircuitBreakerPolicy(window=2, min_calls=2), is_failure=lambda e: not isinstance(e, ValueError))
+    for _ in range(5):
+        with pytest.raises(ValueError):
+            with breaker.guard():
+                raise ValueError("bad request")
+    assert breaker.state == "closed"
+
+def test_circuit_breaker_ignores_calls_admitted_before_it_opened():
+    import time
+    import pytest
+    from orkes.services.resilience import CircuitBreaker, CircuitBreakerPolicy, CircuitOpenError
+
+    breaker = CircuitBreaker(CircuitBreakerPolicy(failure_rate=0.5, window=2, min_calls=2, cool_down=0.05))
+    old_calls = [breaker.guard(), breaker.guard()]
+    for old_call in old_calls:
+        old_call.__enter__()
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            with breaker.guard():
+                raise ConnectionError("down")
+    assert breaker.state == "open"
+
+    time.sleep(0.1)
+    trial = breaker.guard()
+    trial.__enter__()
+    assert breaker.state == "half_open"
+    # Calls started while the circuit was closed neither close it nor free trial slots.
+    for old_call in old_calls:
+        old_call.__exit__(None, None, None)
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+    trial.__exit__(None, None, None)
+    assert breaker.state == "closed"
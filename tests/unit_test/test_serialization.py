@@ -0,0 +1,53 @@
+import json
+import pytest
+from orkes.shared import serialization
+from orkes.shared.serialization import StdlibSerializer, available_serializers, get_serializer, set_serializer
+from orkes.shared.schema import OrkesMessagesSchema, OrkesMessageSchema
+
+class Opaque:
+    def __str__(self):
+        return "opaque"
+
+@pytest.fixture(params=available_serializers())
+def serializer(request):
+    return serialization.SERIALIZERS[request.param]()
+
+def test_serializers_round_trip(serializer):
+    value = {"text": "héllo", "n": [1, 2.5, None, True], "nested": {"k": "v"}}
+    assert serializer.loads(serializer.dumps(value)) == value
+    assert serializer.loads(serializer.dumps(value, indent=True)) == value
+    assert serializer.loads(serializer.dumps(value).decode("utf-8")) == value
+
+def test_serializers_write_unknown_types_as_strings(serializer):
+    assert json.loads(serializer.dumps({"o": Opaque(), 1: "int key"})) == {"o": "opaque", "1": "int key"}
+
+def test_serializers_raise_json_decode_errors(serializer):
+    with pytest.raises(json.JSONDecodeError):
+        serializer.loads(b"{not json")
+
+def test_dump_model_writes_bytes_directly(serializer):
+    messages = OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hi")])
+    data = serializer.dump_model(messages)
+    assert isinstance(data, bytes)
+    assert json.loads(data) == messages.model_dump()
+    assert json.loads(serializer.dump_model(messages, include={"messages"})) == messages.model_dump()
+
+def test_set_serializer():
+    default = get_serializer()
+    assert default.name == available_serializers()[0]
+    try:
+        assert set_serializer("json").name == "json"
+        assert serialization.loads(serialization.dumps({"a": 1})) == {"a": 1}
+        custom = StdlibSerializer()
+        assert set_serializer(custom) is get_serializer() is custom
+        with pytest.raises(ValueError):
+            set_serializer("yaml")
+    finally:
+        set_serializer(default)
+
+def test_missing_backend_raises_import_error():
+    for name, module in (("orjson", serialization.orjson), ("msgspec", serialization.msgspec)):
+        if module is None:
+            with pytest.raises(ImportError):
+                set_serializer(name)
+            assert name not in available_serializers()
@@ -0,0 +1,55 @@
+from orkes.graph.state import StateView, apply_update
+
+def test_state_view_reads_through_and_records_writes():
+    base = {"a": 1, "b": [1, 2], "c": "x"}
+    view = StateView(base)
+
+    assert view["a"] == 1
+    assert dict(view) == base
+    assert len(view) == 3
+
+    view["a"] = 2
+    view["d"] = "new"
+    del view["c"]
+
+    assert base == {"a": 1, "b": [1, 2], "c": "x"}, "base must not be written"
+    assert view.changes() == {"a": 2, "d": "new"}
+    assert view.removed() == {"c"}
+    assert "c" not in view
+    assert view.get("c") is None
+    assert len(view) == 3
+    assert view.copy() == {"a": 2, "b": [1, 2], "d": "new"}
+    assert {**view} == view.copy()
+
+def test_delete_then_set_again():
+    view = StateView({"a": 1})
+    del view["a"]
+    view["a"] = 3
+    assert view.removed() == set()
+    assert dict(view) == {"a": 3}
+
+def test_apply_update_with_view_writes_only_changes():
+    state = {"a": 1, "b": 2, "c": 3}
+    view = StateView(state)
+    view["a"] = 10
+    del view["c"]
+    apply_update(state, view)
+    assert state == {"a": 10, "b": 2}
+
+def test_apply_update_with_partial_dict():
+    state = {"a": 1, "b": 2}
+    apply_update(state, {"b": 3})
+    assert state == {"a": 1, "b": 3}
+
+def test_state_diff_round_trips():
+    from orkes.graph.schema import StateDiff
+
+    shared = [1, 2]
+    previous = {"a": 1, "b": shared, "c": "x"}
+    current = {"a": 2, "b": shared, "d": "new"}
+
+    diff = StateDiff.between(previous, current)
+    assert diff.changed == {"a": 2}
+    assert diff.added == {"d": "new"}
+    assert diff.removed == ["c"]
+    assert diff.apply_to(dict(previous)) == current
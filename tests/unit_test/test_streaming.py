@@ -0,0 +1,147 @@
+import json
+from orkes.services.streaming import SSEDecoder, ServerSentEvent, StreamEvent, StreamAccumulator
+from orkes.services.strategies import OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
+from orkes.services.schema import LLMProviderStrategy
+
+def decode_in_pieces(data: bytes, size: int) -> list:
+    decoder = SSEDecoder()
+    events = []
+    for i in range(0, len(data), size):
+        events.extend(decoder.feed(data[i:i + size]))
+    return events + decoder.flush()
+
+def test_decoder_handles_any_chunking():
+    stream = (
+        b": keep-alive\r\n"
+        b"event: content_block_delta\r\ndata: {\"a\": 1}\r\n\r\n"
+        b"data: first\rdata: second\r\r"
+        b"id: 7\ndata:no-space\n\n"
+        b"data: \xc3\xa9t\xc3\xa9\n\n"
+        b"data: unterminated"
+    )
+    expected = [
+        ServerSentEvent('{"a": 1}', event="content_block_delta"),
+        ServerSentEvent("first\nsecond"),
+        ServerSentEvent("no-space", id="7"),
+        ServerSentEvent("été", id="7"),
+        ServerSentEvent("unterminated", id="7"),
+    ]
+    for size in (1, 2, 3, 7, len(stream)):
+        assert decode_in_pieces(stream, size) == expected
+
+def test_decoder_skips_events_without_data():
+    decoder = SSEDecoder()
+    assert decoder.feed(b"event: ping\n\nretry: 100\n\n") == []
+    assert decoder.feed(b"data: x\n") == []
+    assert decoder.feed(b"\n") == [ServerSentEvent("x")]
+
+def sse(payload) -> ServerSentEvent:
+    return ServerSentEvent(json.dumps(payload))
+
+def test_openai_stream_events():
+    strategy = OpenAIStyleStrategy()
+    assert strategy.parse_stream_event(sse({"choices": [{"delta": {"content": "Hi"}, "finish_reason": None}]})) == [
+        StreamEvent("text", text="Hi")
+    ]
+    tool_call = {"index": 1, "id": "call_1", "function": {"name": "get_weather", "arguments": "{\"lo"}}
+    assert strategy.parse_stream_event(sse({"choices": [{"delta": {"tool_calls": [tool_call]}}]})) == [
+        StreamEvent("tool_call", index=1, tool_call_id="call_1", name="get_weather", arguments="{\"lo")
+    ]
+    usage = {"prompt_tokens": 9, "completion_tokens": 12}
+    assert strategy.parse_stream_event(sse({"choices": [{"delta": {}, "finish_reason": "stop"}], "usage": usage})) == [
+        StreamEvent("finish", finish_reason="stop"), StreamEvent("usage", usage=usage)
+    ]
+    assert strategy.parse_stream_event(sse({"error": {"message": "overloaded"}})) == [
+        StreamEvent("error", error={"message": "overloaded"})
+    ]
+    assert strategy.parse_stream_event(ServerSentEvent("[DONE]")) == []
+
+def test_anthropic_stream_events():
+    strategy = AnthropicStrategy()
+    start = {"type": "content_block_start", "index": 1, "content_block": {"type": "tool_use", "id": "toolu_1", "name": "get_weather", "input": {}}}
+    assert strategy.parse_stream_event(sse(start)) == [
+        StreamEvent("tool_call", index=1, tool_call_id="toolu_1", name="get_weather")
+    ]
+    delta = {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": "{\"lo"}}
+    assert strategy.parse_stream_event(sse(delta)) == [StreamEvent("tool_call", index=1, arguments="{\"lo")]
+    text = {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Hi"}}
+    assert strategy.parse_stream_event(sse(text)) == [StreamEvent("text", text="Hi")]
+    end = {"type": "message_delta", "delta": {"stop_reason": "tool_use"}, "usage": {"output_tokens": 20}}
+    assert strategy.parse_stream_event(sse(end)) == [
+        StreamEvent("usage", usage={"output_tokens": 20}), StreamEvent("finish", finish_reason="tool_use")
+    ]
+    error = {"type": "error", "error": {"type": "overloaded_error"}}
+    assert strategy.parse_stream_event(sse(error)) == [StreamEvent("error", error={"type": "overloaded_error"})]
+    assert strategy.parse_stream_event(ServerSentEvent('{"type": "ping"}', event="ping")) == []
+
+def test_gemini_stream_events():
+    strategy = GoogleGeminiStrategy()
+    chunk = {
+        "candidates": [{
+            "content": {"parts": [{"text": "Hi"}, {"functionCall": {"name": "get_weather", "args": {"location": "Paris"}}}]},
+            "finishReason": "STOP",
+        }],
+        "usageMetadata": {"promptTokenCount": 4, "candidatesTokenCount": 2},
+    }
+    events = strategy.parse_stream_event(sse(chunk))
+    assert [event.type for event in events] == ["text", "tool_call", "finish", "usage"]
+    assert events[1].index is None
+    assert json.loads(events[1].arguments) == {"location": "Paris"}
+
+def test_strategies_ignore_non_object_payloads():
+    for strategy in (OpenAIStyleStrategy(), AnthropicStrategy(), GoogleGeminiStrategy()):
+        for data in ("[1, 2]", "3", '"text"', "null"):
+            assert strategy.parse_stream_event(ServerSentEvent(data)) == []
+
+def test_default_parse_stream_event_uses_parse_stream_chunk():
+    class LegacyStrategy(OpenAIStyleStrategy):
+        parse_stream_event = LLMProviderStrategy.parse_stream_event
+
+        def parse_stream_chunk(self, line):
+            return line[6:].upper()
+
+    assert LegacyStrategy().parse_stream_event(ServerSentEvent("a\nb")) == [
+        StreamEvent("text", text="A"), StreamEvent("text", text="B")
+    ]
+
+def test_accumulator_stitches_tool_call_fragments():
+    accumulator = StreamAccumulator()
+    for event in (
+        StreamEvent("text", text="Let me check."),
+        StreamEvent("tool_call", index=0, tool_call_id="call_1", name="get_weather"),
+        StreamEvent("tool_call", index=1, tool_call_id="call_2", name="get_time", arguments=""),
+        StreamEvent("tool_call", index=0, arguments="{\"location\": "),
+        StreamEvent("tool_call", index=0, arguments="\"Paris\"}"),
+        StreamEvent("usage", usage={"input_tokens": 10}),
+        StreamEvent("usage", usage={"output_tokens": 20}),
+        StreamEvent("finish", finish_reason="tool_use"),
+    ):
+        accumulator.add(event)
+    result = accumulator.result()
+    assert result.content_type == "tool_calls"
+    assert [(call.function_name, call.arguments) for call in result.content] == [
+        ("get_weather", {"location": "Paris"}), ("get_time", {})
+    ]
+    assert accumulator.usage == {"input_tokens": 10, "output_tokens": 20}
+    assert accumulator.finish_reason == "tool_use"
+
+def test_accumulator_keeps_whole_tool_calls_apart():
+    accumulator = StreamAccumulator()
+    accumulator.add(StreamEvent("tool_call", name="a", arguments="{}"))
+    accumulator.add(StreamEvent("tool_call", name="b", arguments="{\"x\": 1}"))
+    assert [call.function_name for call in accumulator.result().content] == ["a", "b"]
+
+def test_accumulator_assembles_text():
+    accumulator = StreamAccumulator()
+    for text in ("Hello", " from", " OpenAI"):
+        accumulator.add(StreamEvent("text", text=text))
+    assert accumulator.result().model_dump() == {"content_type": "message", "content": "Hello from OpenAI"}
+
+def test_lenient_accumulator_keeps_malformed_arguments():
+    import pytest
+    accumulator = StreamAccumulator()
+    accumulator.add(StreamEvent("tool_call", index=0, name="get_weather", arguments="{\"location\": "))
+    with pytest.raises(ValueError):
+        accumulator.result()
+    call = accumulator.result(strict=False).content[0]
+    assert call.arguments == {StreamAccumulator.RAW_ARGUMENTS_KEY: "{\"location\": "}
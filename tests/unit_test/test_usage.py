@@ -0,0 +1,107 @@
+import asyncio
+import json
+import pytest
+from typing import TypedDict, List
+from orkes.graph.core import OrkesGraph
+from orkes.graph.schema import RunUsage, TokenBudgetExceededError
+from orkes.services.streaming import ServerSentEvent, StreamAccumulator
+from orkes.services.strategies import OpenAIStyleStrategy, AnthropicStrategy, GoogleGeminiStrategy
+from orkes.shared.context import usage_var
+from orkes.shared.schema import UsageSchema, OrkesMessagesSchema, OrkesMessageSchema
+
+def test_openai_usage():
+    strategy = OpenAIStyleStrategy()
+    usage = strategy.parse_usage({"usage": {"prompt_tokens": 9, "completion_tokens": 12, "total_tokens": 21}})
+    assert usage == UsageSchema(input_tokens=9, output_tokens=12, total_tokens=21)
+    assert strategy.parse_usage({"choices": []}) is None
+    assert strategy.parse_stream_usage({"prompt_tokens": 2, "completion_tokens": 3}).total_tokens == 5
+
+def test_openai_streams_request_usage():
+    messages = OrkesMessagesSchema(messages=[OrkesMessageSchema(role="user", content="Hi")])
+    # Opt-in, as some compatible servers reject the field.
+    assert "stream_options" not in OpenAIStyleStrategy().prepare_payload("m", messages, True, {})
+    strategy = OpenAIStyleStrategy(stream_usage=True)
+    assert strategy.prepare_payload("m", messages, True, {})["stream_options"] == {"include_usage": True}
+    assert "stream_options" not in strategy.prepare_payload("m", messages, False, {})
+    assert strategy.prepare_payload("m", messages, True, {"stream_options": {}})["stream_options"] == {}
+
+def test_anthropic_usage_counts_cached_prompt_tokens():
+    strategy = AnthropicStrategy()
+    usage = strategy.parse_usage({"usage": {"input_tokens": 10, "cache_read_input_tokens": 90, "output_tokens": 20}})
+    assert usage == UsageSchema(input_tokens=100, output_tokens=20, total_tokens=120)
+    # message_start reports the input tokens, message_delta the running output count.
+    accumulator = StreamAccumulator()
+    for data in (
+        {"type": "message_start", "message": {"usage": {"input_tokens": 10, "output_tokens": 1}}},
+        {"type": "message_delta", "delta": {"stop_reason": "end_turn"}, "usage": {"output_tokens": 20}},
+    ):
+        for event in strategy.parse_stream_event(ServerSentEvent(json.dumps(data))):
+            accumulator.add(event)
+    assert strategy.parse_stream_usage(accumulator.usage) == UsageSchema(input_tokens=10, output_tokens=20, total_tokens=30)
+
+def test_gemini_usage_counts_thinking_tokens():
+    strategy = GoogleGeminiStrategy()
+    usage = strategy.parse_usage({"usageMetadata": {"promptTokenCount": 4, "candidatesTokenCount": 10, "thoughtsTokenCount": 6, "totalTokenCount": 20}})
+    assert usage == UsageSchema(input_tokens=4, output_tokens=16, total_tokens=20)
+    assert strategy.parse_stream_usage({}) is None
+
+def test_run_usage_budget():
+    usage = RunUsage(token_budget=50)
+    usage.add(UsageSchema(input_tokens=20, output_tokens=30, total_tokens=50), latency=0.5)
+    usage.add(None, latency=0.25)
+    usage.check()
+    assert (usage.llm_calls, usage.total_tokens, usage.latency) == (2, 50, 0.75)
+    usage.add(UsageSchema(output_tokens=1, total_tokens=1))
+    with pytest.raises(TokenBudgetExceededError) as info:
+        usage.check()
+    assert (info.value.token_budget, info.value.total_tokens) == (50, 51)
+
+class SpendState(TypedDict):
+    visited: List[str]
+
+def spend(name: str):
+    def node(state: SpendState) -> SpendState:
+        # Stands for a node whose LLM client reports 40 tokens.
+        usage_var.get().add(UsageSchema(input_tokens=30, output_tokens=10, total_tokens=40))
+        state["visited"] = state["visited"] + [name]
+        return state
+    return node
+
+def build_graph(token_budget, traced=True):
+    workflow = OrkesGraph(state=SpendState, name="spend_graph", traced=traced, token_budget=token_budget)
+    for name in ("a", "b", "c", "d"):
+        workflow.add_node(name, spend(name))
+    workflow.add_edge(workflow.START, "a")
+    workflow.add_edge("a", "b")
+    workflow.add_edge("b", "c")
+    workflow.add_edge("c", "d")
+    workflow.add_edge("d", workflow.END)
+    return workflow.compile()
+
+def test_runner_aggregates_usage():
+    ctx = build_graph(None).run_with_context({"visited": []})
+    assert ctx.graph_state["visited"] == ["a", "b", "c", "d"]
+    assert ctx.trace.status == "FINISHED"
+    assert (ctx.trace.llm_calls, ctx.trace.total_input_tokens, ctx.trace.total_output_tokens, ctx.trace.total_tokens) == (4, 120, 40, 160)
+
+@pytest.mark.parametrize("traced", [True, False])
+def test_runner_stops_once_budget_is_exceeded(traced):
+    app = build_graph(100, traced=traced)
+    with pytest.raises(TokenBudgetExceededError):
+        app.run({"visited": []})
+    # The node that crossed the budget completes; the next one never runs.
+    assert app.graph_state["visited"] == ["a", "b", "c"]
+    if traced:
+        assert app.trace.status == "BUDGET_EXCEEDED"
+        assert (app.trace.total_tokens, app.trace.token_budget) == (120, 100)
+
+def test_batch_reports_budget_status():
+    app = build_graph(100)
+    results = asyncio.run(app.arun_batch([{"visited": []}]))
+    assert results[0].status == "BUDGET_EXCEEDED"
+    assert isinstance(results[0].error, TokenBudgetExceededError)
+    assert usage_var.get() is None
+
+def test_negative_budget_is_rejected():
+    with pytest.raises(ValueError):
+        build_graph(-1)
@@ -46,3 +46,36 @@ def test_callable_to_orkes_tool_schema():
     assert "name" in parameters.required
     assert "age" in parameters.required
     assert "city" not in parameters.required
+
+def test_tool_schemas_are_memoized_per_function():
+    class Tools:
+        def lookup(self, query: str) -> str:
+            """
+            Looks something up.
+
+            Args:
+                query (str): What to look up.
+            """
+            return query
+
+    first = callable_to_orkes_tool_schema(sample_function)
+    assert callable_to_orkes_tool_schema(sample_function) is first
+
+    # Bound methods of different instances share their function's schema.
+    schema = callable_to_orkes_tool_schema(Tools().lookup)
+    assert callable_to_orkes_tool_schema(Tools().lookup) is schema
+    assert list(schema.parameters.properties) == ["query"]
+
+def test_tools_payload_is_cached_per_tool_set():
+    from orkes.services.strategies import OpenAIStyleStrategy, AnthropicStrategy
+
+    tools = [callable_to_orkes_tool_schema(sample_function)]
+    openai, anthropic = OpenAIStyleStrategy(), AnthropicStrategy()
+    payload = openai.tools_payload(tools)
+    assert payload == openai.get_tools_payload(tools)
+    assert openai.tools_payload(list(tools)) is payload
+    assert anthropic.tools_payload(tools) is not payload
+    assert anthropic.tools_payload(tools)[0]["name"] == "sample_function"
+
+    other = tools[0].model_copy()
+    assert openai.tools_payload([other]) is not payload